@@ -5,6 +5,7 @@
 # LICENSE file in the root directory of this source tree.
 
 import ctypes
+import hashlib
 
 from typing import cast, Dict, List, Optional, Tuple
 
@@ -87,10 +88,16 @@ class NodeVisitor:
         exported_program: ExportedProgram,
         external_ids: Dict,
         constant_data_bytes: bytearray,
+        constant_data_offsets: Optional[Dict[Tuple[int, str], int]] = None,
     ) -> None:
         self._external_ids = external_ids or {}
         self._exported_program = exported_program or None
         self._constant_data_bytes = constant_data_bytes
+        # Maps the size and hash of each blob in constant_data_bytes to its
+        # offset, so that identical constants are only stored once.
+        self._constant_data_offsets = (
+            constant_data_offsets if constant_data_offsets is not None else {}
+        )
 
     @property
     def external_ids(self) -> Dict:
@@ -515,7 +522,8 @@ class NodeVisitor:
 
         Returns:
             buffer_idx: idx of the serialized data. 0 If not associated constant
-                        data
+                        data. Constants whose serialized data is identical to
+                        an earlier one share its bytes, but get their own idx.
         """
         # The get_attr node is the input to quant_params.
         get_attr_node = tensor if quant_params is None else quant_params.q_input
@@ -555,12 +563,16 @@ class NodeVisitor:
             ctypes.POINTER(array_type),
         ).contents
 
-        offset = len(self._constant_data_bytes)
         size = const_val.untyped_storage().nbytes()
+        key = (size, hashlib.sha256(array).hexdigest())
+        offset = self._constant_data_offsets.get(key)
+        if offset is None:
+            offset = len(self._constant_data_bytes)
+            self._constant_data_offsets[key] = offset
+            self._constant_data_bytes.extend(
+                _pad_to(bytes(array), _aligned_size(size, CONSTANT_TENSOR_ALIGNMENT))
+            )
         xnn_graph.constant_data.append(ConstantDataOffset(offset=offset, size=size))
-        self._constant_data_bytes.extend(
-            _pad_to(bytes(array), _aligned_size(size, CONSTANT_TENSOR_ALIGNMENT))
-        )
 
         return buffer_idx
 
@@ -6,6 +6,8 @@
 
 import unittest
 
+import torch
+from executorch.backends.xnnpack.partition.xnnpack_partitioner import XnnpackPartitioner
 from executorch.backends.xnnpack.serialization.xnnpack_graph_schema import (
     ConstantDataOffset,
     XNNGraph,
@@ -16,6 +18,8 @@ from executorch.backends.xnnpack.serialization.xnnpack_graph_serialize import (
     serialize_xnnpack_binary,
     XNNHeader,
 )
+from executorch.exir import to_edge_transform_and_lower
+from executorch.exir.lowered_backend_module import get_lowered_submodules
 
 
 class TestSerialization(unittest.TestCase):
@@ -48,3 +52,28 @@ class TestSerialization(unittest.TestCase):
         self.assertEqual(
             serialized_binary[flatbuffer_offset:][XNNHeader.MAGIC_OFFSET], b"XN01"
         )
+
+    def test_identical_constants_are_stored_once(self):
+        class TiedLinears(torch.nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.first = torch.nn.Linear(64, 64, bias=False)
+                self.second = torch.nn.Linear(64, 64, bias=False)
+                self.third = torch.nn.Linear(64, 64, bias=False)
+                with torch.no_grad():
+                    self.second.weight.copy_(self.first.weight)
+
+            def forward(self, x):
+                return self.third(self.second(self.first(x)))
+
+        edge = to_edge_transform_and_lower(
+            torch.export.export(TiedLinears(), (torch.randn(1, 64),)),
+            partitioner=[XnnpackPartitioner()],
+        )
+        lowered_modules = get_lowered_submodules(edge.exported_program().graph_module)
+        self.assertEqual(len(lowered_modules), 1)
+        processed_bytes = lowered_modules[0][1].processed_bytes
+        header = XNNHeader.from_bytes(processed_bytes[: XNNHeader.EXPECTED_LENGTH])
+
+        # Each weight is 64 * 64 fp32 values; the first two are identical.
+        self.assertEqual(header.constant_data_size, 2 * 64 * 64 * 4)
@@ -162,7 +162,9 @@ class XnnpackBackend(BackendDetails):
         )
 
         constant_data_bytes = bytearray()
-        node_visitors = get_node_visitors(ep, node_to_external_map, constant_data_bytes)
+        node_visitors = get_node_visitors(
+            ep, node_to_external_map, constant_data_bytes, {}
+        )
 
         for node in graph_module.graph.nodes:
             if node.op == "call_function":
@@ -0,0 +1,222 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-strict
+
+"""Reads etdump_schema_flatcc.fbs flatbuffer data in-process.
+
+This is an alternative to decompiling the ETDump to JSON with `flatc` and
+rebuilding the dataclasses from it. The flatbuffer tables are parsed directly
+with `struct`, one RunData at a time, so that callers which process runs one by
+one never hold more than a single run's worth of python objects.
+
+Missing fields get the same values that `flatc --defaults-json` would produce
+for them, like the JSON path. Field slots below must be kept in sync with
+etdump_schema_flatcc.fbs.
+"""
+
+import struct
+from typing import Iterator, List, Optional
+
+from executorch.devtools.etdump.schema_flatcc import (
+    AllocationEvent,
+    Allocator,
+    Bool,
+    DebugEvent,
+    Double,
+    ETDumpFlatCC,
+    Event,
+    Float,
+    Int,
+    ProfileEvent,
+    RunData,
+    Tensor,
+    TensorList,
+    Value,
+)
+from executorch.exir._serialize.flatbuffer_reader import (
+    BOOL,
+    FLOAT32,
+    FLOAT64,
+    INT32,
+    INT64,
+    INT8,
+    Table,
+    UINT32,
+    UINT64,
+)
+from executorch.exir.scalar_type import ScalarType
+
+# The file_identifier declared in etdump_schema_flatcc.fbs.
+_ETDUMP_FILE_IDENTIFIER: bytes = b"ED00"
+
+# Names of the ValueType enum values, which Value.val holds.
+_VALUE_TYPE_NAMES: List[str] = [
+    "Null",
+    "Int",
+    "Bool",
+    "Float",
+    "Double",
+    "Tensor",
+    "TensorList",
+    "String",
+]
+
+
+def _tensor(t: Table) -> Tensor:
+    return Tensor(
+        scalar_type=ScalarType(t.scalar(0, INT8)),
+        sizes=t.scalar_vector(1, INT64) or [],
+        strides=t.scalar_vector(2, INT64) or [],
+        offset=t.scalar(3, INT64),
+    )
+
+
+def _optional_bool(t: Optional[Table]) -> Optional[Bool]:
+    return None if t is None else Bool(bool_val=t.scalar(0, BOOL, False))
+
+
+def _value(t: Table) -> Value:
+    tensor = t.table(1)
+    tensor_list = t.table(2)
+    int_value = t.table(3)
+    float_value = t.table(4)
+    double_value = t.table(5)
+    val = t.scalar(0, INT8)
+    if not 0 <= val < len(_VALUE_TYPE_NAMES):
+        raise ValueError(f"Unknown ValueType {val}")
+    return Value(
+        val=_VALUE_TYPE_NAMES[val],
+        tensor=None if tensor is None else _tensor(tensor),
+        tensor_list=(
+            None
+            if tensor_list is None
+            else TensorList(
+                tensors=[_tensor(x) for x in tensor_list.table_vector(0) or []]
+            )
+        ),
+        int_value=(
+            None if int_value is None else Int(int_val=int_value.scalar(0, INT64))
+        ),
+        float_value=(
+            None
+            if float_value is None
+            else Float(float_val=float_value.scalar(0, FLOAT32, 0.0))
+        ),
+        double_value=(
+            None
+            if double_value is None
+            else Double(double_val=double_value.scalar(0, FLOAT64, 0.0))
+        ),
+        bool_value=_optional_bool(t.table(6)),
+        output=_optional_bool(t.table(7)),
+    )
+
+
+def _profile_event(t: Table) -> ProfileEvent:
+    metadata = t.byte_vector(5)
+    return ProfileEvent(
+        name=t.string(0),
+        chain_index=t.scalar(1, INT32),
+        instruction_id=t.scalar(2, INT32, -1),
+        delegate_debug_id_int=t.scalar(3, INT32, -1),
+        delegate_debug_id_str=t.string(4),
+        delegate_debug_metadata=None if metadata is None else bytes(metadata),
+        start_time=t.scalar(6, UINT64),
+        end_time=t.scalar(7, UINT64),
+    )
+
+
+def _allocation_event(t: Table) -> AllocationEvent:
+    return AllocationEvent(
+        allocator_id=t.scalar(0, INT32),
+        allocation_size=t.scalar(1, UINT64),
+    )
+
+
+def _debug_event(t: Table) -> DebugEvent:
+    debug_entry = t.table(2)
+    if debug_entry is None:
+        raise ValueError("DebugEvent is missing its debug_entry field")
+    return DebugEvent(
+        name=t.string(5),
+        chain_index=t.scalar(0, UINT64),
+        instruction_id=t.scalar(1, INT32, -1),
+        delegate_debug_id_int=t.scalar(3, INT32, -1),
+        delegate_debug_id_str=t.string(4),
+        debug_entry=_value(debug_entry),
+    )
+
+
+def _event(t: Table) -> Event:
+    profile_event = t.table(0)
+    allocation_event = t.table(1)
+    debug_event = t.table(2)
+    return Event(
+        profile_event=None if profile_event is None else _profile_event(profile_event),
+        allocation_event=(
+            None if allocation_event is None else _allocation_event(allocation_event)
+        ),
+        debug_event=None if debug_event is None else _debug_event(debug_event),
+    )
+
+
+def _run_data(t: Table) -> RunData:
+    allocators = t.table_vector(2)
+    events = t.table_vector(3)
+    return RunData(
+        name=t.string(0) or "",
+        bundled_input_index=t.scalar(1, INT32, -1),
+        allocators=(
+            None
+            if allocators is None
+            else [Allocator(name=a.string(0) or "") for a in allocators]
+        ),
+        events=None if events is None else [_event(e) for e in events],
+    )
+
+
+def _root(data: memoryview, size_prefixed: bool) -> Table:
+    if size_prefixed:
+        if len(data) < 4:
+            raise ValueError(f"ETDump data length {len(data)} < 4")
+        size = struct.unpack_from("<I", data, 0)[0]
+        data = data[4 : 4 + size]
+    if len(data) < 8:
+        raise ValueError(f"ETDump data length {len(data)} < 8")
+    identifier = bytes(data[4:8])
+    if identifier != _ETDUMP_FILE_IDENTIFIER:
+        raise ValueError(
+            f"ETDump data identifier {identifier!r} != {_ETDUMP_FILE_IDENTIFIER!r}"
+        )
+    return Table(data, struct.unpack_from("<I", data, 0)[0])
+
+
+def _etdump_version(data: memoryview, size_prefixed: bool = True) -> int:
+    """Returns the schema version of the ETDump in `data`."""
+    return _root(data, size_prefixed).scalar(0, UINT32)
+
+
+def _iter_run_data(data: memoryview, size_prefixed: bool = True) -> Iterator[RunData]:
+    """Yields the RunData entries of the ETDump in `data`, parsing each one only
+    when it is requested.
+
+    The yielded objects don't refer to `data`, so it can be released as soon
+    as the iteration is done.
+
+    Raises:
+        ValueError: If the data does not look like an ETDump flatbuffer.
+    """
+    for run_data in _root(data, size_prefixed).table_vector(1) or []:
+        yield _run_data(run_data)
+
+
+def _flatbuffer_to_etdump(data: memoryview, size_prefixed: bool = True) -> ETDumpFlatCC:
+    """Parses an entire ETDump flatbuffer without invoking `flatc`."""
+    return ETDumpFlatCC(
+        version=_etdump_version(data, size_prefixed),
+        run_data=list(_iter_run_data(data, size_prefixed)),
+    )
@@ -7,11 +7,17 @@
 # pyre-strict
 
 import json
+import mmap
 import os
 import tempfile
+from typing import Iterator, Optional
 
 import pkg_resources
-from executorch.devtools.etdump.schema_flatcc import ETDumpFlatCC
+from executorch.devtools.etdump._flatbuffer_etdump import (
+    _flatbuffer_to_etdump,
+    _iter_run_data,
+)
+from executorch.devtools.etdump.schema_flatcc import ETDumpFlatCC, RunData
 
 from executorch.exir._serialize._dataclass import _DataclassEncoder, _json_to_dataclass
 
@@ -21,6 +27,16 @@ from executorch.exir._serialize._flatbuffer import _flatc_compile, _flatc_decomp
 ETDUMP_FLATCC_SCHEMA_NAME = "etdump_schema_flatcc"
 SCALAR_TYPE_SCHEMA_NAME = "scalar_type"
 
+# If this environment variable is set to true, deserialize etdumps by
+# converting them to JSON with `flatc`, instead of reading the flatbuffer data
+# in-process.
+_DESERIALIZE_WITH_FLATC_ENV: str = "ET_DEVTOOLS_DESERIALIZE_WITH_FLATC"
+
+
+def _use_flatc() -> bool:
+    """Returns True if etdumps should be deserialized using JSON and `flatc`."""
+    return os.getenv(_DESERIALIZE_WITH_FLATC_ENV, "").strip() not in {"", "0"}
+
 
 def _write_schema(d: str, schema_name: str) -> None:
     schema_path = os.path.join(d, "{}.fbs".format(schema_name))
@@ -105,6 +121,55 @@ def deserialize_from_etdump_flatcc(
     Returns:
         Deserialized ETDump python object.
     """
-    return _deserialize_from_json_to_etdump_flatcc(
-        _convert_from_flatcc(data, size_prefixed)
-    )
+    if _use_flatc():
+        return _deserialize_from_json_to_etdump_flatcc(
+            _convert_from_flatcc(data, size_prefixed)
+        )
+    return _flatbuffer_to_etdump(memoryview(data), size_prefixed)
+
+
+def deserialize_run_data_from_etdump_flatcc(
+    data: Optional[bytes] = None,
+    path: Optional[str] = None,
+    size_prefixed: bool = True,
+) -> Iterator[RunData]:
+    """
+    Lazily deserializes the runs in an etdump binary blob (constructed using
+    the FlatCC schema), yielding one RunData at a time. Unlike
+    deserialize_from_etdump_flatcc, only the run being processed is kept in
+    memory, and when reading from a path the file is memory-mapped instead of
+    being read in full.
+    Args:
+        data: Serialized etdump binary blob. Exactly one of data and path
+            must be given.
+        path: Path to a serialized etdump file.
+    Returns:
+        An iterator over the deserialized RunData objects.
+    """
+    if (data is None) == (path is None):
+        raise ValueError("Exactly one of data and path must be specified.")
+    if data is not None:
+        yield from _iter_run_data(memoryview(data), size_prefixed)
+        return
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files can't be memory mapped, so parse them as empty data
+            # to raise the same error.
+            m = None
+        else:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if m is None:
+        yield from _iter_run_data(memoryview(b""), size_prefixed)
+        return
+    view = memoryview(m)
+    try:
+        yield from _iter_run_data(view, size_prefixed)
+    finally:
+        try:
+            view.release()
+            m.close()
+        except BufferError:
+            # Views of the map are still referenced, e.g. by the traceback of
+            # an error raised while parsing it. The map is then closed once
+            # they are garbage collected, so that the error isn't replaced.
+            pass
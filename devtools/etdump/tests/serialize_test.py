@@ -8,14 +8,20 @@
 
 import difflib
 import json
+import os
+import tempfile
 import unittest
 from pprint import pformat
-from typing import List
+from typing import Iterator, List
+from unittest.mock import patch
 
 import executorch.devtools.etdump.schema_flatcc as flatcc
+from executorch.devtools.etdump import serialize
 
 from executorch.devtools.etdump.serialize import (
+    _DESERIALIZE_WITH_FLATC_ENV,
     deserialize_from_etdump_flatcc,
+    deserialize_run_data_from_etdump_flatcc,
     serialize_to_etdump_flatcc,
 )
 from executorch.exir._serialize._dataclass import _DataclassEncoder
@@ -140,3 +146,96 @@ class TestSerializeFlatCC(unittest.TestCase):
                 )
             ),
         )
+
+    def test_deserialize_matches_flatc(self) -> None:
+        etdump = get_sample_etdump_flatcc()
+        etdump.run_data.append(
+            flatcc.RunData(
+                name="empty_block",
+                bundled_input_index=3,
+                allocators=None,
+                events=None,
+            )
+        )
+        data = serialize_to_etdump_flatcc(etdump)
+
+        os.environ[_DESERIALIZE_WITH_FLATC_ENV] = "1"
+        try:
+            expected = deserialize_from_etdump_flatcc(data, size_prefixed=False)
+        finally:
+            del os.environ[_DESERIALIZE_WITH_FLATC_ENV]
+        self.assertEqual(expected, etdump)
+        self.assertEqual(
+            deserialize_from_etdump_flatcc(data, size_prefixed=False), expected
+        )
+
+        # A size-prefixed buffer, like the runtime writes.
+        prefixed = len(data).to_bytes(4, "little") + data
+        self.assertEqual(deserialize_from_etdump_flatcc(prefixed), expected)
+
+    def test_deserialize_run_data(self) -> None:
+        etdump = get_sample_etdump_flatcc()
+        etdump.run_data *= 3
+        data = serialize_to_etdump_flatcc(etdump)
+
+        runs = deserialize_run_data_from_etdump_flatcc(data, size_prefixed=False)
+        self.assertEqual(next(runs), etdump.run_data[0])
+        self.assertEqual(list(runs), etdump.run_data[1:])
+
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "etdump.etdp")
+            with open(path, "wb") as f:
+                f.write(data)
+            self.assertEqual(
+                list(
+                    deserialize_run_data_from_etdump_flatcc(
+                        path=path, size_prefixed=False
+                    )
+                ),
+                etdump.run_data,
+            )
+
+    def test_deserialize_run_data_keeps_parse_errors(self) -> None:
+        def iter_run_data(
+            data: memoryview, size_prefixed: bool
+        ) -> Iterator[flatcc.RunData]:
+            # The traceback holds a view of the memory map, which can't be
+            # closed while it is referenced.
+            view = data[4:]  # noqa: F841
+            raise ValueError("Bad run data")
+            yield
+
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "etdump.etdp")
+            with open(path, "wb") as f:
+                f.write(serialize_to_etdump_flatcc(get_sample_etdump_flatcc()))
+            with patch.object(serialize, "_iter_run_data", iter_run_data):
+                with self.assertRaisesRegex(ValueError, "Bad run data"):
+                    list(deserialize_run_data_from_etdump_flatcc(path=path))
+
+    def test_deserialize_run_data_from_empty_file_fails(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "etdump.etdp")
+            open(path, "wb").close()
+            for size_prefixed in [True, False]:
+                with self.assertRaises(ValueError) as data_error:
+                    list(
+                        deserialize_run_data_from_etdump_flatcc(
+                            b"", size_prefixed=size_prefixed
+                        )
+                    )
+                with self.assertRaises(ValueError) as path_error:
+                    list(
+                        deserialize_run_data_from_etdump_flatcc(
+                            path=path, size_prefixed=size_prefixed
+                        )
+                    )
+                # Empty files fail like empty data.
+                self.assertRegex(str(path_error.exception), "ETDump data length 0")
+                self.assertEqual(str(path_error.exception), str(data_error.exception))
+
+    def test_deserialize_bad_identifier_fails(self) -> None:
+        data = bytearray(serialize_to_etdump_flatcc(get_sample_etdump_flatcc()))
+        data[4:8] = b"XX00"
+        with self.assertRaises(ValueError):
+            deserialize_from_etdump_flatcc(bytes(data), size_prefixed=False)
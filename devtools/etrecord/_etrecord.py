@@ -6,12 +6,30 @@
 
 # pyre-unsafe
 
+import dataclasses
+import functools
+import io
 import json
 import os
 import pickle
+import struct
 from dataclasses import dataclass
-from typing import BinaryIO, Dict, IO, List, Optional, Union
-from zipfile import BadZipFile, ZipFile
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    IO,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    TypeVar,
+    Union,
+)
+from zipfile import BadZipFile, ZIP_STORED, ZipFile
+
+import torch
 
 from executorch import exir
 from executorch.devtools.bundled_program.core import BundledProgram
@@ -26,11 +44,16 @@ from executorch.exir import (
 )
 from executorch.exir.emit._emitter import _DelegateDebugIdentifierMap
 
-from executorch.exir.serde.export_serialize import SerializedArtifact
+from executorch.exir.serde.export_serialize import (
+    deserialize_torch_artifact,
+    SerializedArtifact,
+)
 from executorch.exir.serde.serialize import deserialize, serialize
 
 ProgramOutput = List[Value]
 
+T = TypeVar("T")
+
 try:
     # breaking change introduced in python 3.11
     # pyre-ignore
@@ -51,35 +74,263 @@ class ETRecordReservedFileNames(StrEnum):
     REFERENCE_OUTPUTS = "reference_outputs"
 
 
+# Suffixes of the entries that hold the tensors of each serialized program.
+_STATE_DICT_SUFFIX = "_state_dict"
+_CONSTANTS_SUFFIX = "_constants"
+_EXAMPLE_INPUTS_SUFFIX = "_example_inputs"
+
+
+class _LazyMapping(Mapping[str, T]):
+    """
+    A read-only mapping whose values are computed by the given functions the
+    first time they are accessed.
+    """
+
+    def __init__(self, loaders: Dict[str, Callable[[], T]]) -> None:
+        self._loaders = loaders
+        self._values: Dict[str, T] = {}
+
+    def __getitem__(self, key: str) -> T:
+        if key not in self._values:
+            self._values[key] = self._loaders[key]()
+        return self._values[key]
+
+    def __contains__(self, key: object) -> bool:
+        # Mapping.__contains__ would load the value.
+        return key in self._loaders
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._loaders)
+
+    def __len__(self) -> int:
+        return len(self._loaders)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self._loaders)})"
+
+
+class _ZipEntryReader(io.RawIOBase):
+    """
+    Seekable reader of an uncompressed zip entry, reading straight from the
+    zip file, so that torch.load can skip over the tensor data it doesn't need.
+    """
+
+    def __init__(self, f: BinaryIO, offset: int, size: int) -> None:
+        self._f = f
+        self._offset = offset
+        self._size = size
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._position = offset
+        return offset
+
+    def readinto(self, buffer: Any) -> int:
+        size = min(len(buffer), self._size - self._position)
+        if size <= 0:
+            return 0
+        self._f.seek(self._offset + self._position)
+        read = self._f.readinto(memoryview(buffer)[:size])
+        self._position += read
+        return read
+
+
+class _ETRecordReader:
+    """
+    Deserializes the programs of an ETRecord file on demand.
+    """
+
+    def __init__(self, etrecord_path: str, program_names: List[str]) -> None:
+        self.etrecord_path = etrecord_path
+        self.program_names = program_names
+
+    def _load_tensors(self, etrecord_zip: ZipFile, name: str, weights: bool) -> Any:
+        info = etrecord_zip.getinfo(name)
+        if info.file_size == 0:
+            return deserialize_torch_artifact(b"")
+        if weights:
+            return deserialize_torch_artifact(etrecord_zip.read(name))
+        if info.compress_type != ZIP_STORED:
+            return torch.load(
+                io.BytesIO(etrecord_zip.read(name)),
+                map_location="meta",
+                weights_only=False,
+            )
+        # Only read the metadata of the tensors, not their data.
+        with open(self.etrecord_path, "rb") as f:
+            f.seek(info.header_offset)
+            header = f.read(30)
+            if header[:4] != b"PK\x03\x04":
+                raise BadZipFile(f"Bad local file header for {name}")
+            name_length, extra_length = struct.unpack("<HH", header[26:30])
+            offset = info.header_offset + 30 + name_length + extra_length
+            return torch.load(
+                _ZipEntryReader(f, offset, info.file_size),
+                map_location="meta",
+                weights_only=False,
+            )
+
+    def load(self, name: str, weights: bool = True) -> ExportedProgram:
+        """
+        Deserializes the program stored under the given name. Without weights,
+        its parameters, buffers and constants are meta tensors, and loading it
+        only reads the graph, however large the weights are.
+        """
+        with ZipFile(self.etrecord_path, "r") as etrecord_zip:
+            return deserialize(
+                SerializedArtifact(
+                    etrecord_zip.read(name),
+                    self._load_tensors(
+                        etrecord_zip, f"{name}{_STATE_DICT_SUFFIX}", weights
+                    ),
+                    self._load_tensors(
+                        etrecord_zip, f"{name}{_CONSTANTS_SUFFIX}", weights
+                    ),
+                    self._load_tensors(
+                        etrecord_zip, f"{name}{_EXAMPLE_INPUTS_SUFFIX}", weights
+                    ),
+                )
+            )
+
+
+class _LazyEdgeDialectProgram:
+    """
+    Descriptor of ETRecord.edge_dialect_program, which parse_etrecord leaves
+    to be deserialized the first time it is accessed.
+    """
+
+    def __get__(
+        self, etrecord: Optional["ETRecord"], owner: Any = None
+    ) -> Optional[ExportedProgram]:
+        if etrecord is None:
+            # The default value of the dataclass field
+            return None
+        if etrecord._edge_dialect_program is None and etrecord._has_edge_program():
+            etrecord._edge_dialect_program = etrecord._reader.load(
+                ETRecordReservedFileNames.EDGE_DIALECT_EXPORTED_PROGRAM
+            )
+        return etrecord._edge_dialect_program
+
+    def __set__(self, etrecord: "ETRecord", program: Optional[ExportedProgram]) -> None:
+        etrecord._edge_dialect_program = program
+
+
 @dataclass
 class ETRecord:
-    edge_dialect_program: Optional[ExportedProgram] = None
-    graph_map: Optional[Dict[str, ExportedProgram]] = None
+    """
+    The programs and debug information of an ETRecord. The programs of an
+    ETRecord returned by parse_etrecord are deserialized the first time they
+    are accessed, so the ETRecord file must not change until then.
+    """
+
+    edge_dialect_program: Optional[ExportedProgram] = _LazyEdgeDialectProgram()
+    graph_map: Optional[Mapping[str, ExportedProgram]] = None
     _debug_handle_map: Optional[Dict[int, Union[int, List[int]]]] = None
     _delegate_map: Optional[
         Dict[str, Dict[int, Dict[str, Union[str, _DelegateDebugIdentifierMap]]]]
     ] = None
     _reference_outputs: Optional[Dict[str, List[ProgramOutput]]] = None
+    _reader: Optional[_ETRecordReader] = dataclasses.field(
+        default=None, repr=False, compare=False
+    )
 
+    def _has_edge_program(self) -> bool:
+        return (
+            self._reader is not None
+            and ETRecordReservedFileNames.EDGE_DIALECT_EXPORTED_PROGRAM
+            in self._reader.program_names
+        )
 
-def _handle_exported_program(
-    etrecord_zip: ZipFile, module_name: str, method_name: str, ep: ExportedProgram
+    def _get_program_graph(
+        self, name: Optional[str] = None
+    ) -> Optional[ExportedProgram]:
+        """
+        Returns the program with the given name in graph_map, or the edge
+        dialect program if no name is given, for uses that only need its graph.
+        Unless the program was already loaded, it is deserialized without its
+        weights, and not kept.
+        """
+        if name is None:
+            if self._edge_dialect_program is not None or not self._has_edge_program():
+                return self._edge_dialect_program
+            return self._reader.load(
+                ETRecordReservedFileNames.EDGE_DIALECT_EXPORTED_PROGRAM, weights=False
+            )
+        graph_map = self.graph_map
+        if graph_map is None or name not in graph_map:
+            return None
+        if (
+            isinstance(graph_map, _LazyMapping)
+            and name not in graph_map._values
+            and self._reader is not None
+        ):
+            return self._reader.load(name, weights=False)
+        return graph_map[name]
+
+
+def _strip_weights(serialized_tensors: bytes) -> bytes:
+    """
+    Replaces the tensors in a serialized state dict or constants dict by meta
+    tensors, which keep their shapes and dtypes but hold no data.
+    """
+    if len(serialized_tensors) == 0:
+        return serialized_tensors
+    buffer = io.BytesIO()
+    torch.save(
+        torch.load(
+            io.BytesIO(serialized_tensors), map_location="meta", weights_only=False
+        ),
+        buffer,
+    )
+    return buffer.getvalue()
+
+
+def _write_exported_program(
+    etrecord_zip: ZipFile, name: str, ep: ExportedProgram, include_weights: bool
 ) -> None:
-    assert isinstance(ep, ExportedProgram)
     serialized_artifact = serialize(ep)
     assert isinstance(serialized_artifact.exported_program, bytes)
-    etrecord_zip.writestr(
-        f"{module_name}/{method_name}", serialized_artifact.exported_program
-    )
-    etrecord_zip.writestr(
-        f"{module_name}/{method_name}_state_dict", serialized_artifact.state_dict
-    )
-    etrecord_zip.writestr(
-        f"{module_name}/{method_name}_constants", serialized_artifact.constants
+    state_dict, constants = (
+        serialized_artifact.state_dict,
+        serialized_artifact.constants,
     )
+    if not include_weights:
+        state_dict, constants = _strip_weights(state_dict), _strip_weights(constants)
+    etrecord_zip.writestr(name, serialized_artifact.exported_program)
+    # The tensors are stored uncompressed, so that they can be skipped over
+    # when only the graph is needed.
+    etrecord_zip.writestr(f"{name}{_STATE_DICT_SUFFIX}", state_dict, ZIP_STORED)
+    etrecord_zip.writestr(f"{name}{_CONSTANTS_SUFFIX}", constants, ZIP_STORED)
     etrecord_zip.writestr(
-        f"{module_name}/{method_name}_example_inputs",
+        f"{name}{_EXAMPLE_INPUTS_SUFFIX}",
         serialized_artifact.example_inputs,
+        ZIP_STORED,
+    )
+
+
+def _handle_exported_program(
+    etrecord_zip: ZipFile,
+    module_name: str,
+    method_name: str,
+    ep: ExportedProgram,
+    include_weights: bool = True,
+) -> None:
+    assert isinstance(ep, ExportedProgram)
+    _write_exported_program(
+        etrecord_zip, f"{module_name}/{method_name}", ep, include_weights
     )
 
 
@@ -91,13 +342,20 @@ def _handle_export_module(
         ExportedProgram,
     ],
     module_name: str,
+    include_weights: bool = True,
 ) -> None:
     if isinstance(export_module, ExirExportedProgram):
         _handle_exported_program(
-            etrecord_zip, module_name, "forward", export_module.exported_program
+            etrecord_zip,
+            module_name,
+            "forward",
+            export_module.exported_program,
+            include_weights,
         )
     elif isinstance(export_module, ExportedProgram):
-        _handle_exported_program(etrecord_zip, module_name, "forward", export_module)
+        _handle_exported_program(
+            etrecord_zip, module_name, "forward", export_module, include_weights
+        )
     elif isinstance(
         export_module,
         (EdgeProgramManager, exir.program._program.EdgeProgramManager),
@@ -108,32 +366,22 @@ def _handle_export_module(
                 module_name,
                 method,
                 export_module.exported_program(method),
+                include_weights,
             )
     else:
         raise RuntimeError(f"Unsupported graph module type. {type(export_module)}")
 
 
 def _handle_edge_dialect_exported_program(
-    etrecord_zip: ZipFile, edge_dialect_exported_program: ExportedProgram
+    etrecord_zip: ZipFile,
+    edge_dialect_exported_program: ExportedProgram,
+    include_weights: bool = True,
 ) -> None:
-    serialized_artifact = serialize(edge_dialect_exported_program)
-    assert isinstance(serialized_artifact.exported_program, bytes)
-
-    etrecord_zip.writestr(
+    _write_exported_program(
+        etrecord_zip,
         ETRecordReservedFileNames.EDGE_DIALECT_EXPORTED_PROGRAM,
-        serialized_artifact.exported_program,
-    )
-    etrecord_zip.writestr(
-        f"{ETRecordReservedFileNames.EDGE_DIALECT_EXPORTED_PROGRAM}_state_dict",
-        serialized_artifact.state_dict,
-    )
-    etrecord_zip.writestr(
-        f"{ETRecordReservedFileNames.EDGE_DIALECT_EXPORTED_PROGRAM}_constants",
-        serialized_artifact.constants,
-    )
-    etrecord_zip.writestr(
-        f"{ETRecordReservedFileNames.EDGE_DIALECT_EXPORTED_PROGRAM}_example_inputs",
-        serialized_artifact.example_inputs,
+        edge_dialect_exported_program,
+        include_weights,
     )
 
 
@@ -175,6 +423,7 @@ def generate_etrecord(
             ],
         ]
     ] = None,
+    include_weights: bool = True,
 ) -> None:
     """
     Generates an `ETRecord` from the given objects, serializes it and saves it to the given path.
@@ -193,6 +442,9 @@ def generate_etrecord(
         export_modules [Optional]: **Should be ignored by OSS users**. A dictionary of graph modules with the key being the user provided name and the
             value being the corresponding exported module. The exported graph modules can be either the
             output of `torch.export()` or `exir.to_edge()`.
+        include_weights: Whether to store the weights of the graph modules. Without them, the graph modules of the
+            parsed `ETRecord` have meta tensors for parameters, buffers and constants, which is enough for the
+            Developer Tools to map runtime events to the graph, and the `ETRecord` stays small for large models.
 
     Returns:
         None
@@ -201,7 +453,36 @@ def generate_etrecord(
     if isinstance(et_record, (str, os.PathLike)):
         et_record = os.fspath(et_record)  # pyre-ignore
 
-    etrecord_zip = ZipFile(et_record, "w")
+    with ZipFile(et_record, "w") as etrecord_zip:
+        _write_etrecord(
+            etrecord_zip,
+            edge_dialect_program,
+            executorch_program,
+            export_modules,
+            include_weights,
+        )
+
+
+def _write_etrecord(
+    etrecord_zip: ZipFile,
+    edge_dialect_program: Union[EdgeProgramManager, ExirExportedProgram],
+    executorch_program: Union[
+        ExecutorchProgram,
+        ExecutorchProgramManager,
+        BundledProgram,
+    ],
+    export_modules: Optional[
+        Dict[
+            str,
+            Union[
+                ExportedProgram,
+                ExirExportedProgram,
+                EdgeProgramManager,
+            ],
+        ]
+    ],
+    include_weights: bool,
+) -> None:
     # Write the magic file identifier that will be used to verify that this file
     # is an etrecord when it's used later in the Developer Tools.
     etrecord_zip.writestr(ETRecordReservedFileNames.ETRECORD_IDENTIFIER, "")
@@ -216,7 +497,9 @@ def generate_etrecord(
                 raise RuntimeError(
                     f"The name {module_name} provided in the export_modules dict is a reserved name in the ETRecord namespace."
                 )
-            _handle_export_module(etrecord_zip, export_module, module_name)
+            _handle_export_module(
+                etrecord_zip, export_module, module_name, include_weights
+            )
 
     if isinstance(
         edge_dialect_program,
@@ -225,11 +508,13 @@ def generate_etrecord(
         _handle_edge_dialect_exported_program(
             etrecord_zip,
             edge_dialect_program.exported_program(),
+            include_weights,
         )
     elif isinstance(edge_dialect_program, ExirExportedProgram):
         _handle_edge_dialect_exported_program(
             etrecord_zip,
             edge_dialect_program.exported_program,
+            include_weights,
         )
     else:
         raise RuntimeError(
@@ -257,10 +542,11 @@ def generate_etrecord(
     )
 
 
-def parse_etrecord(etrecord_path: str) -> ETRecord:  # noqa: C901
+def parse_etrecord(etrecord_path: str) -> ETRecord:
     """
-    Parses an `ETRecord` file and returns an `ETRecord` object that contains the deserialized graph
-    modules, program buffer, and a debug handle map.
+    Parses an `ETRecord` file and returns an `ETRecord` object that contains the graph modules, program buffer,
+    and a debug handle map. The graph modules are only deserialized the first time they are accessed, so the file
+    must not change until then.
     In the graph map in the returned `ETRecord` object if a model with multiple entry points was provided
     originally by the user during `ETRecord` generation then each entry point will be stored as a separate
     graph module in the `ETRecord` object with the name being `the original module name + "/" + the
@@ -278,78 +564,57 @@ def parse_etrecord(etrecord_path: str) -> ETRecord:  # noqa: C901
     except BadZipFile:
         raise RuntimeError("Invalid etrecord file passed in.")
 
-    file_list = etrecord_zip.namelist()
+    with etrecord_zip:
+        file_list = etrecord_zip.namelist()
 
-    if ETRecordReservedFileNames.ETRECORD_IDENTIFIER not in file_list:
-        raise RuntimeError(
-            "ETRecord identifier missing from etrecord file passed in. Either an invalid file was passed in or the file is corrupt."
-        )
-
-    graph_map: Dict[str, ExportedProgram] = {}
-    debug_handle_map = None
-    delegate_map = None
-    edge_dialect_program = None
-    reference_outputs = None
-
-    serialized_exported_program_files = set()
-    serialized_state_dict_files = set()
-    serialized_constants_files = set()
-    serialized_example_inputs_files = set()
-    for entry in file_list:
-        if entry == ETRecordReservedFileNames.DEBUG_HANDLE_MAP_NAME:
-            debug_handle_map = json.loads(
-                etrecord_zip.read(ETRecordReservedFileNames.DEBUG_HANDLE_MAP_NAME)
-            )
-        elif entry == ETRecordReservedFileNames.DELEGATE_MAP_NAME:
-            delegate_map = json.loads(
-                etrecord_zip.read(ETRecordReservedFileNames.DELEGATE_MAP_NAME)
+        if ETRecordReservedFileNames.ETRECORD_IDENTIFIER not in file_list:
+            raise RuntimeError(
+                "ETRecord identifier missing from etrecord file passed in. Either an invalid file was passed in or the file is corrupt."
             )
-        elif entry == ETRecordReservedFileNames.ETRECORD_IDENTIFIER:
-            continue
-        elif entry == ETRecordReservedFileNames.EDGE_DIALECT_EXPORTED_PROGRAM:
-            serialized_artifact = SerializedArtifact(
-                etrecord_zip.read(
-                    ETRecordReservedFileNames.EDGE_DIALECT_EXPORTED_PROGRAM
-                ),
-                etrecord_zip.read(f"{entry}_state_dict"),
-                etrecord_zip.read(f"{entry}_constants"),
-                etrecord_zip.read(f"{entry}_example_inputs"),
-            )
-            edge_dialect_program = deserialize(serialized_artifact)
-        elif entry == ETRecordReservedFileNames.REFERENCE_OUTPUTS:
-            # @lint-ignore PYTHONPICKLEISBAD
-            reference_outputs = pickle.loads(
-                etrecord_zip.read(ETRecordReservedFileNames.REFERENCE_OUTPUTS)
-            )
-        else:
-            if entry.endswith("state_dict"):
+
+        debug_handle_map = None
+        delegate_map = None
+        reference_outputs = None
+        program_names = []
+        serialized_state_dict_files = set()
+        for entry in file_list:
+            if entry == ETRecordReservedFileNames.DEBUG_HANDLE_MAP_NAME:
+                debug_handle_map = json.loads(
+                    etrecord_zip.read(ETRecordReservedFileNames.DEBUG_HANDLE_MAP_NAME)
+                )
+            elif entry == ETRecordReservedFileNames.DELEGATE_MAP_NAME:
+                delegate_map = json.loads(
+                    etrecord_zip.read(ETRecordReservedFileNames.DELEGATE_MAP_NAME)
+                )
+            elif entry == ETRecordReservedFileNames.ETRECORD_IDENTIFIER:
+                continue
+            elif entry == ETRecordReservedFileNames.REFERENCE_OUTPUTS:
+                # @lint-ignore PYTHONPICKLEISBAD
+                reference_outputs = pickle.loads(
+                    etrecord_zip.read(ETRecordReservedFileNames.REFERENCE_OUTPUTS)
+                )
+            elif entry.endswith("state_dict"):
                 serialized_state_dict_files.add(entry)
-            elif entry.endswith("constants"):
-                serialized_constants_files.add(entry)
-            elif entry.endswith("example_inputs"):
-                serialized_example_inputs_files.add(entry)
-            else:
-                serialized_exported_program_files.add(entry)
-
-    for serialized_file in serialized_exported_program_files:
-        serialized_state_dict_file = f"{serialized_file}_state_dict"
-        serialized_constants_file = f"{serialized_file}_constants"
-        serialized_example_inputs_file = f"{serialized_file}_example_inputs"
-        assert (
-            serialized_state_dict_file in serialized_state_dict_files
-        ), f"Could not find corresponding state dict file for {serialized_file}."
-        serialized_artifact = SerializedArtifact(
-            etrecord_zip.read(serialized_file),
-            etrecord_zip.read(serialized_state_dict_file),
-            etrecord_zip.read(serialized_constants_file),
-            etrecord_zip.read(serialized_example_inputs_file),
-        )
-        graph_map[serialized_file] = deserialize(serialized_artifact)
+            elif not entry.endswith(("constants", "example_inputs")):
+                program_names.append(entry)
 
+    for program_name in program_names:
+        assert (
+            f"{program_name}{_STATE_DICT_SUFFIX}" in serialized_state_dict_files
+        ), f"Could not find corresponding state dict file for {program_name}."
+
+    reader = _ETRecordReader(etrecord_path, program_names)
+    graph_map: Mapping[str, ExportedProgram] = _LazyMapping(
+        {
+            name: functools.partial(reader.load, name)
+            for name in program_names
+            if name != ETRecordReservedFileNames.EDGE_DIALECT_EXPORTED_PROGRAM
+        }
+    )
     return ETRecord(
-        edge_dialect_program=edge_dialect_program,
         graph_map=graph_map,
         _debug_handle_map=debug_handle_map,
         _delegate_map=delegate_map,
         _reference_outputs=reference_outputs,
+        _reader=reader,
     )
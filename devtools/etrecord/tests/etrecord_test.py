@@ -8,6 +8,7 @@
 
 import copy
 import json
+import os
 import tempfile
 import unittest
 
@@ -19,6 +20,7 @@ from executorch.devtools.bundled_program.core import BundledProgram
 from executorch.devtools.etrecord import generate_etrecord, parse_etrecord
 from executorch.devtools.etrecord._etrecord import (
     _get_reference_outputs,
+    _LazyMapping,
     ETRecordReservedFileNames,
 )
 from executorch.exir import EdgeCompileConfig, EdgeProgramManager, to_edge
@@ -187,3 +189,48 @@ class TestETRecord(unittest.TestCase):
                         et_output,
                         {reserved_name: captured_output.exported_program.graph_module},
                     )
+
+    def test_etrecord_lazy_loading_and_weights(self):
+        f = torch.nn.Linear(64, 64)
+        aten_dialect = export(f, (torch.randn(1, 64),))
+        edge_program = to_edge(
+            aten_dialect, compile_config=EdgeCompileConfig(_check_ir_validity=False)
+        )
+        edge_program_copy = copy.deepcopy(edge_program)
+        et_output = edge_program.to_executorch()
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            sizes = {}
+            for include_weights in (True, False):
+                path = f"{tmpdirname}/etrecord_{include_weights}.bin"
+                generate_etrecord(
+                    path,
+                    edge_program_copy,
+                    et_output,
+                    {"aten_dialect_output": aten_dialect},
+                    include_weights=include_weights,
+                )
+                sizes[include_weights] = os.path.getsize(path)
+
+                etrecord = parse_etrecord(path)
+                # Programs are only deserialized when they are accessed.
+                self.assertIsInstance(etrecord.graph_map, _LazyMapping)
+                self.assertEqual(etrecord.graph_map._values, {})
+                self.assertTrue(etrecord._has_edge_program())
+
+                # Graphs for the Inspector are always loaded without weights.
+                graph = etrecord._get_program_graph("aten_dialect_output/forward")
+                self.assertTrue(all(t.is_meta for t in graph.state_dict.values()))
+                self.assertEqual(etrecord.graph_map._values, {})
+
+                weight = etrecord.graph_map["aten_dialect_output/forward"].state_dict[
+                    "weight"
+                ]
+                edge_weight = etrecord.edge_dialect_program.state_dict["weight"]
+                for t in (weight, edge_weight):
+                    self.assertEqual(t.is_meta, not include_weights)
+                    self.assertEqual(t.shape, f.weight.shape)
+                if include_weights:
+                    self.assertTrue(torch.equal(weight, f.weight))
+                    self.assertTrue(torch.equal(edge_weight, f.weight))
+
+            self.assertLess(sizes[False], sizes[True] - f.weight.nbytes)
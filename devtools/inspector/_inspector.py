@@ -7,10 +7,12 @@
 # pyre-unsafe
 
 import dataclasses
+import itertools
 import logging
 import sys
 import warnings
 from collections import defaultdict, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from functools import cached_property
 from typing import (
@@ -18,6 +20,8 @@ from typing import (
     Callable,
     Dict,
     IO,
+    Iterable,
+    Iterator,
     List,
     Mapping,
     Optional,
@@ -38,22 +42,29 @@ from executorch.devtools.etdump.schema_flatcc import (
     DebugEvent,
     ETDumpFlatCC,
     ProfileEvent,
+    RunData,
 )
 from executorch.devtools.etrecord import ETRecord, parse_etrecord
 from executorch.devtools.inspector._inspector_utils import (
+    bootstrap_mean_delta,
+    calculate_batched_metrics,
+    calculate_grouped_perf_stats,
     calculate_time_scale_factor,
+    COMPARISON_METRICS,
     create_debug_handle_to_op_node_mapping,
+    DebugBuffer,
     display_or_print_df,
     EDGE_DIALECT_GRAPH_KEY,
     EXCLUDED_COLUMNS_WHEN_PRINTING,
     EXCLUDED_EVENTS_WHEN_PRINTING,
     find_populated_event,
     FORWARD,
-    gen_etdump_object,
+    gen_etdump_run_data,
     gen_graphs_from_etrecord,
     inflate_runtime_output,
     is_debug_output,
     is_inference_output_equal,
+    open_debug_buffer,
     ProgramOutput,
     RESERVED_FRAMEWORK_EVENT_NAMES,
     TimeScale,
@@ -262,34 +273,179 @@ DelegateMetadata = TypedDict(
 
 @dataclass
 class PerfData:
+    """
+    Timings of an event across runs. The statistics are computed on first
+    access and cached, so raw must not be modified afterwards.
+    """
+
     def __init__(self, raw: List[float]):
         self.raw: List[float] = raw
 
-    @property
+    @cached_property
     def p10(self) -> float:
         return np.percentile(self.raw, 10)
 
-    @property
+    @cached_property
     def p50(self) -> float:
         return np.percentile(self.raw, 50)
 
-    @property
+    @cached_property
     def p90(self) -> float:
         return np.percentile(self.raw, 90)
 
-    @property
+    @cached_property
     def avg(self) -> float:
         return np.mean(self.raw)
 
-    @property
+    @cached_property
     def min(self) -> float:
         return min(self.raw)
 
-    @property
+    @cached_property
     def max(self) -> float:
         return max(self.raw)
 
 
+PERF_STATS = ["p10", "p50", "p90", "avg", "min", "max"]
+
+
+def _gen_perf_stats(
+    perf_datas: Sequence[Optional[PerfData]],
+) -> Dict[str, List[Optional[float]]]:
+    """
+    Return each of PERF_STATS for every PerfData, or None where there is no
+    perf data. The samples of all PerfDatas are concatenated into one column
+    and reduced group by group, instead of one PerfData at a time.
+    """
+    stats: Dict[str, List[Optional[float]]] = {
+        name: [None] * len(perf_datas) for name in PERF_STATS
+    }
+    present = [
+        i for i, perf_data in enumerate(perf_datas) if perf_data and perf_data.raw
+    ]
+    if len(present) == 0:
+        return stats
+
+    group_sizes = np.array([len(perf_datas[i].raw) for i in present])
+    values = np.fromiter(
+        itertools.chain.from_iterable(perf_datas[i].raw for i in present),
+        dtype=np.float64,
+        count=int(group_sizes.sum()),
+    )
+    for name, column in calculate_grouped_perf_stats(values, group_sizes).items():
+        for i, value in zip(present, column.tolist()):
+            stats[name][i] = value
+    return stats
+
+
+def _to_column(values: List[Any]) -> pd.Series:
+    # Keep None as None instead of letting pandas turn it into NaN.
+    if any(value is None for value in values):
+        return pd.Series(values, dtype=object)
+    return pd.Series(values)
+
+
+def _gen_event_alignment_keys(
+    event_block: "EventBlock",
+) -> Iterator[Tuple[Tuple[Any, ...], "Event"]]:
+    """
+    Yield a key for each Event of the EventBlock that identifies it across
+    ETDumps of the same model, for Inspector.diff.
+    """
+    occurrences: Dict[Tuple[Any, ...], int] = defaultdict(int)
+    for event in event_block.events:
+        debug_handles = _debug_handles_key(event)
+        key = (
+            event_block.name,
+            event_block.bundled_input_index,
+            event.name,
+            debug_handles if debug_handles is not None else event._instruction_id,
+            event.delegate_debug_identifier,
+        )
+        # Tell apart Events that would otherwise have the same key.
+        yield key + (occurrences[key],), event
+        occurrences[key] += 1
+
+
+DIFF_KEY_COLUMNS = [
+    "event_block_name",
+    "bundled_input_index",
+    "event_name",
+    "debug_handles",
+    "is_delegated_op",
+    "delegate_backend_name",
+]
+DIFF_STAT_COLUMNS = [
+    "base_avg",
+    "new_avg",
+    "delta",
+    "relative_delta",
+    "delta_low",
+    "delta_high",
+    "significant",
+    "regression",
+]
+
+
+class _DebugDataField:
+    """
+    Descriptor of Event.debug_data, which is inflated from the Event's debug
+    entries on first access, and again after the Event was evicted from its
+    _DebugDataCache. Assigned values are stored as is, and replace the debug
+    entries, so that they are never evicted.
+    """
+
+    def __get__(self, event: Optional["Event"], owner: Any = None) -> Any:
+        if event is None:
+            # The default value of the dataclass field; see __set__.
+            return None
+        if event._debug_data is None:
+            event._debug_data = [
+                inflate_runtime_output(value, event._output_buffer)
+                for value in event._debug_values
+            ]
+        if event._debug_data_cache is not None:
+            event._debug_data_cache.touch(event)
+        return event._debug_data
+
+    def __set__(self, event: "Event", debug_data: Optional[ProgramOutput]) -> None:
+        event._debug_data = debug_data if debug_data is not None else []
+        event._debug_values = []
+
+
+def _debug_handles_key(event: "Event") -> Optional[Tuple[int, ...]]:
+    if (debug_handles := event.debug_handles) is None:
+        return None
+    if isinstance(debug_handles, int):
+        return (debug_handles,)
+    return tuple(debug_handles)
+
+
+class _DebugDataCache:
+    """
+    LRU of the Events whose debug data is inflated. Once more than max_events
+    Events have been accessed, the debug data of the least recently accessed
+    one is dropped, to be inflated again from the debug buffer if needed.
+    """
+
+    def __init__(self, max_events: int) -> None:
+        if max_events < 1:
+            raise ValueError(f"max_events must be positive, got {max_events}")
+        self.max_events = max_events
+        self._events: OrderedDict[int, "Event"] = OrderedDict()
+
+    def touch(self, event: "Event") -> None:
+        if not event._debug_values:
+            # Can't be inflated again.
+            return
+        self._events[id(event)] = event
+        self._events.move_to_end(id(event))
+        while len(self._events) > self.max_events:
+            _, evicted = self._events.popitem(last=False)
+            if evicted._debug_values:
+                evicted._debug_data = None
+
+
 @dataclass
 class Event:
     """
@@ -310,7 +466,7 @@ class Event:
             Available parsed (if parser provided) as Event.delegate_debug_metadatas
             Available as Event.raw_delegate_debug_metadatas
 
-        debug_data: A list containing intermediate data collected.
+        debug_data: A list containing intermediate data collected. The tensors are inflated from the debug buffer when first accessed.
 
         _instruction_id: Instruction Identifier for Symbolication
         _delegate_metadata_parser: Optional Parser for _delegate_debug_metadatas
@@ -327,7 +483,7 @@ class Event:
     delegate_backend_name: Optional[str] = None
     _delegate_debug_metadatas: List[str] = dataclasses.field(default_factory=list)
 
-    debug_data: ProgramOutput = dataclasses.field(default_factory=list)
+    debug_data: ProgramOutput = _DebugDataField()
     _instruction_id: Optional[int] = None
 
     _delegate_metadata_parser: Optional[Callable[[List[str]], Dict[str, Any]]] = None
@@ -335,6 +491,17 @@ class Event:
         Callable[[Union[int, str], Union[int, float]], Union[int, float]]
     ] = None
 
+    # The debug entries that debug_data is inflated from, on first access.
+    _debug_values: List[flatcc.Value] = dataclasses.field(
+        default_factory=list, repr=False, compare=False
+    )
+    _output_buffer: Optional[DebugBuffer] = dataclasses.field(
+        default=None, repr=False, compare=False
+    )
+    _debug_data_cache: Optional["_DebugDataCache"] = dataclasses.field(
+        default=None, repr=False, compare=False
+    )
+
     @cached_property
     def delegate_debug_metadatas(self) -> Union[List[str], Dict[str, Any]]:
         """
@@ -377,9 +544,6 @@ class Event:
             A dict with the Event data
         """
 
-        def truncated_list(long_list: List[str]) -> str:
-            return f"['{long_list[0]}', '{long_list[1]}' ... '{long_list[-1]}'] ({len(long_list)} total)"
-
         return {
             "event_name": self.name,
             "raw": [self.perf_data.raw if self.perf_data else None],
@@ -389,13 +553,7 @@ class Event:
             "avg" + _units: self.perf_data.avg if self.perf_data else None,
             "min" + _units: self.perf_data.min if self.perf_data else None,
             "max" + _units: self.perf_data.max if self.perf_data else None,
-            "op_types": [
-                (
-                    self.op_types
-                    if len(self.op_types) < 5
-                    else truncated_list(self.op_types)
-                )
-            ],
+            "op_types": [self._display_op_types()],
             "delegate_debug_identifier": self.delegate_debug_identifier,
             "stack_traces": [self.stack_traces],
             "module_hierarchy": [self.module_hierarchy],
@@ -404,12 +562,17 @@ class Event:
             "debug_data": [self.debug_data],
         }
 
+    def _display_op_types(self) -> Union[List[str], str]:
+        if len(self.op_types) < 5:
+            return self.op_types
+        return f"['{self.op_types[0]}', '{self.op_types[1]}' ... '{self.op_types[-1]}'] ({len(self.op_types)} total)"
+
     @staticmethod
     def _gen_from_inference_events(
         signature: EventSignature,
         events: List[InstructionEvent],
         scale_factor: float = 1.0,
-        output_buffer: Optional[bytes] = None,
+        output_buffer: Optional[DebugBuffer] = None,
         delegate_metadata_parser: Optional[
             Callable[[List[str]], Dict[str, Any]]
         ] = None,
@@ -588,7 +751,7 @@ class Event:
         ret_event: "Event",
         debug_event_signature: Optional[DebugEventSignature],
         events: List[InstructionEvent],
-        output_buffer: Optional[bytes] = None,
+        output_buffer: Optional[DebugBuffer] = None,
     ) -> None:
         """
         Given a partially constructed Event, populate the fields related to
@@ -623,10 +786,11 @@ class Event:
                     intermediate data present in this ETDump and indicates potential issues
                     with the model/runtime."""
 
-        ret_event.debug_data = [
-            inflate_runtime_output(debug_value, output_buffer)
-            for debug_value in debug_data
-        ]
+        # Inflated on first access of Event.debug_data
+        if len(debug_data) > 0:
+            ret_event._debug_values = debug_data
+            ret_event._output_buffer = output_buffer
+            ret_event._debug_data = None
 
     def _associate_with_op_graph_nodes(
         self,
@@ -700,13 +864,31 @@ class EventBlock:
 
         units = " (" + self.target_time_scale.value + ")" if include_units else ""
 
-        df = pd.concat([e.to_dataframe(units) for e in self.events], ignore_index=True)
-        df.insert(
-            0,
-            "event_block_name",
-            np.asarray([self.name for _ in range(len(self.events))]),
-            allow_duplicates=True,
+        # Build the frame column by column, with the same columns as
+        # Event.asdict(), rather than concatenating one frame per event.
+        events = self.events
+        perf_stats = _gen_perf_stats([e.perf_data for e in events])
+        columns: Dict[str, List[Any]] = {
+            "event_block_name": [self.name] * len(events),
+            "event_name": [e.name for e in events],
+            "raw": [e.perf_data.raw if e.perf_data else None for e in events],
+        }
+        for name in PERF_STATS:
+            columns[name + units] = perf_stats[name]
+        columns.update(
+            {
+                "op_types": [e._display_op_types() for e in events],
+                "delegate_debug_identifier": [
+                    e.delegate_debug_identifier for e in events
+                ],
+                "stack_traces": [e.stack_traces for e in events],
+                "module_hierarchy": [e.module_hierarchy for e in events],
+                "is_delegated_op": [e.is_delegated_op for e in events],
+                "delegate_backend_name": [e.delegate_backend_name for e in events],
+                "debug_data": [e.debug_data for e in events],
+            }
         )
+        df = pd.DataFrame({name: _to_column(c) for name, c in columns.items()})
 
         # Add Delegate Debug Metadata columns
         if include_delegate_debug_data:
@@ -733,12 +915,44 @@ class EventBlock:
 
         return df
 
+    def _gen_intermediate_output_pairs(
+        self, reference_events: Dict[Tuple[int, ...], Event]
+    ) -> Tuple[List[Tuple[Any, ...]], ProgramOutput, ProgramOutput]:
+        """
+        Pair the debug_data of each Event with that of the reference Event
+        with the same debug handles, for Inspector.compare_intermediate_outputs.
+
+        Returns the (event_block_name, bundled_input_index, debug_handles,
+        event_name, output_index) of each pair, followed by the reference
+        outputs and the outputs.
+        """
+        rows, ref_values, values = [], [], []
+        for event in self.events:
+            key = _debug_handles_key(event)
+            if key is None or (ref_event := reference_events.get(key)) is None:
+                continue
+            for index, (ref_value, value) in enumerate(
+                zip(ref_event.debug_data, event.debug_data)
+            ):
+                rows.append(
+                    (
+                        self.name,
+                        self.bundled_input_index,
+                        event.debug_handles,
+                        event.name,
+                        index,
+                    )
+                )
+                ref_values.append(ref_value)
+                values.append(value)
+        return rows, ref_values, values
+
     @staticmethod
     def _gen_from_etdump(
-        etdump: ETDumpFlatCC,
+        etdump: Union[ETDumpFlatCC, Iterable[RunData]],
         source_time_scale: TimeScale = TimeScale.NS,
         target_time_scale: TimeScale = TimeScale.MS,
-        output_buffer: Optional[bytes] = None,
+        output_buffer: Optional[DebugBuffer] = None,
         delegate_metadata_parser: Optional[
             Callable[[List[str]], Dict[str, Any]]
         ] = None,
@@ -747,8 +961,10 @@ class EventBlock:
         ] = None,
     ) -> List["EventBlock"]:
         """
-        Given an etdump, generate a list of EventBlocks corresponding to the
-        contents.
+        Given an etdump, or an iterable of its runs, generate a list of
+        EventBlocks corresponding to the contents. Runs are processed one at a
+        time, so a lazy iterable like the one from gen_etdump_run_data()
+        never needs to have all of them in memory.
 
         An optional (inverse) scale factor can be provided to adjust the
         etdump timestamps associated with each EventBlocks
@@ -772,7 +988,8 @@ class EventBlock:
         )
 
         # Collect all the run data
-        for run in etdump.run_data:
+        runs = etdump.run_data if isinstance(etdump, ETDumpFlatCC) else etdump
+        for run in runs:
             if (run_events := run.events) is None:
                 continue
 
@@ -861,7 +1078,7 @@ class EventBlock:
 
     @staticmethod
     def _collect_run_outputs(
-        events: List[flatcc.Event], output_buffer: Optional[bytes] = None
+        events: List[flatcc.Event], output_buffer: Optional[DebugBuffer] = None
     ) -> ProgramOutput:
         """
         Given a list of events, search the events for ProgramOutputs (aka lists of InferenceOutputs) marked
@@ -978,6 +1195,7 @@ class Inspector:
             Callable[[Union[int, str], Union[int, float]], Union[int, float]]
         ] = None,
         enable_module_hierarchy: bool = False,
+        debug_data_cache_size: Optional[int] = None,
     ) -> None:
         r"""
         Initialize an `Inspector` instance with the underlying `EventBlock`\ s populated with data from the provided ETDump path or binary,
@@ -995,6 +1213,9 @@ class Inspector:
             delegate_time_scale_converter: Optional function to convert the time scale of delegate profiling data. If not given, use the conversion ratio of
                     target_time_scale/source_time_scale.
             enable_module_hierarchy: Enable submodules in the operator graph. Defaults to False.
+            debug_data_cache_size: Optional maximum number of Events whose debug_data is kept inflated at once. The debug data of
+                    the least recently accessed Events is dropped beyond that, and inflated again from the debug buffer on access.
+                    Defaults to None, which keeps the debug data of every accessed Event.
 
         Returns:
             None
@@ -1032,10 +1253,9 @@ class Inspector:
             )
 
         # Create EventBlocks from ETDump
-        etdump = gen_etdump_object(etdump_path=etdump_path, etdump_data=etdump_data)
+        etdump = gen_etdump_run_data(etdump_path=etdump_path, etdump_data=etdump_data)
         if debug_buffer_path is not None:
-            with open(debug_buffer_path, "rb") as f:
-                output_buffer = f.read()
+            output_buffer = open_debug_buffer(debug_buffer_path)
         else:
             output_buffer = None
             warnings.warn(
@@ -1051,6 +1271,11 @@ class Inspector:
             delegate_metadata_parser=delegate_metadata_parser,
             delegate_time_scale_converter=delegate_time_scale_converter,
         )
+        if debug_data_cache_size is not None:
+            debug_data_cache = _DebugDataCache(debug_data_cache_size)
+            for event_block in self.event_blocks:
+                for event in event_block.events:
+                    event._debug_data_cache = debug_data_cache
 
         # Connect ETRecord to EventBlocks
         self.op_graph_dict: Optional[Mapping[str, OperatorGraph]] = None
@@ -1185,19 +1410,240 @@ class Inspector:
             Sum of the average compute time (in seconds) of all operators within the module with "module_name".
         """
 
-        total = 0.0
-        for block in self.event_blocks:
-            for event in block.events:
-                module_hierarchy = event.module_hierarchy.values()
-                for hierarchy in module_hierarchy:
-                    if not hierarchy:
-                        continue
-                    found = any(module_name in key for key in hierarchy.keys())
-                    if found:
-                        if event.perf_data is not None:
-                            total += event.perf_data.avg
-                        break
-        return total
+        perf_datas = [
+            event.perf_data
+            for block in self.event_blocks
+            for event in block.events
+            if any(
+                module_name in key
+                for hierarchy in event.module_hierarchy.values()
+                if hierarchy
+                for key in hierarchy.keys()
+            )
+        ]
+        return sum(
+            (avg for avg in _gen_perf_stats(perf_datas)["avg"] if avg is not None),
+            0.0,
+        )
+
+    def compare_intermediate_outputs(
+        self,
+        reference: "Inspector",
+        metrics: Optional[List[str]] = None,
+        max_workers: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Compare the intermediate outputs (Event.debug_data) of this Inspector with those of a reference Inspector, e.g. one
+        of the same model run without quantization or delegation.
+
+        Events are matched by EventBlock (name and bundled input index) and by debug handles, so both Inspectors need to
+        have been given an ETRecord. The outputs of each EventBlock are compared with calculate_batched_metrics, which
+        compares all outputs of the same shape in one vectorized pass.
+
+        Args:
+            reference: Inspector with the reference intermediate outputs.
+            metrics: List of requested metric names. Defaults to all available metrics.
+            max_workers: If greater than 1, compare the EventBlocks in a pool of this many processes. Defaults to
+                comparing them in this process.
+
+        Returns:
+            A DataFrame with one row per compared output and the columns event_block_name, bundled_input_index,
+            debug_handles, event_name, output_index and one column per metric.
+        """
+
+        reference_events: Dict[
+            Tuple[str, Optional[int]], Dict[Tuple[int, ...], Event]
+        ] = defaultdict(dict)
+        for event_block in reference.event_blocks:
+            for event in event_block.events:
+                if (key := _debug_handles_key(event)) is not None:
+                    reference_events[
+                        (event_block.name, event_block.bundled_input_index)
+                    ][key] = event
+
+        # Rows, reference outputs and outputs to compare, for each EventBlock
+        rows: List[List[Tuple[Any, ...]]] = []
+        ref_values: List[ProgramOutput] = []
+        values: List[ProgramOutput] = []
+        for event_block in self.event_blocks:
+            block_rows, block_ref_values, block_values = (
+                event_block._gen_intermediate_output_pairs(
+                    reference_events.get(
+                        (event_block.name, event_block.bundled_input_index), {}
+                    )
+                )
+            )
+            if len(block_rows) > 0:
+                rows.append(block_rows)
+                ref_values.append(block_ref_values)
+                values.append(block_values)
+
+        metrics = metrics if metrics is not None else COMPARISON_METRICS
+        if max_workers is not None and max_workers > 1 and len(rows) > 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                results = list(
+                    pool.map(
+                        calculate_batched_metrics,
+                        ref_values,
+                        values,
+                        itertools.repeat(metrics),
+                    )
+                )
+        else:
+            results = [
+                calculate_batched_metrics(block_ref_values, block_values, metrics)
+                for block_ref_values, block_values in zip(ref_values, values)
+            ]
+
+        df = pd.DataFrame(
+            list(itertools.chain.from_iterable(rows)),
+            columns=[
+                "event_block_name",
+                "bundled_input_index",
+                "debug_handles",
+                "event_name",
+                "output_index",
+            ],
+        )
+        for metric in metrics:
+            df[metric] = list(
+                itertools.chain.from_iterable(result[metric] for result in results)
+            )
+        return df
+
+    def diff(
+        self,
+        other: "Inspector",
+        regression_threshold: float = 0.05,
+        num_resamples: int = 1000,
+        confidence: float = 0.95,
+        by_delegate: bool = False,
+        min_samples: int = 5,
+        bonferroni: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Compare the latency of each Event of this Inspector (the baseline) with that of the same Event in another
+        Inspector, e.g. of the same model run on two builds.
+
+        Events are aligned by EventBlock name and bundled input index, Event name and debug handles (or instruction id,
+        for Events without debug handles), so both Inspectors should have been given an ETRecord. Events that are only
+        in one of them, or without perf data in either, are left out.
+
+        The significance of each latency change is estimated by bootstrapping over the raw samples of both Events,
+        provided that both have at least min_samples of them; with fewer samples the interval is too narrow to be
+        trusted, so its bounds are NaN and the change is never significant. Each row is tested on its own: with many
+        Events, about 1 - confidence of the unchanged ones are expected to be flagged as significant by chance, unless
+        bonferroni is set, which widens the intervals to keep the chance of any false positive under 1 - confidence.
+        With by_delegate, the Events of each EventBlock are grouped by delegate backend (None for Events that weren't
+        delegated) and the total latency of each group in each run is compared instead.
+
+        Args:
+            other: Inspector to compare with this one.
+            regression_threshold: Minimum relative increase in average latency, e.g. 0.05 for 5%, for a significant
+                increase to be flagged as a regression.
+            num_resamples: Number of bootstrap resamples.
+            confidence: Confidence level of the bootstrap interval of the latency change.
+            by_delegate: Whether to compare the total latency of each delegate backend instead of each Event.
+            min_samples: Minimum number of runs of each Event, at least 2, for its change to be tested.
+            bonferroni: Whether to apply the Bonferroni correction for the number of rows compared.
+
+        Returns:
+            A DataFrame with one row per aligned Event, with the DIFF_KEY_COLUMNS, or per EventBlock and delegate
+            backend, followed by the DIFF_STAT_COLUMNS: the average latencies of both Inspectors, their difference,
+            relative to the baseline, the bounds of its bootstrap interval, whether it is significant and whether it is
+            a regression. Latencies are in the target time scale of the Inspectors.
+        """
+        if self._target_time_scale != other._target_time_scale:
+            raise ValueError(
+                f"Cannot compare latencies in {self._target_time_scale.value} and {other._target_time_scale.value}"
+            )
+        if min_samples < 2:
+            raise ValueError(f"Expected min_samples of at least 2, got {min_samples}")
+
+        other_events = {
+            key: event
+            for event_block in other.event_blocks
+            for key, event in _gen_event_alignment_keys(event_block)
+        }
+        # Identifying columns and raw samples of both sides, for each row
+        groups: Dict[
+            Tuple[Any, ...], Tuple[Dict[str, Any], List[List[float]], List[List[float]]]
+        ] = {}
+        for event_block in self.event_blocks:
+            for key, event in _gen_event_alignment_keys(event_block):
+                other_event = other_events.get(key)
+                if (
+                    other_event is None
+                    or not (event.perf_data and event.perf_data.raw)
+                    or not (other_event.perf_data and other_event.perf_data.raw)
+                ):
+                    continue
+                if by_delegate:
+                    row = {
+                        "event_block_name": event_block.name,
+                        "bundled_input_index": event_block.bundled_input_index,
+                        "delegate_backend_name": event.delegate_backend_name,
+                    }
+                    group_key = tuple(row.values())
+                else:
+                    row = {
+                        "event_block_name": event_block.name,
+                        "bundled_input_index": event_block.bundled_input_index,
+                        "event_name": event.name,
+                        "debug_handles": event.debug_handles,
+                        "is_delegated_op": event.is_delegated_op,
+                        "delegate_backend_name": event.delegate_backend_name,
+                    }
+                    group_key = key
+                _, base_raws, new_raws = groups.setdefault(group_key, (row, [], []))
+                base_raws.append(event.perf_data.raw)
+                new_raws.append(other_event.perf_data.raw)
+
+        def sum_runs(row: Dict[str, Any], raws: List[List[float]]) -> np.ndarray:
+            # Total latency of the Events in each run
+            num_runs = min(len(raw) for raw in raws)
+            if any(len(raw) != num_runs for raw in raws):
+                log.warning(
+                    f"Events of {row} were run a different number of times, only comparing their first {num_runs} runs"
+                )
+            return np.sum([raw[:num_runs] for raw in raws], axis=0)
+
+        if bonferroni and groups:
+            confidence = 1 - (1 - confidence) / len(groups)
+        rows = []
+        for row, base_raws, new_raws in groups.values():
+            base, new = sum_runs(row, base_raws), sum_runs(row, new_raws)
+            if min(len(base), len(new)) >= min_samples:
+                delta, delta_low, delta_high = bootstrap_mean_delta(
+                    base, new, num_resamples=num_resamples, confidence=confidence
+                )
+            else:
+                delta = float(np.mean(new) - np.mean(base))
+                delta_low = delta_high = float("nan")
+            base_avg = float(np.mean(base))
+            relative_delta = delta / base_avg if base_avg != 0 else float("inf")
+            significant = delta_low > 0 or delta_high < 0
+            rows.append(
+                {
+                    **row,
+                    "base_avg": base_avg,
+                    "new_avg": float(np.mean(new)),
+                    "delta": delta,
+                    "relative_delta": relative_delta,
+                    "delta_low": delta_low,
+                    "delta_high": delta_high,
+                    "significant": significant,
+                    "regression": significant
+                    and delta > 0
+                    and relative_delta > regression_threshold,
+                }
+            )
+        key_columns = (
+            ["event_block_name", "bundled_input_index", "delegate_backend_name"]
+            if by_delegate
+            else DIFF_KEY_COLUMNS
+        )
+        return pd.DataFrame(rows, columns=key_columns + DIFF_STAT_COLUMNS)
 
     def get_op_list(
         self, event_block: str, show_delegated_ops: Optional[bool] = True
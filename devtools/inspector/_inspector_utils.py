@@ -6,13 +6,30 @@
 
 # pyre-unsafe
 
+import functools
 import math
+import mmap
+import os
 import sys
+from collections import defaultdict
 from enum import Enum
-from typing import Dict, IO, List, Mapping, Optional, Tuple, TypeAlias, Union
+from typing import (
+    Dict,
+    IO,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeAlias,
+    Union,
+)
 
 import executorch.devtools.etdump.schema_flatcc as flatcc
 
+import numpy as np
+
 import pandas as pd
 
 import torch
@@ -24,14 +41,19 @@ from executorch.devtools.etdump.schema_flatcc import (
     DebugEvent,
     ETDumpFlatCC,
     ProfileEvent,
+    RunData,
     ScalarType,
     Tensor,
     Value,
     ValueType,
 )
 
-from executorch.devtools.etdump.serialize import deserialize_from_etdump_flatcc
+from executorch.devtools.etdump.serialize import (
+    deserialize_from_etdump_flatcc,
+    deserialize_run_data_from_etdump_flatcc,
+)
 from executorch.devtools.etrecord import ETRecord
+from executorch.devtools.etrecord._etrecord import _LazyMapping
 
 from tabulate import tabulate
 
@@ -52,6 +74,10 @@ EXCLUDED_COLUMNS_WHEN_PRINTING = [
 ]
 EXCLUDED_EVENTS_WHEN_PRINTING = {"OPERATOR_CALL"}
 
+# The debug buffer that ETDump tensors point into: either the file contents,
+# or a memory map of the file that tensors are created as views of.
+DebugBuffer: TypeAlias = Union[bytes, mmap.mmap]
+
 
 class TimeScale(Enum):
     NS = "ns"
@@ -79,6 +105,79 @@ def calculate_time_scale_factor(
     return TIME_SCALE_DICT[source_time_scale] / TIME_SCALE_DICT[target_time_scale]
 
 
+def calculate_grouped_perf_stats(
+    values: np.ndarray, group_sizes: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Given the samples of several groups stored one group after another in
+    `values`, and the number of samples in each group (all non-zero), return
+    the p10, p50, p90, avg, min and max of every group.
+
+    Groups with the same number of samples, e.g. the events of one EventBlock,
+    are reduced together as the rows of a 2D array. The percentiles use the
+    same linear interpolation as np.percentile, so they match it exactly.
+    """
+    group_sizes = np.asarray(group_sizes, dtype=np.int64)
+    starts = np.cumsum(group_sizes) - group_sizes
+    stats = {
+        name: np.empty(len(group_sizes))
+        for name in ("p10", "p50", "p90", "avg", "min", "max")
+    }
+    for size in np.unique(group_sizes):
+        members = np.flatnonzero(group_sizes == size)
+        rows = values[starts[members, None] + np.arange(size)]
+        stats["avg"][members] = rows.mean(axis=1)
+        rows.sort(axis=1)
+        stats["min"][members] = rows[:, 0]
+        stats["max"][members] = rows[:, -1]
+        for name, quantile in (("p10", 0.1), ("p50", 0.5), ("p90", 0.9)):
+            virtual_index = (size - 1) * quantile
+            lower = int(np.floor(virtual_index))
+            upper = min(lower + 1, size - 1)
+            gamma = virtual_index - lower
+            diff = rows[:, upper] - rows[:, lower]
+            stats[name][members] = (
+                rows[:, upper] - diff * (1 - gamma)
+                if gamma >= 0.5
+                else rows[:, lower] + diff * gamma
+            )
+    return stats
+
+
+def bootstrap_mean_delta(
+    base: Sequence[float],
+    new: Sequence[float],
+    num_resamples: int = 1000,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> Tuple[float, float, float]:
+    """
+    Return the difference between the means of the `new` and `base` samples,
+    and the bounds of its `confidence` interval, estimated by resampling both
+    sets of samples with replacement `num_resamples` times.
+
+    The difference is significant when the interval doesn't contain 0. Each
+    set needs at least two samples, since resampling a single one can only
+    give an empty interval, and the interval is too narrow to be trusted
+    with only a few of them.
+    """
+    if len(base) < 2 or len(new) < 2:
+        raise ValueError("Expected at least two samples in each set of samples")
+    rng = np.random.default_rng(seed)
+    base_samples = np.asarray(base, dtype=np.float64)
+    new_samples = np.asarray(new, dtype=np.float64)
+    deltas = new_samples[
+        rng.integers(0, len(new_samples), (num_resamples, len(new_samples)))
+    ].mean(axis=1) - base_samples[
+        rng.integers(0, len(base_samples), (num_resamples, len(base_samples)))
+    ].mean(
+        axis=1
+    )
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(deltas, [alpha, 1 - alpha])
+    return float(new_samples.mean() - base_samples.mean()), float(low), float(high)
+
+
 # Model Debug Output
 InferenceOutput: TypeAlias = Union[
     torch.Tensor, List[torch.Tensor], int, float, str, bool, None
@@ -102,7 +201,7 @@ def is_inference_output_equal(
 
 # Given a ETDump Tensor object and offset, extract into a torch.Tensor
 def _parse_tensor_value(
-    tensor: Optional[Tensor], output_buffer: Optional[bytes]
+    tensor: Optional[Tensor], output_buffer: Optional[DebugBuffer]
 ) -> torch.Tensor:
     def get_scalar_type_size(scalar_type: ScalarType) -> Tuple[torch.dtype, int]:
         """
@@ -143,14 +242,34 @@ def _parse_tensor_value(
     if tensor.offset is None:
         raise ValueError("Tensor offset cannot be None")
 
+    # View the buffer in place instead of slicing out a copy; when it is a
+    # memory map, the data is only read from disk once the tensor is accessed.
     return torch.frombuffer(
-        output_buffer[tensor.offset : tensor.offset + tensor_bytes_size],
+        output_buffer,
         dtype=torch_dtype,
+        count=tensor_bytes_size // dtype_size,
+        offset=tensor.offset,
     ).view(tensor.sizes)
 
 
+def open_debug_buffer(debug_buffer_path: str) -> DebugBuffer:
+    """
+    Memory map the debug buffer at the given path, so that intermediate outputs
+    are only paged in when they are accessed and can be paged out again by the
+    OS, rather than the whole file being read into memory.
+
+    The map is copy-on-write: tensors created from it are writable, but writes
+    never reach the file.
+    """
+    with open(debug_buffer_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files can't be memory mapped.
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+
 def inflate_runtime_output(
-    value: Value, output_buffer: Optional[bytes]
+    value: Value, output_buffer: Optional[DebugBuffer]
 ) -> InferenceOutput:
     """
     Parse the given ETDump Value object into an InferenceOutput object
@@ -235,22 +354,30 @@ def is_debug_output(value: Value) -> bool:
 def gen_graphs_from_etrecord(
     etrecord: ETRecord, enable_module_hierarchy: bool = False
 ) -> Mapping[str, OperatorGraph]:
-    op_graph_map = {}
-    if etrecord.graph_map is not None:
-        op_graph_map = {
-            name: FXOperatorGraph.gen_operator_graph(
-                exported_program.graph_module,
-                enable_module_hierarchy=enable_module_hierarchy,
-            )
-            for name, exported_program in etrecord.graph_map.items()
-        }
-    if etrecord.edge_dialect_program is not None:
-        op_graph_map[EDGE_DIALECT_GRAPH_KEY] = FXOperatorGraph.gen_operator_graph(
-            etrecord.edge_dialect_program.graph_module,
+    """
+    Returns the operator graphs of the programs in the ETRecord, each generated
+    the first time it is accessed. Only the graphs of the programs are
+    deserialized for it, not their weights.
+    """
+
+    def gen_operator_graph(name: Optional[str]) -> OperatorGraph:
+        exported_program = etrecord._get_program_graph(name)
+        assert exported_program is not None
+        return FXOperatorGraph.gen_operator_graph(
+            exported_program.graph_module,
             enable_module_hierarchy=enable_module_hierarchy,
         )
 
-    return op_graph_map
+    loaders = {}
+    if etrecord.graph_map is not None:
+        loaders = {
+            name: functools.partial(gen_operator_graph, name)
+            for name in etrecord.graph_map
+        }
+    if etrecord._has_edge_program() or etrecord.edge_dialect_program is not None:
+        loaders[EDGE_DIALECT_GRAPH_KEY] = functools.partial(gen_operator_graph, None)
+
+    return _LazyMapping(loaders)
 
 
 def create_debug_handle_to_op_node_mapping(
@@ -300,6 +427,20 @@ def gen_etdump_object(
     return deserialize_from_etdump_flatcc(etdump_data)
 
 
+def gen_etdump_run_data(
+    etdump_path: Optional[str] = None, etdump_data: Optional[bytes] = None
+) -> Iterator[RunData]:
+    """
+    Like gen_etdump_object, but lazily yields the runs of the ETDump one at a
+    time instead of deserializing all of them up front.
+    """
+    if (etdump_path is None) == (etdump_data is None):
+        raise ValueError(
+            "Unable to get ETDump data. One and only one of etdump_path and etdump_data must be specified."
+        )
+    return deserialize_run_data_from_etdump_flatcc(data=etdump_data, path=etdump_path)
+
+
 def display_or_print_df(df: pd.DataFrame, file: IO[str] = sys.stdout):
     try:
         from IPython import get_ipython
@@ -433,6 +574,90 @@ def calculate_cosine_similarity(ref_values: ProgramOutput, values: ProgramOutput
     return results
 
 
+COMPARISON_METRICS = ["snr", "mse", "cosine_similarity"]
+
+# Upper bound on the number of elements stacked into one batch by
+# calculate_batched_metrics. Batching pays off for small tensors, where the
+# per-call overhead dominates; large ones are better compared in cache-sized
+# pieces than copied into big stacks.
+_MAX_BATCH_NUMEL = 1 << 16
+
+
+def calculate_batched_metrics(
+    ref_values: Sequence[InferenceOutput],
+    values: Sequence[InferenceOutput],
+    metrics: Optional[List[str]] = None,
+) -> Dict[str, List[Optional[float]]]:
+    """
+    Compares each pair of values of ref_values and values, like calculate_snr,
+    calculate_mse and calculate_cosine_similarity do, and returns a dictionary
+    of metric names -> lists of metric values.
+
+    Instead of comparing one pair at a time, pairs of tensors with the same
+    shape are flattened, stacked into float32 batches of up to
+    _MAX_BATCH_NUMEL elements and compared in one vectorized pass per batch,
+    computing all the metrics from the same few reductions.
+    Pairs that aren't two tensors of the same shape get None.
+
+    Args:
+        ref_values: Reference values.
+        values: Values to compare with the reference values.
+        metrics: List of requested metric names. Defaults to COMPARISON_METRICS.
+
+    Returns:
+        Dictionary of metric names to lists of (unrounded) float values.
+    """
+    if metrics is None:
+        metrics = COMPARISON_METRICS
+    for metric in metrics:
+        if metric not in COMPARISON_METRICS:
+            raise ValueError(
+                f"Unsupported metric {metric}, expected one of {COMPARISON_METRICS}"
+            )
+    if len(ref_values) != len(values):
+        raise ValueError(
+            f"Expected as many values as reference values, got {len(values)} and {len(ref_values)}"
+        )
+
+    results: Dict[str, List[Optional[float]]] = {
+        metric: [None] * len(values) for metric in metrics
+    }
+    pairs_by_shape: Dict[torch.Size, List[int]] = defaultdict(list)
+    for index, (ref_value, value) in enumerate(zip(ref_values, values)):
+        # TODO T171811011: support value types other than tensor type
+        if (
+            isinstance(ref_value, torch.Tensor)
+            and isinstance(value, torch.Tensor)
+            and ref_value.shape == value.shape
+        ):
+            pairs_by_shape[ref_value.shape].append(index)
+
+    for shape, indices in pairs_by_shape.items():
+        numel = math.prod(shape)
+        batch_size = max(1, _MAX_BATCH_NUMEL // max(1, numel))
+        for start in range(0, len(indices), batch_size):
+            batch = indices[start : start + batch_size]
+            ref = torch.stack(
+                [ref_values[i].reshape(-1).to(torch.float32) for i in batch]
+            )
+            val = torch.stack([values[i].reshape(-1).to(torch.float32) for i in batch])
+            diff = ref - val
+            # Sums of squares and of products, per pair
+            noise = torch.linalg.vecdot(diff, diff)
+            signal = torch.linalg.vecdot(ref, ref)
+            batch_results = {
+                "mse": noise / numel,
+                "snr": 10 * torch.log10(signal / noise),
+                "cosine_similarity": torch.linalg.vecdot(ref, val)
+                / torch.sqrt(signal * torch.linalg.vecdot(val, val)),
+            }
+            for metric in metrics:
+                for i, result in zip(batch, batch_results[metric].tolist()):
+                    results[metric][i] = result
+
+    return results
+
+
 def compare_results(
     reference_output: ProgramOutput,
     run_output: ProgramOutput,
@@ -459,18 +684,37 @@ def compare_results(
         "mse": calculate_mse,
         "cosine_similarity": calculate_cosine_similarity,
     }
-    for supported_metric in metrics_functions:
-        if metrics is None or supported_metric in metrics:
-            result = metrics_functions[supported_metric](reference_output, run_output)
-            results[supported_metric] = result
-
-            if plot:
-                plot_metric(result, supported_metric)
-            else:
-                print(supported_metric)
-                print("-" * 20)
-                for index, value in enumerate(result):
-                    print(f"{index:<5}{value:>8.5f}")
-                print("\n")
+    # Like the metrics functions, only compare as many values as the shorter
+    # of the two outputs has.
+    pairs = list(zip(reference_output, run_output))
+    batched_results = calculate_batched_metrics(
+        [ref_value for ref_value, _ in pairs],
+        [value for _, value in pairs],
+        [m for m in COMPARISON_METRICS if metrics is None or m in metrics],
+    )
+    for supported_metric, batched_result in batched_results.items():
+        result = [None if r is None else round(r, 2) for r in batched_result]
+        # calculate_batched_metrics only compares tensors of the same shape,
+        # leave the others to the metrics functions, which broadcast them or
+        # raise.
+        for index, (ref_value, value) in enumerate(pairs):
+            if (
+                isinstance(ref_value, torch.Tensor)
+                and isinstance(value, torch.Tensor)
+                and ref_value.shape != value.shape
+            ):
+                result[index] = metrics_functions[supported_metric](
+                    [ref_value], [value]
+                )[0]
+        results[supported_metric] = result
+
+        if plot:
+            plot_metric(result, supported_metric)
+        else:
+            print(supported_metric)
+            print("-" * 20)
+            for index, value in enumerate(result):
+                print(f"{index:<5}{value:>8.5f}")
+            print("\n")
 
     return results
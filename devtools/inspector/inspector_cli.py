@@ -7,18 +7,15 @@
 # pyre-unsafe
 
 import argparse
+import sys
+from typing import List, Optional
 
 from executorch.devtools import Inspector
 from executorch.devtools.inspector import compare_results, TimeScale
+from executorch.devtools.inspector._inspector_utils import display_or_print_df
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser()
-    parser.add_argument(
-        "--etdump_path",
-        required=True,
-        help="Provide an ETDump file path.",
-    )
+def _add_time_scale_args(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         "--source_time_scale",
         type=str,
@@ -33,6 +30,113 @@ def main() -> None:
         help="Enter the target time scale (ns, us, ms, s, cycles)",
         default=TimeScale.MS.value,
     )
+
+
+def _add_diff_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--base_etdump_path",
+        required=True,
+        help="Provide the baseline ETDump file path.",
+    )
+    parser.add_argument(
+        "--base_etrecord_path",
+        required=False,
+        help="Provide an optional ETRecord file path for the baseline ETDump.",
+    )
+    parser.add_argument(
+        "--etdump_path",
+        required=True,
+        help="Provide the ETDump file path to compare with the baseline.",
+    )
+    parser.add_argument(
+        "--etrecord_path",
+        required=False,
+        help="Provide an optional ETRecord file path for the compared ETDump.",
+    )
+    _add_time_scale_args(parser)
+    parser.add_argument(
+        "--regression_threshold",
+        type=float,
+        default=0.05,
+        help="Minimum relative increase in average latency to flag as a regression.",
+    )
+    parser.add_argument("--num_resamples", type=int, default=1000)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument(
+        "--min_samples",
+        type=int,
+        default=5,
+        help="Minimum number of runs of each operator for its change to be tested.",
+    )
+    parser.add_argument(
+        "--bonferroni",
+        action="store_true",
+        help="Correct the confidence level for the number of operators compared.",
+    )
+    parser.add_argument(
+        "--output_csv",
+        required=False,
+        help="Write the per-operator comparison to this CSV file.",
+    )
+
+
+def diff_main(args: argparse.Namespace) -> int:
+    """
+    Compares the per-operator latencies of two ETDumps of the same model, and
+    returns 1 if any operator regressed, so that CI jobs can fail on it.
+    """
+    base, new = (
+        Inspector(
+            etdump_path=etdump_path,
+            etrecord=etrecord_path,
+            source_time_scale=TimeScale(args.source_time_scale),
+            target_time_scale=TimeScale(args.target_time_scale),
+        )
+        for etdump_path, etrecord_path in (
+            (args.base_etdump_path, args.base_etrecord_path),
+            (args.etdump_path, args.etrecord_path),
+        )
+    )
+    diff_args = {
+        "regression_threshold": args.regression_threshold,
+        "num_resamples": args.num_resamples,
+        "confidence": args.confidence,
+        "min_samples": args.min_samples,
+        "bonferroni": args.bonferroni,
+    }
+    df = base.diff(new, **diff_args)
+    display_or_print_df(base.diff(new, by_delegate=True, **diff_args))
+    display_or_print_df(df[df["significant"]])
+    if args.output_csv:
+        df.to_csv(args.output_csv, index=False)
+
+    regressions = df[df["regression"]]
+    if len(regressions) > 0:
+        print(f"{len(regressions)} operator(s) regressed:")
+        display_or_print_df(regressions)
+        return 1
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Print the data of an ETDump, or compare two of them with the "
+        "diff command."
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    _add_diff_args(
+        subparsers.add_parser(
+            "diff",
+            help="Compare the latency of each operator in two ETDumps.",
+            description="Compare the latency of each operator in two ETDumps.",
+        )
+    )
+    # Required without a command, see below.
+    parser.add_argument(
+        "--etdump_path",
+        help="Provide an ETDump file path.",
+    )
+    _add_time_scale_args(parser)
     parser.add_argument(
         "--etrecord_path",
         required=False,
@@ -45,7 +149,11 @@ def main() -> None:
     )
     parser.add_argument("--compare_results", action="store_true")
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.command == "diff":
+        sys.exit(diff_main(args))
+    if args.etdump_path is None:
+        parser.error("the following arguments are required: --etdump_path")
 
     inspector = Inspector(
         etdump_path=args.etdump_path,
@@ -12,10 +12,12 @@ import tempfile
 import unittest
 from contextlib import redirect_stdout
 
-from typing import Callable, List
+from typing import Callable, List, Optional
 
 from unittest.mock import patch
 
+import numpy as np
+import torch
 from executorch.devtools import generate_etrecord, parse_etrecord
 from executorch.devtools.debug_format.et_schema import OperatorNode
 from executorch.devtools.etdump.schema_flatcc import ProfileEvent
@@ -67,12 +69,206 @@ class TestInspector(unittest.TestCase):
         self.assertEqual(len(df["raw"].values[0]), RAW_DATA_SIZE)
         self.assertEqual(df["op_types"].values[0][0], OP_TYPE)
 
+    def test_event_block_to_dataframe_matches_perf_data(self) -> None:
+        events = self._gen_random_events()
+        events[1].perf_data = None
+        eventBlock = EventBlock(name=EVENT_BLOCK_NAME, events=events)
+
+        df = eventBlock.to_dataframe()
+        for i, event in enumerate(events):
+            for stat in ["p10", "p50", "p90", "min", "max"]:
+                expected = getattr(event.perf_data, stat) if event.perf_data else None
+                self.assertEqual(df[stat].values[i], expected)
+        self.assertIsNone(df["avg"].values[1])
+
+    def test_debug_data_cache_evicts_least_recently_used(self) -> None:
+        value = flatcc.Value(
+            val=flatcc.ValueType.INT.value,
+            tensor=None,
+            tensor_list=None,
+            int_value=flatcc.Int(1),
+            float_value=None,
+            double_value=None,
+            bool_value=None,
+            output=None,
+        )
+        cache = _inspector._DebugDataCache(max_events=2)
+        events = [
+            Event(
+                name=f"op_{i}",
+                _debug_values=[value],
+                _debug_data_cache=cache,
+            )
+            for i in range(3)
+        ]
+        for event in events:
+            # Not inflated yet, as if generated from an ETDump.
+            event._debug_data = None
+        self.assertEqual(events[0].debug_data, [1])
+        self.assertEqual(events[1].debug_data, [1])
+        self.assertEqual(events[0].debug_data, [1])
+        self.assertEqual(events[2].debug_data, [1])
+
+        # op_1 was the least recently accessed event.
+        self.assertIsNotNone(events[0]._debug_data)
+        self.assertIsNone(events[1]._debug_data)
+        self.assertIsNotNone(events[2]._debug_data)
+        self.assertEqual(events[1].debug_data, [1])
+
+        # Assigned debug data is kept, however long ago it was accessed.
+        events[0].debug_data = [2]
+        for event in events[1:]:
+            self.assertEqual(event.debug_data, [1])
+        self.assertEqual(events[0].debug_data, [2])
+
+    def test_compare_intermediate_outputs(self) -> None:
+        def make_inspector(scale: float) -> Inspector:
+            events = [
+                Event(
+                    name="op_0",
+                    debug_handles=1,
+                    debug_data=[torch.ones(2, 3) * scale, torch.arange(4.0)],
+                ),
+                Event(name="op_1", debug_handles=[2, 3], debug_data=[torch.ones(3)]),
+                Event(name="op_2", debug_data=[torch.ones(3)]),
+            ]
+            with patch.object(
+                _inspector, "gen_etdump_run_data", return_value=None
+            ), patch.object(
+                EventBlock,
+                "_gen_from_etdump",
+                return_value=[EventBlock(name=EVENT_BLOCK_NAME, events=events)],
+            ):
+                return Inspector(etdump_path=ETDUMP_PATH)
+
+        reference = make_inspector(1.0)
+        for max_workers in [None, 2]:
+            df = make_inspector(2.0).compare_intermediate_outputs(
+                reference, max_workers=max_workers
+            )
+            # Events without debug handles are not compared.
+            self.assertEqual(list(df["event_name"]), ["op_0", "op_0", "op_1"])
+            self.assertEqual(list(df["debug_handles"]), [1, 1, [2, 3]])
+            self.assertEqual(list(df["output_index"]), [0, 1, 0])
+            self.assertEqual(list(df["mse"]), [1.0, 0.0, 0.0])
+            self.assertAlmostEqual(df["cosine_similarity"][0], 1.0, places=6)
+            self.assertAlmostEqual(df["snr"][0], 0.0, places=6)
+
+    def test_inspector_diff(self) -> None:
+        def make_inspector(
+            add_latency: List[float],
+            mul_latency: Optional[List[float]] = None,
+        ) -> Inspector:
+            events = [
+                Event(
+                    name="native_call_add.out",
+                    perf_data=PerfData(add_latency),
+                    debug_handles=1,
+                ),
+                Event(
+                    name="DELEGATE_CALL",
+                    perf_data=PerfData([5.0, 5.1, 4.9, 5.0, 5.0]),
+                    debug_handles=[2, 3],
+                    is_delegated_op=True,
+                    delegate_backend_name="XnnpackBackend",
+                ),
+                Event(
+                    name="native_call_mul.out",
+                    perf_data=PerfData(mul_latency) if mul_latency else None,
+                    debug_handles=4,
+                ),
+            ]
+            with patch.object(
+                _inspector, "gen_etdump_run_data", return_value=None
+            ), patch.object(
+                EventBlock,
+                "_gen_from_etdump",
+                return_value=[EventBlock(name=EVENT_BLOCK_NAME, events=events)],
+            ):
+                return Inspector(etdump_path=ETDUMP_PATH)
+
+        base = make_inspector([1.0, 1.1, 0.9, 1.0, 1.0])
+        df = base.diff(make_inspector([2.0, 2.1, 1.9, 2.0, 2.0]))
+        # Events without perf data are left out.
+        self.assertEqual(
+            list(df["event_name"]), ["native_call_add.out", "DELEGATE_CALL"]
+        )
+        self.assertEqual(list(df["delta"]), [1.0, 0.0])
+        self.assertEqual(list(df["significant"]), [True, False])
+        self.assertEqual(list(df["regression"]), [True, False])
+
+        # Below the regression threshold
+        df = base.diff(
+            make_inspector([1.5, 1.6, 1.4, 1.5, 1.5]), regression_threshold=0.6
+        )
+        self.assertEqual(list(df["significant"]), [True, False])
+        self.assertEqual(list(df["regression"]), [False, False])
+
+        df = base.diff(make_inspector([2.0, 2.1, 1.9, 2.0, 2.0]), by_delegate=True)
+        self.assertEqual(list(df["delegate_backend_name"].isna()), [True, False])
+        self.assertEqual(df["delegate_backend_name"][1], "XnnpackBackend")
+        self.assertEqual(list(df["regression"]), [True, False])
+
+        # Too few samples to be tested
+        df = base.diff(make_inspector([2.0, 2.1, 1.9, 2.0]))
+        self.assertAlmostEqual(df["delta"][0], 1.0)
+        self.assertTrue(np.isnan(df["delta_low"][0]) and np.isnan(df["delta_high"][0]))
+        self.assertEqual(list(df["significant"]), [False, False])
+        self.assertEqual(list(df["regression"]), [False, False])
+        with self.assertRaises(ValueError):
+            base.diff(base, min_samples=1)
+
+        # The Bonferroni correction widens the intervals.
+        new = make_inspector([1.05, 1.15, 0.95, 1.05, 1.05])
+        df = base.diff(new)
+        corrected_df = base.diff(new, bonferroni=True)
+        self.assertLess(corrected_df["delta_low"][0], df["delta_low"][0])
+        self.assertGreater(corrected_df["delta_high"][0], df["delta_high"][0])
+
+        # Events run a different number of times are summed over their
+        # common runs.
+        base = make_inspector([1.0] * 5, mul_latency=[1.0] * 5)
+        new = make_inspector([2.0] * 5, mul_latency=[1.0] * 5 + [9.0])
+        with self.assertLogs(_inspector.log, "WARNING"):
+            df = base.diff(new, by_delegate=True)
+        self.assertEqual(df["delta"][0], 1.0)
+
+    def test_inspector_diff_bundled_inputs(self) -> None:
+        def make_inspector() -> Inspector:
+            event_blocks = [
+                EventBlock(
+                    name=EVENT_BLOCK_NAME,
+                    events=[
+                        Event(
+                            name="native_call_add.out",
+                            perf_data=PerfData([latency] * 5),
+                            debug_handles=1,
+                        )
+                    ],
+                    bundled_input_index=index,
+                )
+                for index, latency in enumerate([1.0, 100.0])
+            ]
+            with patch.object(
+                _inspector, "gen_etdump_run_data", return_value=None
+            ), patch.object(EventBlock, "_gen_from_etdump", return_value=event_blocks):
+                return Inspector(etdump_path=ETDUMP_PATH)
+
+        # EventBlocks of the same name are told apart by their bundled input.
+        for by_delegate in [False, True]:
+            df = make_inspector().diff(make_inspector(), by_delegate=by_delegate)
+            self.assertEqual(list(df["bundled_input_index"]), [0, 1])
+            self.assertEqual(list(df["base_avg"]), [1.0, 100.0])
+            self.assertEqual(list(df["new_avg"]), [1.0, 100.0])
+            self.assertEqual(list(df["delta"]), [0.0, 0.0])
+            self.assertEqual(list(df["regression"]), [False, False])
+
     def test_inspector_constructor(self):
         # Create a context manager to patch functions called by Inspector.__init__
         with patch.object(
             _inspector, "parse_etrecord", return_value=None
         ) as mock_parse_etrecord, patch.object(
-            _inspector, "gen_etdump_object", return_value=None
+            _inspector, "gen_etdump_run_data", return_value=None
         ) as mock_gen_etdump, patch.object(
             EventBlock, "_gen_from_etdump"
         ) as mock_gen_from_etdump, patch.object(
@@ -98,7 +294,7 @@ class TestInspector(unittest.TestCase):
         with patch.object(
             _inspector, "parse_etrecord", return_value=None
         ), patch.object(
-            _inspector, "gen_etdump_object", return_value=None
+            _inspector, "gen_etdump_run_data", return_value=None
         ), patch.object(
             EventBlock, "_gen_from_etdump"
         ) as mock_gen_from_etdump, patch.object(
@@ -125,7 +321,7 @@ class TestInspector(unittest.TestCase):
         with patch.object(
             _inspector, "parse_etrecord", return_value=None
         ), patch.object(
-            _inspector, "gen_etdump_object", return_value=None
+            _inspector, "gen_etdump_run_data", return_value=None
         ), patch.object(
             EventBlock, "_gen_from_etdump"
         ), patch.object(
@@ -278,7 +474,7 @@ class TestInspector(unittest.TestCase):
         with patch.object(
             _inspector, "parse_etrecord", return_value=None
         ), patch.object(
-            _inspector, "gen_etdump_object", return_value=None
+            _inspector, "gen_etdump_run_data", return_value=None
         ), patch.object(
             EventBlock, "_gen_from_etdump"
         ), patch.object(
@@ -10,6 +10,7 @@ import tempfile
 import unittest
 from typing import Dict, Tuple
 
+import numpy as np
 import torch
 
 from executorch.devtools import generate_etrecord, parse_etrecord
@@ -25,12 +26,21 @@ from executorch.devtools.etdump import schema_flatcc as flatcc
 
 from executorch.devtools.etrecord.tests.etrecord_test import TestETRecord
 from executorch.devtools.inspector._inspector_utils import (
+    bootstrap_mean_delta,
+    calculate_batched_metrics,
+    calculate_cosine_similarity,
+    calculate_grouped_perf_stats,
+    calculate_mse,
+    calculate_snr,
     calculate_time_scale_factor,
+    compare_results,
     create_debug_handle_to_op_node_mapping,
     EDGE_DIALECT_GRAPH_KEY,
     find_populated_event,
     gen_graphs_from_etrecord,
+    inflate_runtime_output,
     is_inference_output_equal,
+    open_debug_buffer,
     TimeScale,
 )
 
@@ -188,6 +198,111 @@ class TestInspectorUtils(unittest.TestCase):
             calculate_time_scale_factor(TimeScale.CYCLES, TimeScale.CYCLES), 1
         )
 
+    def test_inflate_runtime_output_from_debug_buffer(self):
+        expected = torch.arange(6, dtype=torch.float).view(2, 3)
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b"\0" * 8 + expected.numpy().tobytes())
+            f.flush()
+            debug_buffer = open_debug_buffer(f.name)
+            value = flatcc.Value(
+                val=flatcc.ValueType.TENSOR.value,
+                tensor=flatcc.Tensor(
+                    scalar_type=flatcc.ScalarType.FLOAT,
+                    sizes=[2, 3],
+                    strides=[3, 1],
+                    offset=8,
+                ),
+                tensor_list=None,
+                int_value=None,
+                float_value=None,
+                double_value=None,
+                bool_value=None,
+                output=None,
+            )
+            tensor = inflate_runtime_output(value, debug_buffer)
+            self.assertTrue(torch.equal(tensor, expected))
+
+            # Writes to the tensor don't reach the file.
+            tensor.zero_()
+            f.seek(8)
+            self.assertEqual(f.read(), expected.numpy().tobytes())
+            del tensor
+
+    def test_calculate_batched_metrics(self):
+        torch.manual_seed(0)
+        ref_values = [torch.randn(2, 3) for _ in range(3)] + [torch.randn(5), 1]
+        values = [t + 0.1 * torch.randn(t.shape) for t in ref_values[:-1]] + [1]
+        values[1] = torch.randn(3, 2)
+        results = calculate_batched_metrics(ref_values, values)
+        for metric, calculate in [
+            ("mse", calculate_mse),
+            ("snr", calculate_snr),
+            ("cosine_similarity", calculate_cosine_similarity),
+        ]:
+            for index in [0, 2, 3]:
+                expected = calculate([ref_values[index]], [values[index]])[0]
+                self.assertAlmostEqual(results[metric][index], expected, 1)
+            # Tensors of different shapes, and non-tensors, are not compared.
+            self.assertIsNone(results[metric][1])
+            self.assertIsNone(results[metric][4])
+
+        with self.assertRaises(ValueError):
+            calculate_batched_metrics(ref_values, values, ["psnr"])
+
+    def test_compare_results_truncates_to_shorter_output(self):
+        ref_values = [torch.ones(2, 3), torch.full((4,), 2.0), torch.ones(5)]
+        values = [torch.ones(2, 3) * 1.1, torch.full((4,), 2.2)]
+        results = compare_results(ref_values, values)
+        for metric, calculate in [
+            ("mse", calculate_mse),
+            ("snr", calculate_snr),
+            ("cosine_similarity", calculate_cosine_similarity),
+        ]:
+            self.assertEqual(results[metric], calculate(ref_values, values))
+
+    def test_compare_results_broadcasts_different_shapes(self):
+        ref_values = [torch.ones(2, 3), torch.arange(6.0).reshape(2, 3)]
+        values = [torch.ones(2, 3) * 1.1, torch.arange(3.0)]
+        results = compare_results(ref_values, values, ["snr", "mse"])
+        self.assertEqual(results["snr"], calculate_snr(ref_values, values))
+        self.assertEqual(results["mse"], calculate_mse(ref_values, values))
+
+        # Shapes that can't be broadcast, or compared with cosine similarity,
+        # raise like the metrics functions do.
+        with self.assertRaises(ValueError):
+            compare_results(ref_values, values, ["cosine_similarity"])
+        with self.assertRaises(RuntimeError):
+            compare_results([torch.ones(2)], [torch.ones(3)], ["mse"])
+
+    def test_bootstrap_mean_delta(self):
+        rng = np.random.default_rng(0)
+        base = rng.normal(10.0, 1.0, 100)
+
+        delta, low, high = bootstrap_mean_delta(base, base + 2.0)
+        self.assertAlmostEqual(delta, 2.0)
+        self.assertTrue(0 < low < delta < high)
+
+        delta, low, high = bootstrap_mean_delta(base, rng.permutation(base))
+        self.assertAlmostEqual(delta, 0.0)
+        self.assertTrue(low < 0 < high)
+
+        with self.assertRaises(ValueError):
+            bootstrap_mean_delta(base, [10.0])
+
+    def test_calculate_grouped_perf_stats(self):
+        rng = np.random.default_rng(0)
+        groups = [rng.random(n) for n in [1, 2, 7, 10, 10, 3, 10]]
+        stats = calculate_grouped_perf_stats(
+            np.concatenate(groups), np.array([len(g) for g in groups])
+        )
+        for i, group in enumerate(groups):
+            self.assertEqual(stats["p10"][i], np.percentile(group, 10))
+            self.assertEqual(stats["p50"][i], np.percentile(group, 50))
+            self.assertEqual(stats["p90"][i], np.percentile(group, 90))
+            self.assertAlmostEqual(stats["avg"][i], np.mean(group))
+            self.assertEqual(stats["min"][i], min(group))
+            self.assertEqual(stats["max"][i], max(group))
+
 
 def gen_mock_operator_graph_with_expected_map() -> (
     Tuple[OperatorGraph, Dict[int, OperatorNode]]
@@ -52,6 +52,7 @@ class Llama2Model(EagerModelBase):
         self.input_prune_map_path = kwargs.get("input_prune_map_path", None)
         self.output_prune_map_path = kwargs.get("output_prune_map_path", None)
         self.max_seq_len = kwargs.get("max_seq_len", 128)
+        self.max_batch_size = kwargs.get("max_batch_size", 1)
         self.args = kwargs.get("args", None)
 
         # The example is using a dummy small model with random weights for demo purpose only.
@@ -136,7 +137,7 @@ the checkpoint format to avoid generating faulty models.
 
         model_args: ModelArgs = ModelArgs(
             max_seq_len=self.max_seq_len,
-            max_batch_size=1,
+            max_batch_size=self.max_batch_size,
             use_kv_cache=self.use_kv_cache,
             use_sdpa_with_kv_cache_op=self.use_sdpa_with_kv_cache_op,
             generate_full_logits=self.generate_full_logits,
@@ -244,8 +245,8 @@ the checkpoint format to avoid generating faulty models.
             return self.get_example_inputs_kvcache_sdpa()
         else:
             return (
-                torch.tensor(
-                    [[1, 2, 3]], dtype=torch.long
+                torch.tensor([[1, 2, 3]], dtype=torch.long).repeat(
+                    self.max_batch_size, 1
                 ),  # tokens, with kv cache our input token length is always just 1 token.
             )
 
@@ -253,13 +254,15 @@ the checkpoint format to avoid generating faulty models.
     def get_example_inputs_kvcache_sdpa(self):
         if self.enable_dynamic_shape:
             return (
-                torch.tensor([[2, 3, 4]], dtype=torch.long),
+                torch.tensor([[2, 3, 4]], dtype=torch.long).repeat(
+                    self.max_batch_size, 1
+                ),
                 torch.tensor([0], dtype=torch.long),
             )
         else:
             return (
-                torch.tensor(
-                    [[1]], dtype=torch.long
+                torch.tensor([[1]], dtype=torch.long).repeat(
+                    self.max_batch_size, 1
                 ),  # tokens, with kv cache our input token length is always just 1 token.
                 torch.tensor(
                     [0], dtype=torch.long
@@ -28,7 +28,7 @@ class EagerLlamaRunner(LlamaRunner):
             params = json.loads(f.read())
         model_args: ModelArgs = ModelArgs(
             max_seq_len=args.max_seq_length,
-            max_batch_size=1,
+            max_batch_size=args.max_batch_size,
             use_kv_cache=args.use_kv_cache,
             **params,
         )
@@ -36,6 +36,7 @@ class EagerLlamaRunner(LlamaRunner):
             tokenizer_path=args.tokenizer_path,
             model_args=model_args,
             device="cuda" if torch.cuda.is_available() else "cpu",
+            prefill_chunk_size=args.prefill_chunk_size,
         )
         manager: LLMEdgeManager = _prepare_for_llama_export("llama", args)
         self.model = manager.model.eval().to(device=self.device)
@@ -54,7 +55,39 @@ def build_args_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         "--prompt",
         type=str,
-        default="Hello",
+        nargs="+",
+        default=["Hello"],
+        help="Prompts to complete, up to --max_batch_size of them at once.",
+    )
+
+    parser.add_argument(
+        "--prefill_chunk_size",
+        type=int,
+        default=None,
+        help="Prefill prompts in chunks of this many tokens instead of all at once. "
+        "Use 1 for models exported without --enable_dynamic_shape.",
+    )
+
+    parser.add_argument(
+        "--draft_checkpoint",
+        type=str,
+        default=None,
+        help="Draft model checkpoint to decode with speculatively. The main model "
+        "must be exported with --enable_dynamic_shape and --generate_full_logits.",
+    )
+
+    parser.add_argument(
+        "--draft_params",
+        type=str,
+        default=None,
+        help="Params file of the draft model. Defaults to the main model's.",
+    )
+
+    parser.add_argument(
+        "--num_draft_tokens",
+        type=int,
+        default=4,
+        help="Number of tokens the draft model proposes at each step.",
     )
 
     parser.add_argument(
@@ -71,15 +104,37 @@ def main() -> None:
     args = parser.parse_args()
 
     runner = EagerLlamaRunner(args)
-    result = runner.text_completion(
-        prompt=args.prompt,
-        temperature=args.temperature,
-    )
-    print(
-        "Response: \n{response}\n Tokens:\n {tokens}".format(
-            response=result["generation"], tokens=result["tokens"]
+    if args.draft_checkpoint is None:
+        results = runner.batch_text_completion(
+            prompts=args.prompt,
+            temperature=args.temperature,
         )
-    )
+    else:
+        draft = EagerLlamaRunner(
+            argparse.Namespace(
+                **{
+                    **vars(args),
+                    "checkpoint": args.draft_checkpoint,
+                    "params": args.draft_params or args.params,
+                }
+            )
+        )
+        results = [
+            runner.text_completion(
+                prompt=prompt,
+                temperature=args.temperature,
+                draft=draft,
+                num_draft_tokens=args.num_draft_tokens,
+            )
+            for prompt in args.prompt
+        ]
+    for result in results:
+        print(
+            "Response: \n{response}\n Tokens:\n {tokens}".format(
+                response=result["generation"], tokens=result["tokens"]
+            )
+        )
+    print(runner.stats)
 
 
 if __name__ == "__main__":
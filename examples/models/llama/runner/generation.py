@@ -4,8 +4,10 @@
 # This source code is licensed under the BSD-style license found in the
 # LICENSE file in the root directory of this source tree.
 
+import time
 from abc import ABC, abstractmethod
-from typing import List, Optional, TypedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, TypedDict
 
 import torch
 
@@ -18,6 +20,55 @@ class CompletionPrediction(TypedDict, total=False):
     tokens: List[int]  # not required
 
 
+@dataclass
+class GenerationStats:
+    """
+    Throughput of the last generate or generate_batch call of a LlamaRunner,
+    summed over the rows of the batch.
+    """
+
+    prefill_tokens: int = 0
+    prefill_seconds: float = 0.0
+    generated_tokens: int = 0
+    decode_seconds: float = 0.0
+    # Speculative decoding: forward calls that verified draft tokens, and
+    # how many of the draft tokens they accepted.
+    verify_steps: int = 0
+    accepted_draft_tokens: int = 0
+
+    @property
+    def prefill_tokens_per_second(self) -> float:
+        return (
+            self.prefill_tokens / self.prefill_seconds if self.prefill_seconds else 0.0
+        )
+
+    @property
+    def decode_tokens_per_second(self) -> float:
+        return (
+            self.generated_tokens / self.decode_seconds if self.decode_seconds else 0.0
+        )
+
+    @property
+    def accepted_tokens_per_step(self) -> float:
+        return (
+            self.accepted_draft_tokens / self.verify_steps if self.verify_steps else 0.0
+        )
+
+    def __str__(self) -> str:
+        speculative = (
+            f"\nSpeculative decoding: {self.accepted_tokens_per_step:.2f} accepted "
+            f"draft tokens per step over {self.verify_steps} steps"
+            if self.verify_steps
+            else ""
+        )
+        return (
+            f"Prefill: {self.prefill_tokens} tokens in {self.prefill_seconds:.3f} s "
+            f"({self.prefill_tokens_per_second:.2f} tokens/s)\n"
+            f"Decode: {self.generated_tokens} tokens in {self.decode_seconds:.3f} s "
+            f"({self.decode_tokens_per_second:.2f} tokens/s)" + speculative
+        )
+
+
 def sample_top_p(probs, p):
     """
     Perform top-p (nucleus) sampling on a probability distribution.
@@ -51,12 +102,40 @@ def next_token(logits: torch.Tensor, temperature: float, top_p: float) -> int:
     return torch.argmax(logits, dim=-1).item()
 
 
+def next_tokens(logits: torch.Tensor, temperature: float, top_p: float) -> List[int]:
+    """
+    Batched version of next_token: samples one token from each row of logits.
+    """
+    if temperature > 0:
+        probs = torch.softmax(logits / temperature, dim=-1)
+        return sample_top_p(probs, top_p).reshape(-1).tolist()
+    return torch.argmax(logits, dim=-1).reshape(-1).tolist()
+
+
 class LlamaRunner(ABC):
-    def __init__(self, tokenizer_path: str, model_args: ModelArgs, device: str = "cpu"):
+    def __init__(
+        self,
+        tokenizer_path: str,
+        model_args: ModelArgs,
+        device: str = "cpu",
+        prefill_chunk_size: Optional[int] = None,
+    ):
+        """
+        Args:
+            prefill_chunk_size (int, optional): With a KV cache, feed prompts to the
+                model in chunks of this many tokens, e.g. 1 for models exported
+                without dynamic shapes. Defaults to the whole prompt at once.
+        """
+        if prefill_chunk_size is not None and prefill_chunk_size < 1:
+            raise ValueError(
+                f"prefill_chunk_size must be positive, got {prefill_chunk_size}"
+            )
         self.params = model_args
         self.tokenizer = get_tokenizer(tokenizer_path)
         assert model_args.vocab_size == self.tokenizer.n_words
         self.device = device
+        self.prefill_chunk_size = prefill_chunk_size
+        self.stats = GenerationStats()
 
     @abstractmethod
     def forward(
@@ -66,48 +145,295 @@ class LlamaRunner(ABC):
     ) -> torch.Tensor:
         pass
 
-    def generate(  # noqa: C901
+    def _is_stop_token(self, token: int) -> bool:
+        return token == self.tokenizer.eos_id or (
+            hasattr(self.tokenizer, "stop_tokens")
+            and token in self.tokenizer.stop_tokens
+        )
+
+    def generate(
         self,
         prompt_tokens: List[int],
         temperature: float = 0.8,
         top_p: float = 0.9,
         echo: bool = False,
     ) -> List[int]:
-        # prefill
-        logits = self.forward(
-            tokens=torch.tensor([prompt_tokens], dtype=torch.long, device=self.device),
-            input_pos=(
-                torch.tensor([0], dtype=torch.long, device=self.device)
-                if self.params.use_kv_cache
-                else None
-            ),
-        )
+        return self.generate_batch(
+            prompt_tokens=[prompt_tokens],
+            temperature=temperature,
+            top_p=top_p,
+            echo=echo,
+        )[0]
+
+    def generate_batch(
+        self,
+        prompt_tokens: List[List[int]],
+        temperature: float = 0.8,
+        top_p: float = 0.9,
+        echo: bool = False,
+    ) -> List[List[int]]:
+        """
+        Generates a completion of each prompt, decoding up to
+        params.max_batch_size prompts at once, one row of the batch each.
+        The completion of a prompt ends before its first stop token, even one
+        sampled right after the prompt, in which case it is empty.
+
+        Args:
+            prompt_tokens (List[List[int]]): Tokens of each prompt.
+            temperature (float, optional): Temperature value for controlling randomness in sampling. Defaults to 0.8.
+            top_p (float, optional): Top-p probability threshold for nucleus sampling. Defaults to 0.9.
+            echo (bool, optional): Flag indicating whether to include prompt tokens in the generated output. Defaults to False.
 
-        current_token = next_token(logits, temperature, top_p)
-        tokens = prompt_tokens + [current_token]
+        Returns:
+            List[List[int]]: Generated tokens of each prompt, in the same order.
+        """
+        max_batch_size = self.params.max_batch_size
+        self.stats = GenerationStats()
+        generations = []
+        for start in range(0, len(prompt_tokens), max_batch_size):
+            batch = prompt_tokens[start : start + max_batch_size]
+            # The model takes exactly max_batch_size rows, so fill the batch
+            # up with copies of its first prompt, whose output is dropped.
+            rows = [list(tokens) for tokens in batch] + [
+                list(batch[0]) for _ in range(max_batch_size - len(batch))
+            ]
+            rows = self._generate_rows(rows, len(batch), temperature, top_p)
+            generations.extend(
+                row if echo else row[len(tokens) :] for row, tokens in zip(rows, batch)
+            )
+        return generations
 
-        while len(tokens) < self.params.max_seq_len:
+    def _generate_rows(
+        self,
+        rows: List[List[int]],
+        num_prompts: int,
+        temperature: float,
+        top_p: float,
+    ) -> List[List[int]]:
+        """
+        Appends the generated tokens to each row, which initially holds its
+        prompt. Rows past num_prompts are only there to fill the batch.
+
+        The model takes a single input_pos for all rows, so every row is fed
+        the token at the same position in each forward call. The rows are
+        prefilled together up to the length of the shortest prompt; after
+        that, rows with longer prompts are fed the rest of their prompt one
+        token at a time, and their sampled tokens are ignored, while the
+        others decode. Every row thus only ever attends to its own tokens.
+        Rows that stopped are fed their last token until all of them stop.
+        """
+        prompt_lens = [len(row) for row in rows]
+        done = [i >= num_prompts for i in range(len(rows))]
+        # Number of positions of each row that were fed to the model.
+        pos = min(prompt_lens)
+
+        start = time.perf_counter()
+        logits = self._prefill([row[:pos] for row in rows])
+        self.stats.prefill_tokens += pos * num_prompts
+        self.stats.prefill_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        num_tokens = sum(prompt_lens[:num_prompts])
+        while True:
+            for i, token in enumerate(next_tokens(logits, temperature, top_p)):
+                if done[i] or pos < prompt_lens[i]:
+                    continue
+                if self._is_stop_token(token):
+                    done[i] = True
+                else:
+                    rows[i].append(token)
+            if all(done) or pos + 1 >= self.params.max_seq_len:
+                break
+
+            pos += 1
             if self.params.use_kv_cache:
                 logits = self.forward(
                     tokens=torch.tensor(
-                        [[current_token]], dtype=torch.long, device=self.device
+                        [[row[min(pos, len(row)) - 1]] for row in rows],
+                        dtype=torch.long,
+                        device=self.device,
                     ),
                     input_pos=torch.tensor(
-                        [len(tokens) - 1], dtype=torch.long, device=self.device
+                        [pos - 1], dtype=torch.long, device=self.device
                     ),
                 )
             else:
                 logits = self.forward(
-                    tokens=torch.tensor([tokens], dtype=torch.long, device=self.device),
+                    tokens=torch.tensor(
+                        [row[:pos] + row[-1:] * (pos - len(row)) for row in rows],
+                        dtype=torch.long,
+                        device=self.device,
+                    ),
                 )
-            current_token = next_token(logits, temperature, top_p)
-            if current_token == self.tokenizer.eos_id or (
-                hasattr(self.tokenizer, "stop_tokens")
-                and current_token in self.tokenizer.stop_tokens
-            ):
-                break
-            tokens.append(current_token)
 
+        self.stats.generated_tokens += sum(map(len, rows[:num_prompts])) - num_tokens
+        self.stats.decode_seconds += time.perf_counter() - start
+        return rows
+
+    def _prefill(self, rows: List[List[int]]) -> torch.Tensor:
+        """
+        Feeds the tokens of each row to the model from position 0 and returns
+        the logits of the last position.
+        """
+        if not self.params.use_kv_cache:
+            logits = self.forward(
+                tokens=torch.tensor(rows, dtype=torch.long, device=self.device)
+            )
+            return logits if logits.dim() == 2 else logits[:, -1]
+        return self._feed(rows, 0)
+
+    def _feed(self, rows: List[List[int]], start_pos: int) -> torch.Tensor:
+        """
+        Feeds the tokens of each row to the model with a KV cache, from
+        start_pos on, in chunks of prefill_chunk_size tokens, and returns the
+        logits of the last position.
+        """
+        length = len(rows[0])
+        chunk_size = self.prefill_chunk_size or length
+        for start in range(0, length, chunk_size):
+            logits = self.forward(
+                tokens=torch.tensor(
+                    [row[start : start + chunk_size] for row in rows],
+                    dtype=torch.long,
+                    device=self.device,
+                ),
+                input_pos=torch.tensor(
+                    [start_pos + start], dtype=torch.long, device=self.device
+                ),
+            )
+        # Models exported with generate_full_logits return those of every position.
+        return logits if logits.dim() == 2 else logits[:, -1]
+
+    def _forward_token(self, token: int, pos: int) -> torch.Tensor:
+        return self.forward(
+            tokens=torch.tensor([[token]], dtype=torch.long, device=self.device),
+            input_pos=torch.tensor([pos], dtype=torch.long, device=self.device),
+        )
+
+    def _propose(
+        self,
+        tokens: List[int],
+        pos: int,
+        num_draft_tokens: int,
+        temperature: float,
+        top_p: float,
+    ) -> Tuple[List[int], int]:
+        """
+        Proposes the next num_draft_tokens tokens as the draft model of
+        generate_speculative. The KV cache holds the entries of tokens up to
+        pos; returns the proposal and the new number of entries.
+        """
+        for token in tokens[pos:]:
+            logits = self._forward_token(token, pos)
+            pos += 1
+        proposal = []
+        while True:
+            proposal.append(next_tokens(logits, temperature, top_p)[0])
+            if len(proposal) == num_draft_tokens:
+                return proposal, pos
+            logits = self._forward_token(proposal[-1], pos)
+            pos += 1
+
+    def _extend(
+        self, tokens: List[int], new_tokens: List[int], max_seq_len: int
+    ) -> bool:
+        """
+        Appends new_tokens to tokens up to the first stop token or
+        max_seq_len, and returns whether generation is done.
+        """
+        for token in new_tokens:
+            if len(tokens) >= max_seq_len or self._is_stop_token(token):
+                return True
+            tokens.append(token)
+        return len(tokens) >= max_seq_len
+
+    def generate_speculative(
+        self,
+        prompt_tokens: List[int],
+        draft: "LlamaRunner",
+        num_draft_tokens: int = 4,
+        temperature: float = 0.8,
+        top_p: float = 0.9,
+        echo: bool = False,
+    ) -> List[int]:
+        """
+        Generates a completion of the prompt with speculative decoding: the
+        draft model proposes num_draft_tokens tokens, and this model verifies
+        them all in a single forward call. The longest prefix of the proposal
+        that matches the tokens this model samples is accepted, followed by
+        this model's token at the first mismatch, so the completion follows
+        this model's distribution whatever the draft proposes.
+
+        Both models need a KV cache, and this one must take several tokens
+        per call and return the logits of each (export it with
+        --enable_dynamic_shape and --generate_full_logits). Rejected tokens
+        are rolled back by moving the cache positions back; their stale
+        entries are overwritten before any later token attends to them.
+
+        Args:
+            prompt_tokens (List[int]): Tokens of the prompt.
+            draft (LlamaRunner): Runner of the smaller model that proposes tokens.
+            num_draft_tokens (int, optional): Number of tokens proposed at each step. Defaults to 4.
+            temperature (float, optional): Temperature value for controlling randomness in sampling. Defaults to 0.8.
+            top_p (float, optional): Top-p probability threshold for nucleus sampling. Defaults to 0.9.
+            echo (bool, optional): Flag indicating whether to include prompt tokens in the generated output. Defaults to False.
+
+        Returns:
+            List[int]: Generated tokens.
+        """
+        if not (self.params.use_kv_cache and draft.params.use_kv_cache):
+            raise ValueError("Speculative decoding requires KV caches in both models")
+        if num_draft_tokens < 1:
+            raise ValueError(
+                f"num_draft_tokens must be positive, got {num_draft_tokens}"
+            )
+        max_seq_len = min(self.params.max_seq_len, draft.params.max_seq_len)
+        self.stats = GenerationStats()
+
+        start = time.perf_counter()
+        logits = self._prefill([prompt_tokens])
+        draft._prefill([prompt_tokens])
+        self.stats.prefill_tokens += len(prompt_tokens)
+        self.stats.prefill_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        tokens = list(prompt_tokens)
+        # Number of entries of tokens in the KV cache of the draft model.
+        draft_pos = len(tokens)
+        new_tokens = next_tokens(logits, temperature, top_p)
+        while not self._extend(tokens, new_tokens, max_seq_len):
+            proposal, draft_pos = draft._propose(
+                tokens,
+                draft_pos,
+                min(num_draft_tokens, max_seq_len - len(tokens)),
+                temperature,
+                top_p,
+            )
+            logits = self.forward(
+                tokens=torch.tensor(
+                    [tokens[-1:] + proposal], dtype=torch.long, device=self.device
+                ),
+                input_pos=torch.tensor(
+                    [len(tokens) - 1], dtype=torch.long, device=self.device
+                ),
+            )
+            if logits.dim() != 3:
+                raise ValueError(
+                    "Speculative decoding requires the logits of every position; "
+                    "export the model with --generate_full_logits"
+                )
+            sampled = next_tokens(logits[0], temperature, top_p)
+            accepted = 0
+            while accepted < len(proposal) and proposal[accepted] == sampled[accepted]:
+                accepted += 1
+            new_tokens = sampled[: accepted + 1]
+            # Roll back the draft past the first rejected token it was fed.
+            draft_pos = min(draft_pos, len(tokens) + accepted)
+            self.stats.verify_steps += 1
+            self.stats.accepted_draft_tokens += accepted
+
+        self.stats.generated_tokens += len(tokens) - len(prompt_tokens)
+        self.stats.decode_seconds += time.perf_counter() - start
         return tokens if echo else tokens[len(prompt_tokens) :]
 
     def text_completion(
@@ -116,6 +442,8 @@ class LlamaRunner(ABC):
         temperature: float = 0.6,
         top_p: float = 0.9,
         echo: bool = False,
+        draft: Optional["LlamaRunner"] = None,
+        num_draft_tokens: int = 4,
     ) -> CompletionPrediction:
         """
         Perform text completion for a prompt using the language model.
@@ -125,6 +453,8 @@ class LlamaRunner(ABC):
             temperature (float, optional): Temperature value for controlling randomness in sampling. Defaults to 0.6.
             top_p (float, optional): Top-p probability threshold for nucleus sampling. Defaults to 0.9.
             echo (bool, optional): Flag indicating whether to include prompt tokens in the generated output. Defaults to False.
+            draft (LlamaRunner, optional): Runner of a draft model to decode with, see generate_speculative. Defaults to None.
+            num_draft_tokens (int, optional): Number of tokens the draft model proposes at each step. Defaults to 4.
 
         Returns:
             CompletionPrediction: Completion prediction, which contains the generated text completion.
@@ -133,13 +463,50 @@ class LlamaRunner(ABC):
             This method generates text completion for the provided prompt, employing nucleus sampling to introduce controlled randomness.
         """
         prompt_tokens = self.tokenizer.encode(prompt, bos=True, eos=False)
-        generation_tokens = self.generate(
-            prompt_tokens=prompt_tokens,
-            temperature=temperature,
-            top_p=top_p,
-            echo=echo,
-        )
+        if draft is not None:
+            generation_tokens = self.generate_speculative(
+                prompt_tokens=prompt_tokens,
+                draft=draft,
+                num_draft_tokens=num_draft_tokens,
+                temperature=temperature,
+                top_p=top_p,
+                echo=echo,
+            )
+        else:
+            generation_tokens = self.generate(
+                prompt_tokens=prompt_tokens,
+                temperature=temperature,
+                top_p=top_p,
+                echo=echo,
+            )
         return {
             "generation": self.tokenizer.decode(generation_tokens),
             "tokens": generation_tokens,
         }
+
+    def batch_text_completion(
+        self,
+        prompts: List[str],
+        temperature: float = 0.6,
+        top_p: float = 0.9,
+        echo: bool = False,
+    ) -> List[CompletionPrediction]:
+        """
+        Perform text completion for several prompts at once, see text_completion.
+        Up to params.max_batch_size prompts are decoded in the same forward calls.
+        """
+        generations = self.generate_batch(
+            prompt_tokens=[
+                self.tokenizer.encode(prompt, bos=True, eos=False) for prompt in prompts
+            ],
+            temperature=temperature,
+            top_p=top_p,
+            echo=echo,
+        )
+        return [
+            {
+                "generation": self.tokenizer.decode(generation_tokens),
+                "tokens": generation_tokens,
+            }
+            for generation_tokens in generations
+        ]
@@ -5,12 +5,17 @@
 # LICENSE file in the root directory of this source tree.
 
 import argparse
+import hashlib
 import json
-from typing import Optional
+from collections import Counter, OrderedDict
+from typing import Callable, List, Optional, Tuple
 
 import torch
 
 from examples.models.llama.llama_transformer import ModelArgs
+from executorch.exir._serialize import _deserialize_pte_binary
+from executorch.exir.schema import Tensor
+from executorch.exir.tensor import get_scalar_type, num_bytes_from_shape_and_dtype
 from executorch.extension.pybindings.portable_lib import _load_for_executorch
 
 # Load custom ops and quantized ops.
@@ -23,6 +28,123 @@ from executorch.kernels import quantized  # noqa
 from .generation import LlamaRunner
 
 
+class PrefixCache:
+    """
+    LRU cache of the KV caches of a model after prefilling token prefixes,
+    whose entries hold up to max_bytes.
+
+    The entries are snapshots of the KV caches, see mutable_buffer_spans,
+    along with the logits of the last position of their prefix. They are
+    keyed on a hash of the tokens of each row of the batch.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[int, List[bytes], torch.Tensor]]" = (
+            OrderedDict()
+        )
+        # Number of entries of each prefix length, to only look up those.
+        self._lengths: Counter[int] = Counter()
+        # Size of a snapshot, once known, to skip taking those that can't fit.
+        self._snapshot_nbytes: Optional[int] = None
+
+    def __repr__(self) -> str:
+        return (
+            f"PrefixCache({len(self._entries)} entries, {self.nbytes}/"
+            f"{self.max_bytes} bytes, hits={self.hits}, misses={self.misses})"
+        )
+
+    @staticmethod
+    def _key(rows: List[List[int]]) -> str:
+        return hashlib.sha256(
+            torch.tensor(rows, dtype=torch.long).numpy().tobytes()
+        ).hexdigest()
+
+    def lookup(
+        self, rows: List[List[int]]
+    ) -> Optional[Tuple[int, List[bytes], torch.Tensor]]:
+        """
+        Returns the entry of the longest cached prefix of rows, as its length,
+        planned buffers and logits, or None.
+        """
+        for length in sorted(self._lengths, reverse=True):
+            if length > len(rows[0]):
+                continue
+            key = self._key([row[:length] for row in rows])
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        self.misses += 1
+        return None
+
+    def store(
+        self,
+        rows: List[List[int]],
+        snapshot: Callable[[], List[bytes]],
+        logits: torch.Tensor,
+    ) -> None:
+        """
+        Caches the planned buffers returned by snapshot() after prefilling
+        rows, evicting the least recently used entries to make room.
+        """
+        if self._snapshot_nbytes is not None and self._snapshot_nbytes > self.max_bytes:
+            return
+        key = self._key(rows)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        buffers = snapshot()
+        self._snapshot_nbytes = sum(len(buffer) for buffer in buffers)
+        if self._snapshot_nbytes > self.max_bytes:
+            return
+        while self.nbytes + self._snapshot_nbytes > self.max_bytes:
+            _, (length, evicted, _) = self._entries.popitem(last=False)
+            self.nbytes -= sum(len(buffer) for buffer in evicted)
+            self._lengths[length] -= 1
+            if not self._lengths[length]:
+                del self._lengths[length]
+        self._entries[key] = (len(rows[0]), buffers, logits)
+        self._lengths[len(rows[0])] += 1
+        self.nbytes += self._snapshot_nbytes
+
+
+def mutable_buffer_spans(
+    pte_data: bytes, method_name: str = "forward"
+) -> Optional[List[Tuple[int, int, int]]]:
+    """
+    Returns the spans of the memory planned buffers, as buffer index, offset
+    and size in bytes, of the mutable buffers of a method, like KV caches.
+    Those are its only state across executions, while the rest of the planned
+    buffers hold activations, which can take as many bytes as the KV caches.
+
+    Placeholders are emitted in the order of the graph signature, so mutable
+    buffers are the memory planned values before the first user input.
+    Returns None, to snapshot whole planned buffers, if there are none.
+    """
+    program = _deserialize_pte_binary(pte_data)
+    plan = next(plan for plan in program.execution_plan if plan.name == method_name)
+    spans = set()
+    for value in plan.values[: min(plan.inputs, default=0)]:
+        tensor = value.val
+        if isinstance(tensor, Tensor) and tensor.allocation_info is not None:
+            # Planned buffer 0 is reserved and not allocated by the runtime.
+            spans.add(
+                (
+                    tensor.allocation_info.memory_id - 1,
+                    tensor.allocation_info.memory_offset,
+                    num_bytes_from_shape_and_dtype(
+                        torch.Size(tensor.sizes),
+                        get_scalar_type(tensor.scalar_type),
+                    ),
+                )
+            )
+    return sorted(spans) or None
+
+
 class NativeLlamaRunner(LlamaRunner):
     """
     Runs llama via ExecuTorch with provided pte file.
@@ -33,12 +155,22 @@ class NativeLlamaRunner(LlamaRunner):
             params = json.loads(f.read())
         model_args: ModelArgs = ModelArgs(
             max_seq_len=args.max_len,
-            max_batch_size=1,
+            max_batch_size=args.max_batch_size,
             use_kv_cache=args.kv_cache,
             **params,
         )
-        super().__init__(tokenizer_path=args.tokenizer, model_args=model_args)
+        super().__init__(
+            tokenizer_path=args.tokenizer,
+            model_args=model_args,
+            prefill_chunk_size=args.prefill_chunk_size,
+        )
         self.model = _load_for_executorch(args.pte)
+        self.prefix_cache: Optional[PrefixCache] = None
+        self.mutable_buffer_spans: Optional[List[Tuple[int, int, int]]] = None
+        if args.prefix_cache_bytes and args.kv_cache:
+            self.prefix_cache = PrefixCache(args.prefix_cache_bytes)
+            with open(args.pte, "rb") as f:
+                self.mutable_buffer_spans = mutable_buffer_spans(f.read())
 
     def forward(
         self,
@@ -51,6 +183,37 @@ class NativeLlamaRunner(LlamaRunner):
             else self.model.forward((tokens,))
         )[0]
 
+    def _prefill(self, rows: List[List[int]]) -> torch.Tensor:
+        """
+        With a prefix cache, restores the KV caches of the longest cached
+        prefix of the rows and only feeds the rest of them to the model.
+        """
+        if self.prefix_cache is None:
+            return super()._prefill(rows)
+        entry = self.prefix_cache.lookup(rows)
+        if entry is None:
+            logits = super()._prefill(rows)
+        else:
+            length, buffers, logits = entry
+            self.model.set_planned_buffers(buffers, self.mutable_buffer_spans)
+            if length < len(rows[0]):
+                logits = self._feed([row[length:] for row in rows], length)
+        self.prefix_cache.store(
+            rows,
+            lambda: self.model.get_planned_buffers(self.mutable_buffer_spans),
+            logits,
+        )
+        return logits
+
+    def cache_prefix(self, prefix_tokens: List[int]) -> None:
+        """
+        Prefills a prefix shared by later prompts, like a system prompt, so
+        that its KV caches are cached for them. Prompts only hit the cache
+        if their tokens start with prefix_tokens.
+        """
+        assert self.prefix_cache is not None, "The prefix cache is disabled"
+        self._prefill([prefix_tokens] * self.params.max_batch_size)
+
 
 def build_args_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser()
@@ -77,7 +240,39 @@ def build_args_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         "--prompt",
         type=str,
-        default="Hello",
+        nargs="+",
+        default=["Hello"],
+        help="Prompts to complete, up to --max_batch_size of them at once.",
+    )
+
+    parser.add_argument(
+        "--prefill_chunk_size",
+        type=int,
+        default=None,
+        help="Prefill prompts in chunks of this many tokens instead of all at once. "
+        "Use 1 for models exported without --enable_dynamic_shape.",
+    )
+
+    parser.add_argument(
+        "--draft_pte",
+        type=str,
+        default=None,
+        help="Draft model .pte file to decode with speculatively. The main model "
+        "must be exported with --enable_dynamic_shape and --generate_full_logits.",
+    )
+
+    parser.add_argument(
+        "--draft_params",
+        type=str,
+        default=None,
+        help="Params file of the draft model. Defaults to the main model's.",
+    )
+
+    parser.add_argument(
+        "--num_draft_tokens",
+        type=int,
+        default=4,
+        help="Number of tokens the draft model proposes at each step.",
     )
 
     parser.add_argument(
@@ -100,6 +295,21 @@ def build_args_parser() -> argparse.ArgumentParser:
         help="Maximum length of the generated response sequence.",
     )
 
+    parser.add_argument(
+        "--prefix_cache_bytes",
+        type=int,
+        default=0,
+        help="Reuse the KV caches of previously prefilled prompts that start "
+        "the current one, keeping snapshots of up to this many bytes.",
+    )
+
+    parser.add_argument(
+        "--max_batch_size",
+        type=int,
+        default=1,
+        help="Number of sequences the exported model processes at once.",
+    )
+
     return parser
 
 
@@ -107,15 +317,37 @@ def main() -> None:
     parser = build_args_parser()
     args = parser.parse_args()
     runner = NativeLlamaRunner(args)
-    result = runner.text_completion(
-        prompt=args.prompt,
-        temperature=args.temperature,
-    )
-    print(
-        "Response: \n{response}\n Tokens:\n {tokens}".format(
-            response=result["generation"], tokens=result["tokens"]
+    if args.draft_pte is None:
+        results = runner.batch_text_completion(
+            prompts=args.prompt,
+            temperature=args.temperature,
         )
-    )
+    else:
+        draft = NativeLlamaRunner(
+            argparse.Namespace(
+                **{
+                    **vars(args),
+                    "pte": args.draft_pte,
+                    "params": args.draft_params or args.params,
+                }
+            )
+        )
+        results = [
+            runner.text_completion(
+                prompt=prompt,
+                temperature=args.temperature,
+                draft=draft,
+                num_draft_tokens=args.num_draft_tokens,
+            )
+            for prompt in args.prompt
+        ]
+    for result in results:
+        print(
+            "Response: \n{response}\n Tokens:\n {tokens}".format(
+                response=result["generation"], tokens=result["tokens"]
+            )
+        )
+    print(runner.stats)
 
 
 if __name__ == "__main__":
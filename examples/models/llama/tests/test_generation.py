@@ -0,0 +1,130 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+import unittest
+from types import SimpleNamespace
+from typing import Optional
+from unittest.mock import patch
+
+import torch
+from executorch.examples.models.llama.llama_transformer import ModelArgs, Transformer
+from executorch.examples.models.llama.runner import generation
+from executorch.examples.models.llama.runner.generation import LlamaRunner
+
+VOCAB_SIZE = 64
+EOS_ID = 1
+
+
+class TinyRunner(LlamaRunner):
+    """Runs a small randomly initialized Transformer in eager mode."""
+
+    def __init__(
+        self,
+        seed: int = 0,
+        prefill_chunk_size: Optional[int] = None,
+        **kwargs,
+    ) -> None:
+        model_args = ModelArgs(
+            dim=32,
+            n_layers=2,
+            n_heads=4,
+            vocab_size=VOCAB_SIZE,
+            max_seq_len=24,
+            **kwargs,
+        )
+        tokenizer = SimpleNamespace(n_words=VOCAB_SIZE, eos_id=EOS_ID)
+        with patch.object(generation, "get_tokenizer", return_value=tokenizer):
+            super().__init__(
+                tokenizer_path="",
+                model_args=model_args,
+                prefill_chunk_size=prefill_chunk_size,
+            )
+        torch.manual_seed(seed)
+        self.model = Transformer(model_args).eval()
+
+    def forward(
+        self,
+        tokens: torch.Tensor,
+        input_pos: Optional[torch.Tensor] = None,
+    ) -> torch.Tensor:
+        with torch.no_grad():
+            return self.model.forward(tokens=tokens, input_pos=input_pos)
+
+
+PROMPTS = [[2, 3, 4, 5, 6], [7, 8], [9, 10, 11, 12, 13, 14, 15]]
+
+
+class GenerationTest(unittest.TestCase):
+    def greedy(self, runner: LlamaRunner, prompt) -> list:
+        return runner.generate(prompt, temperature=0)
+
+    def test_generate_batch_matches_generate(self):
+        for use_kv_cache in (True, False):
+            with self.subTest(use_kv_cache=use_kv_cache):
+                runner = TinyRunner(
+                    use_kv_cache=use_kv_cache,
+                    enable_dynamic_shape=True,
+                    max_batch_size=2,
+                )
+                expected = [self.greedy(runner, prompt) for prompt in PROMPTS]
+                # Three prompts of different lengths in two batches, the last
+                # of which is filled up with a copy of its prompt.
+                self.assertEqual(
+                    runner.generate_batch(PROMPTS, temperature=0), expected
+                )
+                self.assertTrue(any(expected))
+
+    def test_chunked_prefill_matches_prefill(self):
+        runner = TinyRunner(use_kv_cache=True, enable_dynamic_shape=True)
+        expected = [self.greedy(runner, prompt) for prompt in PROMPTS]
+        for prefill_chunk_size in (1, 2, 3):
+            with self.subTest(prefill_chunk_size=prefill_chunk_size):
+                runner.prefill_chunk_size = prefill_chunk_size
+                self.assertEqual(
+                    [self.greedy(runner, prompt) for prompt in PROMPTS], expected
+                )
+
+    def test_generate_speculative_matches_generate(self):
+        kwargs = {
+            "use_kv_cache": True,
+            "enable_dynamic_shape": True,
+            "max_batch_size": 1,
+        }
+        runner = TinyRunner(generate_full_logits=True, **kwargs)
+        drafts = {
+            # Proposes the same tokens as the runner, which all get accepted.
+            "same": TinyRunner(**kwargs),
+            # Proposes mostly other tokens.
+            "other": TinyRunner(seed=1, **kwargs),
+        }
+        for name, draft in drafts.items():
+            for num_draft_tokens in (1, 3):
+                with self.subTest(draft=name, num_draft_tokens=num_draft_tokens):
+                    for prompt in PROMPTS:
+                        self.assertEqual(
+                            runner.generate_speculative(
+                                prompt,
+                                draft,
+                                num_draft_tokens=num_draft_tokens,
+                                temperature=0,
+                            ),
+                            self.greedy(runner, prompt),
+                        )
+
+        # The draft that proposes the runner's tokens needs fewer steps.
+        steps = {}
+        for name, draft in drafts.items():
+            runner.generate_speculative(PROMPTS[0], draft, temperature=0)
+            steps[name] = runner.stats.verify_steps
+        self.assertLess(steps["same"], steps["other"])
+
+    def test_stops_at_first_token(self):
+        runner = TinyRunner(use_kv_cache=True, enable_dynamic_shape=True)
+        logits = torch.zeros(1, VOCAB_SIZE)
+        logits[0, EOS_ID] = 1.0
+        with patch.object(runner, "forward", return_value=logits):
+            # A stop token sampled right after the prompt ends the generation.
+            self.assertEqual(self.greedy(runner, PROMPTS[0]), [])
@@ -0,0 +1,197 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+import unittest
+from types import SimpleNamespace
+from typing import List, Optional, Sequence, Tuple
+from unittest.mock import MagicMock, patch
+
+import torch
+from executorch.examples.models.llama.llama_transformer import ModelArgs, Transformer
+from executorch.examples.models.llama.runner import generation
+from executorch.examples.models.llama.runner.generation import LlamaRunner
+from executorch.examples.models.llama.runner.native import (
+    mutable_buffer_spans,
+    NativeLlamaRunner,
+    PrefixCache,
+)
+from executorch.exir import to_edge
+from torch.export import export
+
+VOCAB_SIZE = 64
+EOS_ID = 1
+
+
+class FakeModule:
+    """
+    Stands in for an ExecuTorchModule by running an eager model, whose KV
+    caches are its planned buffers, and records the tokens it is fed.
+    """
+
+    def __init__(self, model: Transformer) -> None:
+        self.model = model
+        self.fed: List[List[List[int]]] = []
+
+    def forward(self, inputs: Tuple[torch.Tensor, ...]) -> List[torch.Tensor]:
+        tokens, input_pos = inputs
+        self.fed.append(tokens.tolist())
+        with torch.no_grad():
+            return [self.model.forward(tokens=tokens, input_pos=input_pos)]
+
+    def _caches(self) -> List[torch.Tensor]:
+        return [
+            buffer
+            for name, buffer in self.model.named_buffers()
+            if name.endswith(("k_cache", "v_cache"))
+        ]
+
+    def get_planned_buffers(
+        self, spans: Optional[Sequence[Tuple[int, int, int]]] = None
+    ) -> List[bytes]:
+        return [cache.numpy().tobytes() for cache in self._caches()]
+
+    def set_planned_buffers(
+        self,
+        contents: Sequence[bytes],
+        spans: Optional[Sequence[Tuple[int, int, int]]] = None,
+    ) -> None:
+        for cache, content in zip(self._caches(), contents):
+            cache.copy_(
+                torch.frombuffer(bytearray(content), dtype=cache.dtype).view(
+                    cache.shape
+                )
+            )
+
+
+class FakeNativeRunner(NativeLlamaRunner):
+    def __init__(self, prefix_cache_bytes: int = 0) -> None:
+        model_args = ModelArgs(
+            dim=32,
+            n_layers=2,
+            n_heads=4,
+            vocab_size=VOCAB_SIZE,
+            max_seq_len=24,
+            max_batch_size=1,
+            use_kv_cache=True,
+            enable_dynamic_shape=True,
+        )
+        tokenizer = SimpleNamespace(n_words=VOCAB_SIZE, eos_id=EOS_ID)
+        with patch.object(generation, "get_tokenizer", return_value=tokenizer):
+            LlamaRunner.__init__(self, tokenizer_path="", model_args=model_args)
+        torch.manual_seed(0)
+        self.model = FakeModule(Transformer(model_args).eval())
+        self.prefix_cache = (
+            PrefixCache(prefix_cache_bytes) if prefix_cache_bytes else None
+        )
+        self.mutable_buffer_spans = None
+
+
+class Caches(torch.nn.Module):
+    """Updates a k and v cache per layer, of the shapes of those of llama."""
+
+    def __init__(self, n_layers: int = 2) -> None:
+        super().__init__()
+        self.n_layers = n_layers
+        for i in range(n_layers):
+            self.register_buffer(f"k_cache_{i}", torch.zeros(1, 24, 4, 8))
+            self.register_buffer(f"v_cache_{i}", torch.zeros(1, 24, 4, 8))
+
+    def forward(self, x: torch.Tensor, input_pos: torch.Tensor) -> torch.Tensor:
+        for i in range(self.n_layers):
+            k_cache = getattr(self, f"k_cache_{i}")
+            v_cache = getattr(self, f"v_cache_{i}")
+            k_cache.index_copy_(1, input_pos, x)
+            v_cache.index_copy_(1, input_pos, x * 2)
+            x = x + k_cache[:, :1] + v_cache[:, :1]
+        return x
+
+
+class PrefixCacheTest(unittest.TestCase):
+    def snapshot(self, nbytes: int) -> MagicMock:
+        return MagicMock(return_value=[bytes(nbytes)])
+
+    def test_looks_up_longest_prefix(self):
+        cache = PrefixCache(max_bytes=100)
+        cache.store([[2, 3]], self.snapshot(8), torch.tensor([2.0]))
+        cache.store([[2, 3, 4]], self.snapshot(8), torch.tensor([3.0]))
+
+        length, _, logits = cache.lookup([[2, 3, 4, 5]])
+        self.assertEqual((length, logits.item()), (3, 3.0))
+        length, _, logits = cache.lookup([[2, 3, 5]])
+        self.assertEqual((length, logits.item()), (2, 2.0))
+        # Prefixes must match every row of the batch.
+        self.assertIsNone(cache.lookup([[2, 3, 4], [2, 4, 4]]))
+        self.assertIsNone(cache.lookup([[3, 4]]))
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_evicts_least_recently_used(self):
+        cache = PrefixCache(max_bytes=20)
+        cache.store([[2]], self.snapshot(8), torch.tensor([2.0]))
+        cache.store([[3]], self.snapshot(8), torch.tensor([3.0]))
+        self.assertIsNotNone(cache.lookup([[2]]))
+
+        cache.store([[4]], self.snapshot(8), torch.tensor([4.0]))
+        self.assertEqual(cache.nbytes, 16)
+        self.assertIsNone(cache.lookup([[3]]))
+        self.assertIsNotNone(cache.lookup([[2]]))
+        self.assertIsNotNone(cache.lookup([[4]]))
+
+    def test_only_snapshots_new_entries_that_fit(self):
+        cache = PrefixCache(max_bytes=20)
+        snapshot = self.snapshot(8)
+        cache.store([[2]], snapshot, torch.tensor([2.0]))
+        cache.store([[2]], snapshot, torch.tensor([2.0]))
+        self.assertEqual(snapshot.call_count, 1)
+
+        cache = PrefixCache(max_bytes=4)
+        snapshot = self.snapshot(8)
+        cache.store([[2]], snapshot, torch.tensor([2.0]))
+        cache.store([[3]], snapshot, torch.tensor([3.0]))
+        # Once a snapshot is known not to fit, no more are taken.
+        self.assertEqual(snapshot.call_count, 1)
+        self.assertEqual(cache.nbytes, 0)
+        self.assertIsNone(cache.lookup([[2]]))
+
+
+class NativeRunnerTest(unittest.TestCase):
+    def test_restores_prefix_and_feeds_suffix(self):
+        prompt = [2, 3, 4, 5, 6]
+        expected = FakeNativeRunner().generate(prompt, temperature=0)
+
+        runner = FakeNativeRunner(prefix_cache_bytes=1 << 20)
+        runner.cache_prefix(prompt[:3])
+        # Overwrites the KV caches, which the prefix cache then restores.
+        runner.generate([7, 8, 9], temperature=0)
+        runner.model.fed.clear()
+        self.assertEqual(runner.generate(prompt, temperature=0), expected)
+        # Only the tokens past the cached prefix are prefilled.
+        self.assertEqual(runner.model.fed[0], [prompt[3:]])
+
+        # Whole prompts are cached too, and need no prefill at all.
+        runner.generate([7, 8, 9], temperature=0)
+        runner.model.fed.clear()
+        self.assertEqual(runner.generate(prompt, temperature=0), expected)
+        self.assertEqual(runner.model.fed[0], [expected[:1]])
+        self.assertEqual(runner.prefix_cache.hits, 3)
+
+
+class MutableBufferSpansTest(unittest.TestCase):
+    def test_spans_of_caches(self):
+        program = to_edge(
+            export(Caches(), (torch.ones(1, 1, 4, 8), torch.tensor([0])))
+        ).to_executorch()
+        spans = mutable_buffer_spans(program.buffer)
+
+        cache_nbytes = 24 * 4 * 8 * 4
+        self.assertEqual(len(spans), 4)
+        self.assertEqual(len({offset for _, offset, _ in spans}), 4)
+        for index, _, nbytes in spans:
+            self.assertEqual((index, nbytes), (0, cache_nbytes))
+        # The activations, which include copies of the caches, are left out.
+        planned_nbytes = program.executorch_program.execution_plan[
+            0
+        ].non_const_buffer_sizes[1]
+        self.assertGreater(planned_nbytes, 4 * cache_nbytes)
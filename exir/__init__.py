@@ -15,6 +15,7 @@ from executorch.exir.capture import (
     ExecutorchBackendConfig,
 )
 from executorch.exir.emit import emit_program, EmitterOutput
+from executorch.exir.export_profiler import ExportProfiler
 from executorch.exir.program import (
     _to_edge,
     edge_to_executorch_passes,
@@ -50,6 +51,7 @@ __all__ = [
     "CaptureConfig",
     "EdgeCompileConfig",
     "ExecutorchBackendConfig",
+    "ExportProfiler",
     "Value",
     "ExirDynamoConfig",
     "load",
@@ -168,6 +168,57 @@ def _prepare_schema(
     )
 
 
+@dataclass
+class _SchemaAlignments:
+    # The "force_align" value of the constant tensor data field.
+    constant_tensor_alignment: int
+
+    # The "force_align" value of the inline delegate data field.
+    delegate_alignment: int
+
+    # An alignment value that can satisfy all "force_align" entries found in the
+    # schema files.
+    max_alignment: int
+
+
+def _get_schema_alignments(
+    constant_tensor_alignment: Optional[int] = None,
+    delegate_alignment: Optional[int] = None,
+) -> _SchemaAlignments:
+    """Returns the alignments that serializing with the program schema would
+    use, without writing the schema files anywhere.
+
+    Lets serializers that don't run `flatc` honor the same annotated
+    "force_align" values as _prepare_schema().
+    """
+    schemas = _ResourceFiles(["program.fbs", "scalar_type.fbs"])
+    schemas.patch_files(
+        lambda data: _patch_schema_alignment(
+            schema=data,
+            constant_tensor_alignment=constant_tensor_alignment,
+            delegate_alignment=delegate_alignment,
+        ),
+    )
+    get_alignments = _SchemaMaxAlignmentGetter()
+    schemas.patch_files(get_alignments)
+
+    def annotated_alignment(annotation: bytes) -> int:
+        regex = re.compile(rb"\(\s*force_align\s*:\s*(\d+)\s*\)")
+        for data in schemas._files.values():
+            for line in data.splitlines():
+                if annotation in line:
+                    match = regex.search(line)
+                    if match:
+                        return int(match.group(1))
+        raise ValueError(f"No force_align annotated with {annotation!r} in schema")
+
+    return _SchemaAlignments(
+        constant_tensor_alignment=annotated_alignment(b"@executorch-tensor-alignment"),
+        delegate_alignment=annotated_alignment(b"@executorch-delegate-alignment"),
+        max_alignment=get_alignments.max_alignment,
+    )
+
+
 @dataclass
 class _FlatbufferResult:
     # Serialized flatbuffer data.
@@ -0,0 +1,802 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-strict
+
+"""Converts between schema.Program and program.fbs flatbuffer data in-process.
+
+This is an alternative to round-tripping the Program through JSON and running
+`flatc` on it.
+
+Serialization walks the `executorch.exir.schema` dataclasses and writes them
+with the `flatbuffers` python Builder, copying each data blob into the output
+buffer exactly once.
+
+Deserialization parses the flatbuffer tables directly with `struct`, and
+returns data blobs as `memoryview`s into the input rather than copies.
+
+The layout of the output mirrors what `flatc` produces when parsing the JSON
+emitted by `_DataclassEncoder`, so the two paths generate identical bytes:
+- Child objects (strings, vectors, tables) are created in the order that their
+  fields appear in the dataclass, which is the order of the JSON keys.
+- Table fields are then written largest-scalar-first, and in reverse field
+  order within each size class, like `flatc` does for tables without the
+  `original_order` attribute.
+- Scalars equal to their schema default are omitted.
+- Empty vectors are not padded to their element or force_align alignment.
+
+Field slots and union type values below must be kept in sync with
+//executorch/schema/program.fbs.
+"""
+
+import struct
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from executorch.exir._serialize._flatbuffer import (
+    _FlatbufferResult,
+    _get_schema_alignments,
+    _SchemaAlignments,
+)
+from executorch.exir._serialize.flatbuffer_reader import (
+    BOOL,
+    FLOAT64,
+    INT32,
+    INT64,
+    INT8,
+    ScalarKind,
+    Table,
+    UINT32,
+    UINT64,
+    UINT8,
+)
+from executorch.exir.backend.compile_spec_schema import CompileSpec
+from executorch.exir.scalar_type import ScalarType
+from executorch.exir.schema import (
+    AllocationDetails,
+    BackendDelegate,
+    BackendDelegateDataReference,
+    BackendDelegateInlineData,
+    Bool,
+    BoolList,
+    Buffer,
+    Chain,
+    ContainerMetadata,
+    DataLocation,
+    DataSegment,
+    DelegateCall,
+    Double,
+    DoubleList,
+    EValue,
+    ExecutionPlan,
+    ExtraTensorInfo,
+    Frame,
+    FrameList,
+    FreeCall,
+    Instruction,
+    Int,
+    IntList,
+    JumpFalseCall,
+    KernelCall,
+    MoveCall,
+    Null,
+    Operator,
+    OptionalTensorList,
+    Program,
+    String,
+    SubsegmentOffsets,
+    Tensor,
+    TensorList,
+    TensorShapeDynamism,
+)
+
+try:
+    import flatbuffers
+
+    _HAS_FLATBUFFERS = True
+except ImportError:
+    _HAS_FLATBUFFERS = False
+
+# The file_identifier declared in program.fbs.
+_PROGRAM_FILE_IDENTIFIER: bytes = b"ET12"
+
+# Union type values from program.fbs. Zero is reserved for NONE.
+_KERNEL_TYPES: Tuple[type, ...] = (
+    Null,
+    Int,
+    Bool,
+    Double,
+    Tensor,
+    String,
+    IntList,
+    DoubleList,
+    BoolList,
+    TensorList,
+    OptionalTensorList,
+)
+_INSTRUCTION_ARGUMENTS: Tuple[type, ...] = (
+    KernelCall,
+    DelegateCall,
+    MoveCall,
+    JumpFalseCall,
+    FreeCall,
+)
+
+
+def is_available() -> bool:
+    """Returns True if the `flatbuffers` python package can be used."""
+    return _HAS_FLATBUFFERS
+
+
+# Size of a UOffsetT, the type used for references to other objects.
+_OFFSET_SIZE: int = 4
+
+
+class _TableWriter:
+    """Collects the fields of a table in the order that they were created,
+    then writes them in the order that `flatc` uses.
+    """
+
+    def __init__(self, builder: "flatbuffers.Builder", num_fields: int) -> None:
+        self._builder = builder
+        self._num_fields = num_fields
+        # (slot, size, writer) for each present field, in creation order.
+        self._fields: List[Tuple[int, int, Callable[[], None]]] = []
+
+    def add_scalar(
+        self,
+        slot: int,
+        kind: ScalarKind,
+        value: Optional[object],
+        default: object = 0,
+    ) -> None:
+        if value is None:
+            # Missing scalars are treated the same as their default value.
+            return
+        prepend = getattr(self._builder, kind.prepend_slot)
+        self._fields.append((slot, kind.size, lambda: prepend(slot, value, default)))
+
+    def add_offset(self, slot: int, offset: Optional[int]) -> None:
+        if offset is None:
+            return
+        builder = self._builder
+        self._fields.append(
+            (
+                slot,
+                _OFFSET_SIZE,
+                lambda: builder.PrependUOffsetTRelativeSlot(slot, offset, 0),
+            )
+        )
+
+    def finish(self) -> int:
+        builder = self._builder
+        builder.StartObject(self._num_fields)
+        # Like flatc, write the largest fields first to minimize padding, and
+        # go through the fields in reverse since the buffer is built back to
+        # front.
+        for size in (8, 4, 2, 1):
+            for _, field_size, write in reversed(self._fields):
+                if field_size == size:
+                    write()
+        return builder.EndObject()
+
+
+class _ProgramBuilder:
+    """Writes the tables of a schema.Program into a flatbuffers.Builder."""
+
+    def __init__(
+        self, builder: "flatbuffers.Builder", alignments: _SchemaAlignments
+    ) -> None:
+        self._builder = builder
+        self._alignments = alignments
+
+    # Primitive objects.
+
+    def _table(self, num_fields: int) -> _TableWriter:
+        return _TableWriter(self._builder, num_fields)
+
+    def _vector_data(
+        self, data: bytes, num_elems: int, elem_size: int, alignment: int = 1
+    ) -> int:
+        """Writes a vector whose elements are already packed in `data`."""
+        builder = self._builder
+        builder.Prep(_OFFSET_SIZE, len(data))
+        if len(data) > 0:
+            # Like the C++ builder, do not align the element data of empty
+            # vectors.
+            builder.Prep(max(alignment, elem_size), len(data))
+            builder.head = builder.head - len(data)
+            builder.Bytes[builder.head : builder.head + len(data)] = data
+        builder.PlaceUOffsetT(num_elems)
+        return builder.Offset()
+
+    def _scalar_vector(self, kind: ScalarKind, items: Sequence[object]) -> int:
+        data = struct.pack(f"<{len(items)}{kind.struct_format}", *items)
+        return self._vector_data(data, len(items), kind.size)
+
+    def _byte_vector(self, data: bytes, alignment: int = 1) -> int:
+        return self._vector_data(data, len(data), 1, alignment)
+
+    def _offset_vector(self, offsets: Sequence[int]) -> int:
+        builder = self._builder
+        builder.Prep(_OFFSET_SIZE, _OFFSET_SIZE * len(offsets))
+        for offset in reversed(offsets):
+            builder.PrependUOffsetTRelative(offset)
+        builder.PlaceUOffsetT(len(offsets))
+        return builder.Offset()
+
+    def _string(self, value: Optional[str]) -> Optional[int]:
+        if value is None:
+            return None
+        return self._builder.CreateString(value)
+
+    # Tables, in program.fbs order.
+
+    def _container_metadata(self, meta: ContainerMetadata) -> int:
+        t = self._table(2)
+        t.add_offset(0, self._string(meta.encoded_inp_str))
+        t.add_offset(1, self._string(meta.encoded_out_str))
+        return t.finish()
+
+    def _null(self, _: Null) -> int:
+        return self._table(0).finish()
+
+    def _allocation_details(self, details: AllocationDetails) -> int:
+        t = self._table(3)
+        t.add_scalar(0, UINT32, details.memory_id)
+        t.add_scalar(1, UINT32, details.memory_offset_low)
+        t.add_scalar(2, UINT32, details.memory_offset_high)
+        return t.finish()
+
+    def _extra_tensor_info(self, info: ExtraTensorInfo) -> int:
+        t = self._table(2)
+        t.add_scalar(0, UINT64, info.mutable_data_segments_idx)
+        t.add_offset(1, self._string(info.fully_qualified_name))
+        return t.finish()
+
+    def _tensor(self, tensor: Tensor) -> int:
+        t = self._table(10)
+        t.add_scalar(0, INT8, int(tensor.scalar_type))
+        t.add_scalar(1, INT32, tensor.storage_offset)
+        t.add_offset(2, self._scalar_vector(INT32, tensor.sizes))
+        t.add_offset(3, self._byte_vector(bytes(tensor.dim_order)))
+        t.add_scalar(4, BOOL, tensor.requires_grad, False)
+        t.add_scalar(7, INT8, tensor.layout)
+        t.add_scalar(5, UINT32, tensor.data_buffer_idx)
+        if tensor.allocation_info is not None:
+            t.add_offset(6, self._allocation_details(tensor.allocation_info))
+        t.add_scalar(8, INT8, int(tensor.shape_dynamism))
+        if tensor.extra_tensor_info is not None:
+            t.add_offset(9, self._extra_tensor_info(tensor.extra_tensor_info))
+        return t.finish()
+
+    def _int(self, value: Int) -> int:
+        t = self._table(1)
+        t.add_scalar(0, INT64, value.int_val)
+        return t.finish()
+
+    def _bool(self, value: Bool) -> int:
+        t = self._table(1)
+        t.add_scalar(0, BOOL, value.bool_val, False)
+        return t.finish()
+
+    def _double(self, value: Double) -> int:
+        t = self._table(1)
+        # Double stores +/-inf as strings; float() handles both cases.
+        t.add_scalar(0, FLOAT64, float(value.double_val), 0.0)
+        return t.finish()
+
+    def _string_table(self, value: String) -> int:
+        t = self._table(1)
+        t.add_offset(0, self._string(value.string_val))
+        return t.finish()
+
+    def _int_list(self, value: IntList) -> int:
+        t = self._table(1)
+        t.add_offset(0, self._scalar_vector(INT64, value.items))
+        return t.finish()
+
+    def _double_list(self, value: DoubleList) -> int:
+        t = self._table(1)
+        t.add_offset(0, self._scalar_vector(FLOAT64, value.items))
+        return t.finish()
+
+    def _bool_list(self, value: BoolList) -> int:
+        t = self._table(1)
+        t.add_offset(0, self._scalar_vector(BOOL, value.items))
+        return t.finish()
+
+    def _tensor_list(self, value: TensorList) -> int:
+        t = self._table(1)
+        t.add_offset(0, self._scalar_vector(INT32, value.items))
+        return t.finish()
+
+    def _optional_tensor_list(self, value: OptionalTensorList) -> int:
+        t = self._table(1)
+        t.add_offset(0, self._scalar_vector(INT32, value.items))
+        return t.finish()
+
+    def _kernel_type(self, value: object) -> int:
+        writers = {
+            Null: self._null,
+            Int: self._int,
+            Bool: self._bool,
+            Double: self._double,
+            Tensor: self._tensor,
+            String: self._string_table,
+            IntList: self._int_list,
+            DoubleList: self._double_list,
+            BoolList: self._bool_list,
+            TensorList: self._tensor_list,
+            OptionalTensorList: self._optional_tensor_list,
+        }
+        return writers[type(value)](value)
+
+    def _evalue(self, evalue: EValue) -> int:
+        t = self._table(2)
+        # The union value precedes its type field in the dataclass JSON.
+        t.add_offset(1, self._kernel_type(evalue.val))
+        t.add_scalar(0, UINT8, _KERNEL_TYPES.index(type(evalue.val)) + 1)
+        return t.finish()
+
+    def _operator(self, operator: Operator) -> int:
+        t = self._table(2)
+        t.add_offset(0, self._string(operator.name))
+        t.add_offset(1, self._string(operator.overload))
+        return t.finish()
+
+    def _kernel_call(self, call: KernelCall) -> int:
+        t = self._table(2)
+        t.add_scalar(0, INT32, call.op_index)
+        t.add_offset(1, self._scalar_vector(INT32, call.args))
+        return t.finish()
+
+    def _delegate_call(self, call: DelegateCall) -> int:
+        t = self._table(2)
+        t.add_scalar(0, INT32, call.delegate_index)
+        t.add_offset(1, self._scalar_vector(INT32, call.args))
+        return t.finish()
+
+    def _move_call(self, call: MoveCall) -> int:
+        t = self._table(2)
+        t.add_scalar(0, INT32, call.move_from)
+        t.add_scalar(1, INT32, call.move_to)
+        return t.finish()
+
+    def _jump_false_call(self, call: JumpFalseCall) -> int:
+        t = self._table(2)
+        t.add_scalar(0, INT32, call.cond_value_index)
+        t.add_scalar(1, INT32, call.destination_instruction)
+        return t.finish()
+
+    def _free_call(self, call: FreeCall) -> int:
+        t = self._table(1)
+        t.add_scalar(0, INT32, call.value_index)
+        return t.finish()
+
+    def _instruction(self, instruction: Instruction) -> int:
+        writers = {
+            KernelCall: self._kernel_call,
+            DelegateCall: self._delegate_call,
+            MoveCall: self._move_call,
+            JumpFalseCall: self._jump_false_call,
+            FreeCall: self._free_call,
+        }
+        args = instruction.instr_args
+        t = self._table(2)
+        t.add_offset(1, writers[type(args)](args))
+        t.add_scalar(0, UINT8, _INSTRUCTION_ARGUMENTS.index(type(args)) + 1)
+        return t.finish()
+
+    def _frame(self, frame: Frame) -> int:
+        t = self._table(4)
+        t.add_offset(0, self._string(frame.filename))
+        t.add_scalar(1, INT32, frame.lineno)
+        t.add_offset(2, self._string(frame.name))
+        t.add_offset(3, self._string(frame.context))
+        return t.finish()
+
+    def _frame_list(self, frame_list: FrameList) -> int:
+        t = self._table(1)
+        t.add_offset(0, self._offset_vector([self._frame(f) for f in frame_list.items]))
+        return t.finish()
+
+    def _backend_delegate_data_reference(
+        self, reference: BackendDelegateDataReference
+    ) -> int:
+        t = self._table(2)
+        t.add_scalar(0, INT8, int(reference.location))
+        t.add_scalar(1, UINT32, reference.index)
+        return t.finish()
+
+    def _compile_spec(self, compile_spec: CompileSpec) -> int:
+        t = self._table(2)
+        t.add_offset(0, self._string(compile_spec.key))
+        t.add_offset(1, self._byte_vector(compile_spec.value))
+        return t.finish()
+
+    def _backend_delegate(self, delegate: BackendDelegate) -> int:
+        t = self._table(3)
+        t.add_offset(0, self._string(delegate.id))
+        t.add_offset(1, self._backend_delegate_data_reference(delegate.processed))
+        t.add_offset(
+            2,
+            self._offset_vector(
+                [self._compile_spec(c) for c in delegate.compile_specs]
+            ),
+        )
+        return t.finish()
+
+    def _chain(self, chain: Chain) -> int:
+        t = self._table(4)
+        t.add_offset(0, self._scalar_vector(INT32, chain.inputs))
+        t.add_offset(1, self._scalar_vector(INT32, chain.outputs))
+        t.add_offset(
+            2, self._offset_vector([self._instruction(i) for i in chain.instructions])
+        )
+        if chain.stacktrace is not None:
+            t.add_offset(
+                3,
+                self._offset_vector([self._frame_list(f) for f in chain.stacktrace]),
+            )
+        return t.finish()
+
+    def _execution_plan(self, plan: ExecutionPlan) -> int:
+        t = self._table(9)
+        t.add_offset(0, self._string(plan.name))
+        t.add_offset(1, self._container_metadata(plan.container_meta_type))
+        t.add_offset(2, self._offset_vector([self._evalue(v) for v in plan.values]))
+        t.add_offset(3, self._scalar_vector(INT32, plan.inputs))
+        t.add_offset(4, self._scalar_vector(INT32, plan.outputs))
+        t.add_offset(5, self._offset_vector([self._chain(c) for c in plan.chains]))
+        t.add_offset(
+            6, self._offset_vector([self._operator(o) for o in plan.operators])
+        )
+        t.add_offset(
+            7, self._offset_vector([self._backend_delegate(d) for d in plan.delegates])
+        )
+        t.add_offset(8, self._scalar_vector(INT64, plan.non_const_buffer_sizes))
+        return t.finish()
+
+    def _buffer(self, buffer: Buffer) -> int:
+        t = self._table(1)
+        t.add_offset(
+            0,
+            self._byte_vector(
+                buffer.storage, self._alignments.constant_tensor_alignment
+            ),
+        )
+        return t.finish()
+
+    def _backend_delegate_inline_data(self, data: BackendDelegateInlineData) -> int:
+        t = self._table(1)
+        t.add_offset(
+            0, self._byte_vector(data.data, self._alignments.delegate_alignment)
+        )
+        return t.finish()
+
+    def _data_segment(self, segment: DataSegment) -> int:
+        t = self._table(2)
+        t.add_scalar(0, UINT64, segment.offset)
+        t.add_scalar(1, UINT64, segment.size)
+        return t.finish()
+
+    def _subsegment_offsets(self, offsets: SubsegmentOffsets) -> int:
+        t = self._table(2)
+        t.add_scalar(0, UINT32, offsets.segment_index)
+        t.add_offset(1, self._scalar_vector(UINT64, offsets.offsets))
+        return t.finish()
+
+    def program(self, program: Program) -> int:
+        t = self._table(7)
+        t.add_scalar(0, UINT32, program.version)
+        t.add_offset(
+            1,
+            self._offset_vector(
+                [self._execution_plan(p) for p in program.execution_plan]
+            ),
+        )
+        t.add_offset(
+            2, self._offset_vector([self._buffer(b) for b in program.constant_buffer])
+        )
+        t.add_offset(
+            3,
+            self._offset_vector(
+                [
+                    self._backend_delegate_inline_data(d)
+                    for d in program.backend_delegate_data
+                ]
+            ),
+        )
+        t.add_offset(
+            4, self._offset_vector([self._data_segment(s) for s in program.segments])
+        )
+        t.add_offset(5, self._subsegment_offsets(program.constant_segment))
+        if program.mutable_data_segments is not None:
+            t.add_offset(
+                6,
+                self._offset_vector(
+                    [self._subsegment_offsets(s) for s in program.mutable_data_segments]
+                ),
+            )
+        return t.finish()
+
+
+def _estimate_size(program: Program) -> int:
+    """Returns a lower bound on the serialized size of the program, used to
+    avoid repeatedly growing the builder's buffer while copying large blobs.
+    """
+    size = 1024
+    size += sum(len(b.storage) for b in program.constant_buffer)
+    size += sum(len(d.data) for d in program.backend_delegate_data)
+    return size
+
+
+def _program_to_flatbuffer(
+    program: Program,
+    *,
+    constant_tensor_alignment: Optional[int] = None,
+    delegate_alignment: Optional[int] = None,
+) -> _FlatbufferResult:
+    """Converts a Program into binary flatbuffer data without invoking `flatc`.
+
+    Args:
+        program: The Program to convert. Not modified.
+        constant_tensor_alignment: If provided, the alignment to use for tensor
+            data embedded in the output flatbuffer data. If not provided, uses
+            the alignment in the schema.
+        delegate_alignment: If provided, the alignment to use for delegate
+            data embedded in the output flatbuffer data. If not provided, uses
+            the alignment in the schema.
+
+    Returns: The flatbuffer data and associated metadata.
+    """
+    if not _HAS_FLATBUFFERS:
+        raise RuntimeError(
+            "The flatbuffers python package is required to serialize without flatc"
+        )
+    alignments = _get_schema_alignments(
+        constant_tensor_alignment=constant_tensor_alignment,
+        delegate_alignment=delegate_alignment,
+    )
+    builder = flatbuffers.Builder(_estimate_size(program))
+    root = _ProgramBuilder(builder, alignments).program(program)
+    builder.Finish(root, file_identifier=_PROGRAM_FILE_IDENTIFIER)
+    return _FlatbufferResult(
+        data=bytes(builder.Output()), max_alignment=alignments.max_alignment
+    )
+
+
+class _ProgramReader:
+    """Reads the tables of program.fbs flatbuffer data into a schema.Program.
+
+    Missing fields get the same values that `flatc --defaults-json` would
+    produce for them; missing vectors and strings become empty unless the
+    dataclass field is Optional.
+    """
+
+    def _container_metadata(self, t: Table) -> ContainerMetadata:
+        return ContainerMetadata(
+            encoded_inp_str=t.string(0) or "",
+            encoded_out_str=t.string(1) or "",
+        )
+
+    def _allocation_details(self, t: Table) -> AllocationDetails:
+        return AllocationDetails(
+            memory_id=t.scalar(0, UINT32),
+            memory_offset_low=t.scalar(1, UINT32),
+            memory_offset_high=t.scalar(2, UINT32),
+        )
+
+    def _extra_tensor_info(self, t: Table) -> ExtraTensorInfo:
+        return ExtraTensorInfo(
+            mutable_data_segments_idx=t.scalar(0, UINT64),
+            fully_qualified_name=t.string(1),
+        )
+
+    def _tensor(self, t: Table) -> Tensor:
+        allocation_info = t.table(6)
+        extra_tensor_info = t.table(9)
+        return Tensor(
+            scalar_type=ScalarType(t.scalar(0, INT8)),
+            storage_offset=t.scalar(1, INT32),
+            sizes=t.scalar_vector(2, INT32) or [],
+            # pyre-ignore[6]: dim_order is declared as List[bytes] but holds ints.
+            dim_order=t.scalar_vector(3, UINT8) or [],
+            requires_grad=t.scalar(4, BOOL, False),
+            layout=t.scalar(7, INT8),
+            data_buffer_idx=t.scalar(5, UINT32),
+            allocation_info=(
+                None
+                if allocation_info is None
+                else self._allocation_details(allocation_info)
+            ),
+            shape_dynamism=TensorShapeDynamism(t.scalar(8, INT8)),
+            extra_tensor_info=(
+                None
+                if extra_tensor_info is None
+                else self._extra_tensor_info(extra_tensor_info)
+            ),
+        )
+
+    def _kernel_type(self, type_value: int, t: Table) -> Any:
+        if type_value == 0 or type_value > len(_KERNEL_TYPES):
+            raise ValueError(f"Unknown KernelTypes union type {type_value}")
+        cls = _KERNEL_TYPES[type_value - 1]
+        if cls is Null:
+            return Null()
+        if cls is Int:
+            return Int(int_val=t.scalar(0, INT64))
+        if cls is Bool:
+            return Bool(bool_val=t.scalar(0, BOOL, False))
+        if cls is Double:
+            return Double(double_val=t.scalar(0, FLOAT64, 0.0))
+        if cls is Tensor:
+            return self._tensor(t)
+        if cls is String:
+            return String(string_val=t.string(0) or "")
+        if cls is IntList:
+            return IntList(items=t.scalar_vector(0, INT64) or [])
+        if cls is DoubleList:
+            return DoubleList(items=t.scalar_vector(0, FLOAT64) or [])
+        if cls is BoolList:
+            return BoolList(items=t.scalar_vector(0, BOOL) or [])
+        if cls is TensorList:
+            return TensorList(items=t.scalar_vector(0, INT32) or [])
+        assert cls is OptionalTensorList
+        return OptionalTensorList(items=t.scalar_vector(0, INT32) or [])
+
+    def _evalue(self, t: Table) -> EValue:
+        val = t.table(1)
+        if val is None:
+            raise ValueError("EValue is missing its val field")
+        return EValue(val=self._kernel_type(t.scalar(0, UINT8), val))
+
+    def _operator(self, t: Table) -> Operator:
+        return Operator(name=t.string(0) or "", overload=t.string(1) or "")
+
+    def _instruction(self, t: Table) -> Instruction:
+        type_value = t.scalar(0, UINT8)
+        a = t.table(1)
+        if type_value == 0 or type_value > len(_INSTRUCTION_ARGUMENTS) or a is None:
+            raise ValueError(f"Bad InstructionArguments union type {type_value}")
+        cls = _INSTRUCTION_ARGUMENTS[type_value - 1]
+        if cls is KernelCall:
+            args = KernelCall(
+                op_index=a.scalar(0, INT32), args=a.scalar_vector(1, INT32) or []
+            )
+        elif cls is DelegateCall:
+            args = DelegateCall(
+                delegate_index=a.scalar(0, INT32),
+                args=a.scalar_vector(1, INT32) or [],
+            )
+        elif cls is MoveCall:
+            args = MoveCall(move_from=a.scalar(0, INT32), move_to=a.scalar(1, INT32))
+        elif cls is JumpFalseCall:
+            args = JumpFalseCall(
+                cond_value_index=a.scalar(0, INT32),
+                destination_instruction=a.scalar(1, INT32),
+            )
+        else:
+            assert cls is FreeCall
+            args = FreeCall(value_index=a.scalar(0, INT32))
+        return Instruction(instr_args=args)
+
+    def _frame(self, t: Table) -> Frame:
+        return Frame(
+            filename=t.string(0) or "",
+            lineno=t.scalar(1, INT32),
+            name=t.string(2) or "",
+            context=t.string(3) or "",
+        )
+
+    def _frame_list(self, t: Table) -> FrameList:
+        return FrameList(items=[self._frame(f) for f in t.table_vector(0) or []])
+
+    def _backend_delegate(self, t: Table) -> BackendDelegate:
+        processed = t.table(1)
+        if processed is None:
+            raise ValueError("BackendDelegate is missing its processed field")
+        return BackendDelegate(
+            id=t.string(0) or "",
+            processed=BackendDelegateDataReference(
+                location=DataLocation(processed.scalar(0, INT8)),
+                index=processed.scalar(1, UINT32),
+            ),
+            compile_specs=[
+                CompileSpec(key=c.string(0) or "", value=c.byte_vector(1) or b"")
+                for c in t.table_vector(2) or []
+            ],
+        )
+
+    def _chain(self, t: Table) -> Chain:
+        stacktrace = t.table_vector(3)
+        return Chain(
+            inputs=t.scalar_vector(0, INT32) or [],
+            outputs=t.scalar_vector(1, INT32) or [],
+            instructions=[self._instruction(i) for i in t.table_vector(2) or []],
+            stacktrace=(
+                None
+                if stacktrace is None
+                else [self._frame_list(f) for f in stacktrace]
+            ),
+        )
+
+    def _execution_plan(self, t: Table) -> ExecutionPlan:
+        meta = t.table(1)
+        return ExecutionPlan(
+            name=t.string(0) or "",
+            container_meta_type=(
+                ContainerMetadata(encoded_inp_str="", encoded_out_str="")
+                if meta is None
+                else self._container_metadata(meta)
+            ),
+            values=[self._evalue(v) for v in t.table_vector(2) or []],
+            inputs=t.scalar_vector(3, INT32) or [],
+            outputs=t.scalar_vector(4, INT32) or [],
+            chains=[self._chain(c) for c in t.table_vector(5) or []],
+            operators=[self._operator(o) for o in t.table_vector(6) or []],
+            delegates=[self._backend_delegate(d) for d in t.table_vector(7) or []],
+            non_const_buffer_sizes=t.scalar_vector(8, INT64) or [],
+        )
+
+    def _subsegment_offsets(self, t: Table) -> SubsegmentOffsets:
+        return SubsegmentOffsets(
+            segment_index=t.scalar(0, UINT32),
+            offsets=t.scalar_vector(1, UINT64) or [],
+        )
+
+    def program(self, t: Table) -> Program:
+        constant_segment = t.table(5)
+        mutable_data_segments = t.table_vector(6)
+        return Program(
+            version=t.scalar(0, UINT32),
+            execution_plan=[self._execution_plan(p) for p in t.table_vector(1) or []],
+            constant_buffer=[
+                Buffer(storage=b.byte_vector(0) or b"") for b in t.table_vector(2) or []
+            ],
+            backend_delegate_data=[
+                BackendDelegateInlineData(data=d.byte_vector(0) or b"")
+                for d in t.table_vector(3) or []
+            ],
+            segments=[
+                DataSegment(offset=s.scalar(0, UINT64), size=s.scalar(1, UINT64))
+                for s in t.table_vector(4) or []
+            ],
+            constant_segment=(
+                SubsegmentOffsets(segment_index=0, offsets=[])
+                if constant_segment is None
+                else self._subsegment_offsets(constant_segment)
+            ),
+            mutable_data_segments=(
+                None
+                if mutable_data_segments is None
+                else [self._subsegment_offsets(s) for s in mutable_data_segments]
+            ),
+        )
+
+
+def _flatbuffer_to_program(program_flatbuffer: memoryview) -> Program:
+    """Parses program.fbs flatbuffer data into a Program without invoking
+    `flatc`.
+
+    Args:
+        program_flatbuffer: The flatbuffer data to parse. May be followed by
+            other data, like segments; only the flatbuffer tables are read.
+
+    Returns:
+        The deserialized Program. Its data blobs (Buffer.storage,
+        BackendDelegateInlineData.data and CompileSpec.value) are
+        `memoryview`s into `program_flatbuffer`, so no blob data is copied.
+    Raises:
+        ValueError: If the data does not look like a program flatbuffer.
+    """
+    if len(program_flatbuffer) < 8:
+        raise ValueError(f"Flatbuffer data length {len(program_flatbuffer)} < 8")
+    magic = bytes(program_flatbuffer[4:6])
+    if magic != _PROGRAM_FILE_IDENTIFIER[:2]:
+        raise ValueError(f"Flatbuffer data magic bytes {magic!r} do not start with ET")
+    root = struct.unpack_from("<I", program_flatbuffer, 0)[0]
+    return _ProgramReader().program(Table(program_flatbuffer, root))
@@ -8,11 +8,14 @@
 
 import copy
 import json
+import mmap
+import os
 import re
 
 from dataclasses import dataclass
-from typing import ClassVar, List, Literal, Optional, Tuple
+from typing import Any, ClassVar, Dict, List, Literal, Optional, Tuple, Union
 
+from executorch.exir._serialize import _flatbuffer_program
 from executorch.exir._serialize._cord import Cord
 from executorch.exir._serialize._dataclass import _DataclassEncoder, _json_to_dataclass
 from executorch.exir._serialize._flatbuffer import (
@@ -38,12 +41,48 @@ from executorch.exir.tensor import ALIGNMENT
 # endian.
 _HEADER_BYTEORDER: Literal["little"] = "little"
 
+# If this environment variable is set to true, serialize and deserialize
+# programs by converting them to and from JSON with `flatc`, instead of handling
+# the flatbuffer data in-process.
+_SERIALIZE_WITH_FLATC_ENV: str = "ET_EXIR_SERIALIZE_WITH_FLATC"
+
 
 def _program_to_json(program: Program) -> str:
     """Returns the JSON representation of the given Program."""
     return json.dumps(program, cls=_DataclassEncoder)
 
 
+def _use_flatc() -> bool:
+    """Returns True if programs should be converted using JSON and `flatc`."""
+    return os.getenv(_SERIALIZE_WITH_FLATC_ENV, "").strip() not in {"", "0"}
+
+
+def _program_to_flatbuffer(
+    program: Program,
+    *,
+    constant_tensor_alignment: Optional[int] = None,
+    delegate_alignment: Optional[int] = None,
+) -> _FlatbufferResult:
+    """Returns the flatbuffer data for the given Program.
+
+    Builds the data in-process when possible. Falls back to converting the
+    Program to JSON and compiling it with `flatc` when the `flatbuffers`
+    package is not available, or when _SERIALIZE_WITH_FLATC_ENV is set. Both
+    paths produce identical bytes.
+    """
+    if _use_flatc() or not _flatbuffer_program.is_available():
+        return _program_json_to_flatbuffer(
+            _program_to_json(program),
+            constant_tensor_alignment=constant_tensor_alignment,
+            delegate_alignment=delegate_alignment,
+        )
+    return _flatbuffer_program._program_to_flatbuffer(
+        program,
+        constant_tensor_alignment=constant_tensor_alignment,
+        delegate_alignment=delegate_alignment,
+    )
+
+
 def _json_to_program(program_json: bytes) -> Program:
     """Returns a Program deserialized from the given JSON string."""
     # construct program class recursively from dict
@@ -65,9 +104,12 @@ def _aligned_size(input_size: int, alignment: int) -> int:
 
 def _insert_flatbuffer_header(
     flatbuffer_data: bytes, magic_regex: str, header_data: bytes
-) -> bytes:
+) -> Cord:
     """Inserts a header just after the magic string of the provided flatbuffer data.
 
+    The bulk of flatbuffer_data is referenced by the returned Cord rather than
+    copied, so it must not be modified while the Cord is in use.
+
     Args:
         flatbuffer_data: The input data to modify.
         magic_regex: A regex pattern that must match the magic file_identifier
@@ -77,7 +119,7 @@ def _insert_flatbuffer_header(
             guaranteed that its length is a power of 2 >= the largest
             force_align value in the schema.
     Returns:
-        The modified flatbuffer_data with header_data inserted.
+        A Cord containing flatbuffer_data with header_data inserted.
     Raises:
         ValueError: If flatbuffer_data is too short to be valid.
         ValueError: If the magic bytes of flatbuffer_data does not match
@@ -97,24 +139,24 @@ def _insert_flatbuffer_header(
             + f"does not match pattern /{magic_regex}/"
         )
 
-    # Avoid a potentially big allocation/copy if there's nothing to do.
     if len(header_data) == 0:
-        return flatbuffer_data
+        return Cord(flatbuffer_data)
 
     # We will need to adjust the root object offset after inserting the header.
     root_offset = int.from_bytes(flatbuffer_data[0:4], byteorder=_HEADER_BYTEORDER)
 
-    return (
+    result = Cord(
         # New root offset.
         (root_offset + len(header_data)).to_bytes(4, byteorder=_HEADER_BYTEORDER)
         # Existing magic bytes.
         + flatbuffer_data[4:8]
         # Provided header + padding.
         + header_data
-        # Remainder of the file. Note that this can be O(10MB to 100MB), so it
-        # can trigger a large allocation + copy.
-        + flatbuffer_data[8:]
     )
+    # Remainder of the file. Note that this can be O(10MB to 100MB), so
+    # reference it instead of copying it.
+    result.append(memoryview(flatbuffer_data)[8:])
+    return result
 
 
 @dataclass
@@ -233,7 +275,10 @@ def _pad_to(data: bytes, length: int) -> bytes:
 def _get_extended_header(program_data: bytes) -> Optional[_ExtendedHeader]:
     """Returns the extended header of the program data, if present and valid."""
     try:
-        eh = _ExtendedHeader.from_bytes(program_data[8:])
+        # Only slice out the header, to avoid copying the rest of the data.
+        eh = _ExtendedHeader.from_bytes(
+            program_data[8 : 8 + _ExtendedHeader.EXPECTED_LENGTH]
+        )
         if eh.is_valid():
             return eh
     except ValueError:
@@ -342,6 +387,23 @@ def _extract_constant_segment(
     return constant_segment_data, constant_segment_offsets
 
 
+def _copy_program_without_data(program: Program) -> Program:
+    """Returns a deep copy of the program that shares its data blobs.
+
+    Constant buffers and inline delegate data can be as large as the model
+    itself, and serialization never modifies them. `bytes` blobs are never
+    copied by deepcopy, but memoryview blobs (e.g., from a zero-copy
+    deserialize_pte_binary()) would be; this also lets the output Cord refer to
+    the original memory.
+    """
+    memo: Dict[int, Any] = {}
+    for buffer in program.constant_buffer:
+        memo[id(buffer.storage)] = buffer.storage
+    for inline in program.backend_delegate_data:
+        memo[id(inline.data)] = inline.data
+    return copy.deepcopy(program, memo)
+
+
 def serialize_pte_binary(
     program: Program,
     *,
@@ -376,10 +438,9 @@ def serialize_pte_binary(
     if constant_tensor_alignment is None:
         constant_tensor_alignment = ALIGNMENT
 
-    # Don't modify the original program.
-    # TODO(T144120904): Could avoid yet more huge copies with a more shallow
-    # copy, reusing the actual data blobs.
-    program = copy.deepcopy(program)
+    # Don't modify the original program, but reuse its data blobs instead of
+    # copying them: the output Cord references them directly.
+    program = _copy_program_without_data(program)
 
     # Store extracted segment data; this may be constant data or delegate data.
     segments: List[Cord] = []
@@ -442,8 +503,8 @@ def serialize_pte_binary(
         segments_data.append(data)
 
     # Convert to a standard flatbuffer binary.
-    result: _FlatbufferResult = _program_json_to_flatbuffer(
-        _program_to_json(program),
+    result: _FlatbufferResult = _program_to_flatbuffer(
+        program,
         constant_tensor_alignment=constant_tensor_alignment,
         delegate_alignment=delegate_alignment,
     )
@@ -473,28 +534,24 @@ def serialize_pte_binary(
     ).to_bytes()
     header_data = _pad_to(header_data, padded_header_length)
 
+    # Double-check that the extended header has the right contents.
+    eh = _ExtendedHeader.from_bytes(header_data)
+    assert eh.is_valid()
+    assert eh.program_size == program_size
+    assert eh.segment_base_offset == segment_base_offset
+
     # Insert the header into the flatbuffer data.
-    program_data: bytes = _insert_flatbuffer_header(
+    program_data: Cord = _insert_flatbuffer_header(
         flatbuffer_data=result.data,
         magic_regex=r"ET[0-9a-zA-Z][0-9a-zA-Z]",
         header_data=header_data,
     )
     assert len(program_data) == program_size
 
-    # Potentially large. Try to free it as soon as we can.
-    del result.data
-
-    # Double-check that the extended header is in the right place and has the
-    # right contents.
-    eh = _get_extended_header(program_data)
-    assert eh is not None
-    assert eh.program_size == program_size
-    assert eh.segment_base_offset == segment_base_offset
-
     # Construct the final pte file containing:
     # - program data; written to offset 0.
     # - segments data (optional); aligned to segment_alignment.
-    pte_data = Cord(program_data)
+    pte_data = program_data
     if len(segments_data) > 0:
         padding_length = _padding_required(len(pte_data), segment_alignment)
         pte_data.append(b"\x00" * padding_length)
@@ -576,27 +633,83 @@ def _restore_segments(program: Program, segment_data: bytes) -> Program:
     return program
 
 
-def deserialize_pte_binary(program_data: bytes) -> Program:
-    """Returns a Program deserialized from the given runtime binary data."""
-    program_size = len(program_data)
+def _materialize_blobs(program: Program) -> None:
+    """Replaces any memoryview data blobs in the program with bytes copies.
+
+    Modifies the program in-place.
+    """
+    for buffer in program.constant_buffer:
+        if isinstance(buffer.storage, memoryview):
+            buffer.storage = bytes(buffer.storage)
+    for inline in program.backend_delegate_data:
+        if isinstance(inline.data, memoryview):
+            inline.data = bytes(inline.data)
+    for plan in program.execution_plan:
+        for delegate in plan.delegates:
+            for compile_spec in delegate.compile_specs:
+                if isinstance(compile_spec.value, memoryview):
+                    compile_spec.value = bytes(compile_spec.value)
+
+
+def deserialize_pte_binary(
+    program_data: Union[bytes, bytearray, memoryview, mmap.mmap],
+) -> Program:
+    """Returns a Program deserialized from the given runtime binary data.
+
+    Args:
+        program_data: The serialized program. If this is a `bytes` or
+            `bytearray`, the data blobs of the returned Program are `bytes`
+            copies. Otherwise, for a `memoryview` or `mmap`, the data blobs
+            are `memoryview`s into `program_data` and no blob data is copied;
+            callers only pay for the parts that they read.
+    Returns:
+        The deserialized Program. Constant data and delegate data that were
+        stored in segments are moved back into the Program, as if it had been
+        created without segments.
+    """
+    zero_copy = not isinstance(program_data, (bytes, bytearray))
+    data = memoryview(program_data)
+
+    program_size = len(data)
     segment_base_offset = 0
 
     # Look for an extended header to see if segments follow the flatbuffer
     # data.
-    eh: Optional[_ExtendedHeader] = _get_extended_header(program_data)
+    eh: Optional[_ExtendedHeader] = _get_extended_header(data)
     if eh and eh.is_valid():
         program_size = eh.program_size
         segment_base_offset = eh.segment_base_offset
 
     # Parse the flatbuffer data.
-    program: Program = _json_to_program(
-        _program_flatbuffer_to_json(program_data[:program_size])
-    )
+    if _use_flatc():
+        program: Program = _json_to_program(
+            _program_flatbuffer_to_json(bytes(data[:program_size]))
+        )
+    else:
+        program = _flatbuffer_program._flatbuffer_to_program(data[:program_size])
 
     if segment_base_offset != 0:
         # Move segment data back into the Program.
         program = _restore_segments(
-            program=program, segment_data=program_data[segment_base_offset:]
+            program=program, segment_data=data[segment_base_offset:]
         )
 
+    if not zero_copy:
+        _materialize_blobs(program)
     return program
+
+
+def deserialize_pte_file(path: str) -> Program:
+    """Returns a Program deserialized from the .pte file at `path`.
+
+    The file is memory-mapped rather than read, and the data blobs of the
+    returned Program are `memoryview`s into the mapping. Only the pages that
+    callers touch are read from disk, so inspecting a large program does not
+    require holding the whole file in memory. The mapping stays open for as
+    long as any of those views are alive.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError(f"Cannot deserialize empty file {path}")
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return deserialize_pte_binary(mapping)
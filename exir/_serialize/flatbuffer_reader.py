@@ -0,0 +1,113 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-strict
+
+"""Reads the tables of flatbuffer data in-process, with `struct`.
+
+This is independent of any schema: readers of a schema, like the ones of
+program.fbs in exir and of etdump_schema_flatcc.fbs in devtools, walk the
+tables by field slot and build their dataclasses from them. It doesn't depend
+on the `flatbuffers` python package.
+"""
+
+import struct
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+
+class ScalarKind(NamedTuple):
+    """How a scalar table field or vector element is stored."""
+
+    size: int
+    struct_format: str
+    # Name of the flatbuffers.Builder method that writes a scalar slot.
+    prepend_slot: str
+
+
+BOOL = ScalarKind(1, "?", "PrependBoolSlot")
+INT8 = ScalarKind(1, "b", "PrependInt8Slot")
+UINT8 = ScalarKind(1, "B", "PrependUint8Slot")
+INT32 = ScalarKind(4, "i", "PrependInt32Slot")
+UINT32 = ScalarKind(4, "I", "PrependUint32Slot")
+INT64 = ScalarKind(8, "q", "PrependInt64Slot")
+UINT64 = ScalarKind(8, "Q", "PrependUint64Slot")
+FLOAT32 = ScalarKind(4, "f", "PrependFloat32Slot")
+FLOAT64 = ScalarKind(8, "d", "PrependFloat64Slot")
+
+
+class Table:
+    """A view of one table in flatbuffer data."""
+
+    def __init__(self, data: memoryview, pos: int) -> None:
+        self._data = data
+        self._pos = pos
+        self._vtable: int = pos - struct.unpack_from("<i", data, pos)[0]
+        self._vtable_size: int = struct.unpack_from("<H", data, self._vtable)[0]
+
+    def _field_pos(self, slot: int) -> Optional[int]:
+        """Returns the position of the field's data, or None if not present."""
+        entry = 4 + 2 * slot
+        if entry >= self._vtable_size:
+            return None
+        offset = struct.unpack_from("<H", self._data, self._vtable + entry)[0]
+        return self._pos + offset if offset else None
+
+    def _deref(self, slot: int) -> Optional[int]:
+        """Returns the position of the object that the field refers to."""
+        pos = self._field_pos(slot)
+        if pos is None:
+            return None
+        return pos + struct.unpack_from("<I", self._data, pos)[0]
+
+    def scalar(self, slot: int, kind: ScalarKind, default: Any = 0) -> Any:
+        pos = self._field_pos(slot)
+        if pos is None:
+            return default
+        return struct.unpack_from("<" + kind.struct_format, self._data, pos)[0]
+
+    def table(self, slot: int) -> Optional["Table"]:
+        pos = self._deref(slot)
+        return None if pos is None else Table(self._data, pos)
+
+    def string(self, slot: int) -> Optional[str]:
+        data = self.byte_vector(slot)
+        return None if data is None else str(data, "utf-8")
+
+    def _vector(self, slot: int) -> Optional[Tuple[int, int]]:
+        """Returns the position of the first element and the element count."""
+        pos = self._deref(slot)
+        if pos is None:
+            return None
+        return pos + 4, struct.unpack_from("<I", self._data, pos)[0]
+
+    def byte_vector(self, slot: int) -> Optional[memoryview]:
+        vector = self._vector(slot)
+        if vector is None:
+            return None
+        start, length = vector
+        return self._data[start : start + length]
+
+    def scalar_vector(self, slot: int, kind: ScalarKind) -> Optional[List[Any]]:
+        vector = self._vector(slot)
+        if vector is None:
+            return None
+        start, length = vector
+        return list(
+            struct.unpack_from(f"<{length}{kind.struct_format}", self._data, start)
+        )
+
+    def table_vector(self, slot: int) -> Optional[List["Table"]]:
+        vector = self._vector(slot)
+        if vector is None:
+            return None
+        start, length = vector
+        tables = []
+        for i in range(length):
+            pos = start + 4 * i
+            tables.append(
+                Table(self._data, pos + struct.unpack_from("<I", self._data, pos)[0])
+            )
+        return tables
@@ -53,6 +53,21 @@ class TestCord(unittest.TestCase):
         self.assertEqual(id(cord2._buffers[1]), id(cord._buffers[0]))
         self.assertEqual(id(cord2._buffers[2]), id(cord._buffers[1]))
 
+    def test_cord_append_memoryview(self) -> None:
+        data = bytearray(b"World")
+        cord = Cord(b"Hello")
+        cord.append(memoryview(data))
+        self.assertEqual(10, len(cord))
+        self.assertEqual(b"HelloWorld", bytes(cord))
+
+        # Multi-byte element views are counted in bytes.
+        cord.append(memoryview(b"\x00" * 8).cast("i"))
+        self.assertEqual(18, len(cord))
+
+        # The memoryview references the original data instead of copying it.
+        data[0:1] = b"w"
+        self.assertEqual(b"Helloworld" + b"\x00" * 8, bytes(cord))
+
     def test_cord_write_to_file(self) -> None:
         cord = Cord()
         cord.append(b"Hello")
@@ -0,0 +1,233 @@
+#!/usr/bin/env fbpython
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-unsafe
+
+import typing
+import unittest
+from typing import List, Optional
+
+from executorch.exir._serialize._flatbuffer import (
+    _FlatbufferResult,
+    _get_schema_alignments,
+    _program_flatbuffer_to_json,
+    _program_json_to_flatbuffer,
+)
+from executorch.exir._serialize._flatbuffer_program import (
+    _flatbuffer_to_program,
+    _program_to_flatbuffer,
+)
+from executorch.exir._serialize._program import _json_to_program, _program_to_json
+from executorch.exir.backend.compile_spec_schema import CompileSpec
+from executorch.exir.scalar_type import ScalarType
+from executorch.exir.schema import (
+    BackendDelegate,
+    BackendDelegateDataReference,
+    BackendDelegateInlineData,
+    Bool,
+    BoolList,
+    Buffer,
+    DataLocation,
+    DataSegment,
+    DelegateCall,
+    Double,
+    DoubleList,
+    EValue,
+    ExtraTensorInfo,
+    Frame,
+    FrameList,
+    FreeCall,
+    Instruction,
+    IntList,
+    JumpFalseCall,
+    MoveCall,
+    OptionalTensorList,
+    Program,
+    String,
+    SubsegmentOffsets,
+    Tensor,
+    TensorList,
+    TensorShapeDynamism,
+)
+from executorch.exir.tests.common import get_test_program
+
+
+def get_full_test_program() -> Program:
+    """Returns a Program that uses every table and union type in the schema."""
+    program = get_test_program()
+    plan = program.execution_plan[0]
+    plan.values += [
+        EValue(Double(float("inf"))),
+        EValue(Double(float("-inf"))),
+        EValue(Double(0.0)),
+        EValue(Double(-2.5)),
+        EValue(Bool(True)),
+        EValue(Bool(False)),
+        EValue(IntList([1, -2, 2**40])),
+        EValue(IntList([])),
+        EValue(DoubleList([1.0, 2.5])),
+        EValue(BoolList([True, False, True])),
+        EValue(TensorList([0, 4])),
+        EValue(OptionalTensorList([-1, 4])),
+        EValue(String("non-ascii é")),
+        EValue(
+            Tensor(
+                scalar_type=ScalarType.LONG,
+                storage_offset=3,
+                sizes=[1, 2, 3],
+                dim_order=typing.cast(List[bytes], [0, 1, 2]),
+                requires_grad=True,
+                layout=0,
+                data_buffer_idx=2,
+                allocation_info=None,
+                shape_dynamism=TensorShapeDynamism.DYNAMIC_BOUND,
+                extra_tensor_info=ExtraTensorInfo(
+                    mutable_data_segments_idx=1,
+                    fully_qualified_name="linear.weight",
+                ),
+            )
+        ),
+    ]
+    plan.chains[0].instructions += [
+        Instruction(DelegateCall(delegate_index=0, args=[1, 2])),
+        Instruction(MoveCall(move_from=1, move_to=2)),
+        Instruction(JumpFalseCall(cond_value_index=3, destination_instruction=0)),
+        Instruction(FreeCall(value_index=4)),
+    ]
+    plan.chains[0].stacktrace = [
+        FrameList(
+            items=[Frame(filename="model.py", lineno=3, name="forward", context="y")]
+        )
+    ]
+    plan.delegates = [
+        BackendDelegate(
+            id="backend0",
+            processed=BackendDelegateDataReference(
+                location=DataLocation.INLINE, index=0
+            ),
+            compile_specs=[CompileSpec(key="key", value=b"\x01\x02")],
+        ),
+        BackendDelegate(
+            id="backend1",
+            processed=BackendDelegateDataReference(
+                location=DataLocation.SEGMENT, index=1
+            ),
+            compile_specs=[],
+        ),
+    ]
+    program.constant_buffer = [
+        Buffer(storage=b""),
+        Buffer(storage=b"\x01" * 33),
+        Buffer(storage=b"\x02" * 7),
+    ]
+    program.backend_delegate_data = [
+        BackendDelegateInlineData(data=b"delegate data"),
+        BackendDelegateInlineData(data=b""),
+    ]
+    program.segments = [DataSegment(offset=0, size=100), DataSegment(128, 5)]
+    program.constant_segment = SubsegmentOffsets(segment_index=1, offsets=[0, 16])
+    program.mutable_data_segments = [SubsegmentOffsets(segment_index=2, offsets=[0, 8])]
+    return program
+
+
+class TestProgramToFlatbuffer(unittest.TestCase):
+    def assert_same_as_flatc(
+        self,
+        program: Program,
+        constant_tensor_alignment: Optional[int] = None,
+        delegate_alignment: Optional[int] = None,
+    ) -> None:
+        expected: _FlatbufferResult = _program_json_to_flatbuffer(
+            _program_to_json(program),
+            constant_tensor_alignment=constant_tensor_alignment,
+            delegate_alignment=delegate_alignment,
+        )
+        actual: _FlatbufferResult = _program_to_flatbuffer(
+            program,
+            constant_tensor_alignment=constant_tensor_alignment,
+            delegate_alignment=delegate_alignment,
+        )
+        self.assertEqual(actual.max_alignment, expected.max_alignment)
+        # Compare lengths first to get a more readable failure message.
+        self.assertEqual(len(actual.data), len(expected.data))
+        self.assertEqual(actual.data, expected.data)
+
+    def test_simple_program_matches_flatc(self) -> None:
+        self.assert_same_as_flatc(get_test_program())
+
+    def test_full_program_matches_flatc(self) -> None:
+        self.assert_same_as_flatc(get_full_test_program())
+
+    def test_patched_alignment_matches_flatc(self) -> None:
+        program = get_full_test_program()
+        self.assert_same_as_flatc(
+            program, constant_tensor_alignment=64, delegate_alignment=32
+        )
+        self.assert_same_as_flatc(
+            program, constant_tensor_alignment=4, delegate_alignment=1
+        )
+
+    def test_program_is_not_modified(self) -> None:
+        program = get_full_test_program()
+        before = _program_to_json(program)
+        _program_to_flatbuffer(program)
+        self.assertEqual(_program_to_json(program), before)
+
+    def test_schema_alignments(self) -> None:
+        # Defaults come from program.fbs.
+        alignments = _get_schema_alignments()
+        self.assertEqual(alignments.constant_tensor_alignment, 16)
+        self.assertEqual(alignments.delegate_alignment, 16)
+        self.assertEqual(alignments.max_alignment, 16)
+
+        alignments = _get_schema_alignments(
+            constant_tensor_alignment=32, delegate_alignment=256
+        )
+        self.assertEqual(alignments.constant_tensor_alignment, 32)
+        self.assertEqual(alignments.delegate_alignment, 256)
+        self.assertEqual(alignments.max_alignment, 256)
+
+    def test_bad_alignment_fails(self) -> None:
+        with self.assertRaises(ValueError):
+            _program_to_flatbuffer(get_test_program(), constant_tensor_alignment=3)
+
+
+class TestFlatbufferToProgram(unittest.TestCase):
+    def test_matches_flatc(self) -> None:
+        for program in (get_test_program(), get_full_test_program()):
+            data = _program_to_flatbuffer(program).data
+            expected = _json_to_program(_program_flatbuffer_to_json(data))
+            actual = _flatbuffer_to_program(memoryview(data))
+            self.assertEqual(_program_to_json(actual), _program_to_json(expected))
+            self.assertEqual(_program_to_json(actual), _program_to_json(program))
+
+    def test_blobs_are_views_into_input(self) -> None:
+        data = bytearray(_program_to_flatbuffer(get_full_test_program()).data)
+        program = _flatbuffer_to_program(memoryview(data))
+
+        storage = program.constant_buffer[1].storage
+        self.assertIsInstance(storage, memoryview)
+        self.assertEqual(storage, b"\x01" * 33)
+        delegate_data = program.backend_delegate_data[0].data
+        self.assertIsInstance(delegate_data, memoryview)
+        self.assertEqual(delegate_data, b"delegate data")
+
+        # Modifying the input is visible through the views, since nothing was
+        # copied.
+        offset = data.find(b"delegate data")
+        data[offset : offset + 1] = b"D"
+        self.assertEqual(delegate_data, b"Delegate data")
+
+    def test_bad_magic_fails(self) -> None:
+        data = bytearray(_program_to_flatbuffer(get_test_program()).data)
+        data[4:6] = b"XX"
+        with self.assertRaises(ValueError):
+            _flatbuffer_to_program(memoryview(data))
+
+    def test_too_short_fails(self) -> None:
+        with self.assertRaises(ValueError):
+            _flatbuffer_to_program(memoryview(b"1234"))
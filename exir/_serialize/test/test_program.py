@@ -10,6 +10,8 @@
 import copy
 import difflib
 import json
+import os
+import tempfile
 import unittest
 
 from typing import List, Sequence
@@ -21,6 +23,7 @@ from executorch.exir._serialize._program import (
     _json_to_program,
     _program_to_json,
     deserialize_pte_binary,
+    deserialize_pte_file,
     serialize_pte_binary,
 )
 
@@ -591,6 +594,82 @@ class TestProgram(unittest.TestCase):
         program2 = deserialize_pte_binary(pte_data)
         self.assert_programs_equal(program, program2)
 
+    def test_round_trip_zero_copy(self) -> None:
+        """Tests that deserializing from a memoryview or a file returns blobs
+        that are views into the serialized data instead of copies.
+        """
+        program = get_test_program()
+        add_constant_data(program, [b"constant data", b"more constant data"])
+        add_delegate_data(program, program.execution_plan[0], [b"delegate data"])
+        pte_data = bytes(
+            serialize_pte_binary(
+                program,
+                extract_delegate_segments=True,
+                segment_alignment=SEGMENT_ALIGNMENT,
+                constant_tensor_alignment=CONSTANT_TENSOR_ALIGNMENT,
+            )
+        )
+
+        # bytes input produces bytes blobs.
+        program2 = deserialize_pte_binary(pte_data)
+        self.assertIsInstance(program2.constant_buffer[0].storage, bytes)
+        self.assertIsInstance(program2.backend_delegate_data[0].data, bytes)
+
+        # memoryview input produces views into the input.
+        program3 = deserialize_pte_binary(memoryview(pte_data))
+        self.assertEqual(_program_to_json(program2), _program_to_json(program3))
+        self.assertIsInstance(program3.constant_buffer[1].storage, memoryview)
+        self.assertIsInstance(program3.backend_delegate_data[0].data, memoryview)
+        self.assertEqual(
+            program3.backend_delegate_data[0].data.obj,
+            pte_data,
+        )
+
+        # Files are memory-mapped.
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "program.pte")
+            with open(path, "wb") as f:
+                f.write(pte_data)
+            program4 = deserialize_pte_file(path)
+            self.assertEqual(_program_to_json(program2), _program_to_json(program4))
+            self.assertIsInstance(program4.constant_buffer[1].storage, memoryview)
+            del program4
+
+    def test_serialize_references_blobs(self) -> None:
+        """Tests that serializing doesn't copy the program's data blobs."""
+        program = get_test_program()
+        add_constant_data(program, [b"constant data", b"more constant data"])
+        add_delegate_data(program, program.execution_plan[0], [b"delegate data"])
+        pte_data = bytes(
+            serialize_pte_binary(
+                program,
+                extract_delegate_segments=True,
+                segment_alignment=SEGMENT_ALIGNMENT,
+                constant_tensor_alignment=CONSTANT_TENSOR_ALIGNMENT,
+            )
+        )
+
+        # Re-serialize a zero-copy program; its blobs are views into pte_data.
+        program2 = deserialize_pte_binary(memoryview(pte_data))
+        storage = program2.constant_buffer[1].storage
+        delegate_data = program2.backend_delegate_data[0].data
+        pte_cord = serialize_pte_binary(
+            program2,
+            extract_delegate_segments=True,
+            segment_alignment=SEGMENT_ALIGNMENT,
+            constant_tensor_alignment=CONSTANT_TENSOR_ALIGNMENT,
+        )
+        self.assertEqual(bytes(pte_cord), pte_data)
+
+        # The output refers to the original memory rather than to copies.
+        buffers = [b.obj for b in pte_cord._buffers if isinstance(b, memoryview)]
+        self.assertTrue(any(b is storage.obj for b in buffers))
+        self.assertTrue(any(b is delegate_data.obj for b in buffers))
+
+        # The input program is not modified.
+        self.assertIs(program2.constant_buffer[1].storage, storage)
+        self.assertEqual(len(program2.backend_delegate_data), 1)
+
     def test_no_constants(self) -> None:
         program = get_test_program()
         # Insert placeholder for non-const tensors.
@@ -6,22 +6,37 @@
 
 import copy
 import logging
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import contextmanager, nullcontext
 from functools import singledispatch
-from typing import Generator, List
+from typing import Dict, Generator, Iterable, List, Optional, Tuple, Type
 
 import torch
 
 from executorch.exir.backend.backend_details import BackendDetails, PreprocessResult
 from executorch.exir.backend.compile_spec_schema import CompileSpec
 
-from executorch.exir.backend.partitioner import Partitioner, PartitionResult
+from executorch.exir.backend.partitioner import (
+    DelegationSpec,
+    Partitioner,
+    PartitionResult,
+)
+from executorch.exir.backend.preprocess_cache import (
+    get_preprocess_cache,
+    PreprocessCache,
+    set_preprocess_cache,
+)
 from executorch.exir.backend.utils import (
     _maybe_duplicate_constant_nodes,
     is_identical_graph,
 )
 
 from executorch.exir.delegate import executorch_call_delegate, get_lowered_module_name
+from executorch.exir.export_profiler import profile_stage
 
 from executorch.exir.graph_module import get_control_flow_submodules
 from executorch.exir.lowered_backend_module import (
@@ -30,6 +45,9 @@ from executorch.exir.lowered_backend_module import (
     create_submodule_from_nodes,
     LoweredBackendModule,
 )
+from executorch.exir.passes.debug_handle_generator_pass import (
+    get_debug_handle_allocator,
+)
 from executorch.exir.program._fake_program import (
     get_fake_program,
     update_to_real_program,
@@ -106,27 +124,48 @@ def _(
     """
     assert isinstance(edge_program, ExportedProgram)
 
-    # All backend implementation are final, so we don't need to consider nested subclasses.
-    for cls in BackendDetails.__subclasses__():
-        if backend_id == cls.__name__:
+    cls = _get_backend(backend_id)
+    cache = get_preprocess_cache()
+    with profile_stage(
+        f"{backend_id}.preprocess", "preprocess", edge_program.graph_module
+    ):
+        if cache is not None:
+            preprocess_result = cache.preprocess(cls, edge_program, compile_specs)
+        else:
             copied_edge_program = copy.deepcopy(edge_program)
             preprocess_result: PreprocessResult = cls.preprocess(
                 copied_edge_program,
                 compile_specs,
             )
-            lowered_module = LoweredBackendModule(
-                edge_program=edge_program,
-                backend_id=backend_id,
-                processed_bytes=preprocess_result.processed_bytes,
-                compile_specs=compile_specs,
-            )
-            lowered_module.meta = {
-                "debug_handle_map": preprocess_result.debug_handle_map
-            }
-            return lowered_module
+    return _create_lowered_module(
+        backend_id, edge_program, compile_specs, preprocess_result
+    )
+
+
+def _get_backend(backend_id: str) -> Type[BackendDetails]:
+    # All backend implementation are final, so we don't need to consider nested subclasses.
+    for cls in BackendDetails.__subclasses__():
+        if backend_id == cls.__name__:
+            return cls
     raise NotImplementedError(f"Backend {backend_id} was not found.")
 
 
+def _create_lowered_module(
+    backend_id: str,
+    edge_program: ExportedProgram,
+    compile_specs: List[CompileSpec],
+    preprocess_result: PreprocessResult,
+) -> LoweredBackendModule:
+    lowered_module = LoweredBackendModule(
+        edge_program=edge_program,
+        backend_id=backend_id,
+        processed_bytes=preprocess_result.processed_bytes,
+        compile_specs=compile_specs,
+    )
+    lowered_module.meta = {"debug_handle_map": preprocess_result.debug_handle_map}
+    return lowered_module
+
+
 _ENABLE_VALIDATION: bool = True
 
 
@@ -153,18 +192,181 @@ def validation_disabled() -> Generator[None, None, None]:
         _ENABLE_VALIDATION = existing_setting
 
 
-def _get_node_list_with_same_tag(
+@contextmanager
+def preprocess_cache(cache_dir: str) -> Generator[PreprocessCache, None, None]:
+    """
+    Caches the results of backend preprocess in cache_dir, so that exporting
+    the same model again only recompiles the partitions that changed. Yields
+    the PreprocessCache, whose hits and misses count the reused and recompiled
+    partitions.
+
+    The cache is keyed on the partition's graph, constants and compile specs,
+    and on the source file of the backend, but not on the code the backend
+    calls into; clear the directory after updating a backend's dependencies.
+    """
+    existing_cache = get_preprocess_cache()
+    cache = PreprocessCache(cache_dir)
+    set_preprocess_cache(cache)
+    try:
+        yield cache
+    finally:
+        set_preprocess_cache(existing_cache)
+
+
+# Number of processes that lower the partitions of a graph concurrently. Set
+# with parallel_preprocess(); 0 lowers them one after another.
+_PREPROCESS_WORKERS: int = 0
+
+
+@contextmanager
+def parallel_preprocess(
+    max_workers: Optional[int] = None,
+) -> Generator[None, None, None]:
+    """
+    Runs the backend preprocess of the partitions of each graph concurrently,
+    in a pool of up to max_workers processes (default: the number of CPUs).
+    The lowered modules are inserted back into the graph in the same order,
+    and with the same debug handles, as when lowering them one by one.
+
+    This is opt-in and only supported on Linux: the workers are forked from
+    the current process, so that they inherit the partitions instead of
+    pickling them, and forking a process whose torch or OpenMP thread pools
+    are running is only safe there as long as the children don't use those
+    pools, which is why the workers are limited to a single thread. On other
+    platforms, or outside of the main thread, the partitions are lowered one
+    by one. The results of the preprocess calls must be picklable, and the
+    backends must not rely on state that is modified during preprocess, since
+    each call runs in its own process.
+    """
+    global _PREPROCESS_WORKERS
+    existing_workers = _PREPROCESS_WORKERS
+    _PREPROCESS_WORKERS = max_workers or os.cpu_count() or 1
+    try:
+        yield
+    finally:
+        _PREPROCESS_WORKERS = existing_workers
+
+
+# The preprocess calls that the workers of the pool run, inherited when they
+# are forked.
+_PENDING_PREPROCESS: List[
+    Tuple[Type[BackendDetails], ExportedProgram, List[CompileSpec]]
+] = []
+
+
+def _init_preprocess_worker() -> None:
+    # Workers run concurrently, don't let each of them use every CPU. This
+    # also keeps them from using the intra-op thread pool, which doesn't
+    # survive a fork.
+    torch.set_num_threads(1)
+
+
+def _run_pending_preprocess(index: int) -> PreprocessResult:
+    backend, edge_program, compile_specs = _PENDING_PREPROCESS[index]
+    # The program is a copy owned by this worker, no need to copy it again.
+    return backend.preprocess(edge_program, compile_specs)
+
+
+def _preprocess_concurrently(
+    preprocess_calls: List[
+        Tuple[Type[BackendDetails], ExportedProgram, List[CompileSpec]]
+    ],
+) -> List[PreprocessResult]:
+    """
+    Returns the results of the preprocess calls, which are looked up in the
+    preprocess cache, if any, and otherwise run by a pool of processes.
+    """
+    global _PENDING_PREPROCESS
+    cache = get_preprocess_cache()
+    results: List[Optional[PreprocessResult]] = [None] * len(preprocess_calls)
+    keys: List[Optional[str]] = [None] * len(preprocess_calls)
+    if cache is not None:
+        for i, preprocess_call in enumerate(preprocess_calls):
+            keys[i], results[i] = cache.lookup(*preprocess_call)
+    pending = [i for i, result in enumerate(results) if result is None]
+
+    if len(pending) == 1:
+        # Not worth starting a pool for.
+        backend, edge_program, compile_specs = preprocess_calls[pending[0]]
+        results[pending[0]] = backend.preprocess(
+            copy.deepcopy(edge_program), compile_specs
+        )
+    elif len(pending) > 1:
+        _PENDING_PREPROCESS = [preprocess_calls[i] for i in pending]
+        try:
+            with profile_stage("parallel_preprocess", "preprocess"):
+                with ProcessPoolExecutor(
+                    max_workers=min(_PREPROCESS_WORKERS, len(pending)),
+                    mp_context=multiprocessing.get_context("fork"),
+                    initializer=_init_preprocess_worker,
+                ) as executor:
+                    for i, result in zip(
+                        pending,
+                        executor.map(_run_pending_preprocess, range(len(pending))),
+                    ):
+                        results[i] = result
+        finally:
+            _PENDING_PREPROCESS = []
+
+    if cache is not None:
+        for i in pending:
+            key, result = keys[i], results[i]
+            if key is not None and result is not None:
+                cache.store(key, result, preprocess_calls[i][1])
+    preprocessed = []
+    for i, result in enumerate(results):
+        assert result is not None, f"Partition {i} was not preprocessed"
+        preprocessed.append(result)
+    return preprocessed
+
+
+def _lower_pending_modules(
+    graph_module: torch.fx.GraphModule,
+    pending_lowered_modules: List[Tuple[str, DelegationSpec, ExportedProgram]],
+) -> None:
+    """
+    Preprocesses the partitions concurrently, and replaces their placeholder
+    lowered modules in graph_module with the lowered ones.
+    """
+    preprocess_results = _preprocess_concurrently(
+        [
+            (
+                _get_backend(delegation_spec.backend_id),
+                submodule_program,
+                delegation_spec.compile_specs,
+            )
+            for _, delegation_spec, submodule_program in pending_lowered_modules
+        ]
+    )
+    for (lowered_name, delegation_spec, submodule_program), result in zip(
+        pending_lowered_modules, preprocess_results
+    ):
+        setattr(
+            graph_module,
+            lowered_name,
+            _create_lowered_module(
+                delegation_spec.backend_id,
+                submodule_program,
+                delegation_spec.compile_specs,
+                result,
+            ),
+        )
+
+
+def _get_node_lists_with_same_tag(
     tagged_graph_module: torch.fx.GraphModule,
-    tag: str,
+    tags: Iterable[str],
     owning_program: ExportedProgram,
-) -> List[torch.fx.Node]:
+) -> Dict[str, List[torch.fx.Node]]:
     """
-    Return a list of nodes with the same tag.
+    Return the lists of nodes with each of the given tags, collected in a
+    single pass over the graph.
     """
-    node_list = []
+    node_lists: Dict[str, List[torch.fx.Node]] = {tag: [] for tag in tags}
 
     for node in tagged_graph_module.graph.nodes:
-        if node.meta.get("delegation_tag", "") == tag:
+        tag = node.meta.get("delegation_tag", "")
+        if tag in node_lists:
             if node.op == "output":
                 raise RuntimeError(f"output node {node} should not be tagged")
             if node.op == "placeholder":
@@ -184,8 +386,8 @@ def _get_node_list_with_same_tag(
                             raise RuntimeError(
                                 f"constant data node ({node}) is tagged with ({tag}) but has user ({user}) which has tag ({users_tag})"
                             )
-            node_list.append(node)
-    return node_list
+            node_lists[tag].append(node)
+    return node_lists
 
 
 def _partition_and_lower_one_graph_module(
@@ -196,13 +398,30 @@ def _partition_and_lower_one_graph_module(
 ) -> torch.fx.GraphModule:
     """
     Partitioned and lowered the graph module based on the partition tag, this is to handle one graph module.
+
+    Within parallel_preprocess(), the partitions are inserted with placeholder
+    lowered modules, which are replaced once all of them are preprocessed.
     """
+    # Forking from other threads than the main one could deadlock the workers,
+    # and so could forking on platforms other than Linux, e.g. macOS where fork
+    # is available but not safe once system frameworks have started threads.
+    lower_concurrently = (
+        _PREPROCESS_WORKERS > 1
+        and sys.platform.startswith("linux")
+        and threading.current_thread() is threading.main_thread()
+    )
+    # The names and partitions of the placeholder lowered modules.
+    pending_lowered_modules: List[Tuple[str, DelegationSpec, ExportedProgram]] = []
+    # Lowering a partition leaves the nodes of the others in place, so they can
+    # all be collected upfront.
+    node_lists = _get_node_lists_with_same_tag(
+        tagged_graph_module, partition_result.partition_tags.keys(), owning_program
+    )
+    debug_handle_allocator = get_debug_handle_allocator(owning_program.graph_module)
     for tag, delegation_spec in partition_result.partition_tags.items():
         # Create partition with nodes containing this tag. There should only be
         # one contained submodule per tag
-        node_list = _get_node_list_with_same_tag(
-            tagged_graph_module, tag, owning_program
-        )
+        node_list = node_lists[tag]
 
         if len(node_list) == 0:
             logging.debug(f"Did not find any nodes for tag {tag}")
@@ -223,12 +442,10 @@ def _partition_and_lower_one_graph_module(
                 tagged_graph_module, node_list, tag
             )
 
-        tagged_graph_module_output_node = [
-            node for node in tagged_graph_module.graph.nodes if node.op == "output"
-        ][0]
-        submodule_output_node = [
-            node for node in submodule.graph.nodes if node.op == "output"
-        ][0]
+        tagged_graph_module_output_node = tagged_graph_module.graph.find_nodes(
+            op="output"
+        )[0]
+        submodule_output_node = submodule.graph.find_nodes(op="output")[0]
         # Copy the output node meta from the original output node, because
         # create_submodule_from_nodes doesn't cover the meta field
         submodule_output_node.meta = tagged_graph_module_output_node.meta
@@ -246,11 +463,19 @@ def _partition_and_lower_one_graph_module(
             is_submodule,
         )
 
-        lowered_submodule = to_backend(
-            delegation_spec.backend_id,
-            submodule_program,
-            delegation_spec.compile_specs,
-        )
+        if lower_concurrently:
+            lowered_submodule = LoweredBackendModule(
+                edge_program=submodule_program,
+                backend_id=delegation_spec.backend_id,
+                processed_bytes=b"",
+                compile_specs=delegation_spec.compile_specs,
+            )
+        else:
+            lowered_submodule = to_backend(
+                delegation_spec.backend_id,
+                submodule_program,
+                delegation_spec.compile_specs,
+            )
 
         # call delegate args should only use user_inputs
         call_delegate_args = []
@@ -261,15 +486,6 @@ def _partition_and_lower_one_graph_module(
                     call_delegate_args.append(inp_node)
                     break
 
-        def generate_debug_handle(ep: ExportedProgram) -> int:
-            """
-            Generate a debug handle for the given ExportedProgram.
-            """
-            debug_handle = 0
-            for node in ep.graph_module.graph.nodes:
-                debug_handle = max(debug_handle, node.meta.get("debug_handle", 0))
-            return debug_handle + 1
-
         # Replace the partitioned submodule with a lowered submodule
         # Add call_method node with function "forward"
         with tagged_graph_module.graph.inserting_before(call_module_node):
@@ -282,12 +498,14 @@ def _partition_and_lower_one_graph_module(
                 (lowered_node,) + tuple(call_delegate_args),
                 call_module_node.kwargs,
             )
-            call_delegate_node.meta["debug_handle"] = generate_debug_handle(
-                owning_program
-            )
+            call_delegate_node.meta["debug_handle"] = debug_handle_allocator.allocate()
             call_delegate_node.meta["val"] = submodule_output_node.meta["val"]
             call_module_node.replace_all_uses_with(call_delegate_node)
             tagged_graph_module.graph.erase_node(call_module_node)
+        if lower_concurrently:
+            pending_lowered_modules.append(
+                (lowered_name, delegation_spec, submodule_program)
+            )
 
         if is_submodule:
             assert len(toplevel_input_specs_to_delete) == 0
@@ -303,6 +521,8 @@ def _partition_and_lower_one_graph_module(
                 toplevel_output_specs_to_delete,
             )
 
+    _lower_pending_modules(tagged_graph_module, pending_lowered_modules)
+
     return tagged_graph_module
 
 
@@ -372,7 +592,12 @@ def _(
             f"Error in get_fake_program for graph {edge_program.graph_module}, fallback to deepcopy: {e}"
         )
         fake_edge_program = copy.deepcopy(edge_program)
-    partitioner_result = partitioner_instance(fake_edge_program)
+    with profile_stage(
+        f"{type(partitioner_instance).__name__}.partition",
+        "partition",
+        fake_edge_program.graph_module,
+    ):
+        partitioner_result = partitioner_instance(fake_edge_program)
     tagged_exported_program = partitioner_result.tagged_exported_program
 
     # Check that the partitioner did not modify the original graph
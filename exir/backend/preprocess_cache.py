@@ -0,0 +1,435 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-strict
+
+"""
+On-disk cache of backend preprocess results.
+
+Lowering a large model calls BackendDetails.preprocess once per partition,
+which usually dominates export time. When the same model is exported again
+with only a few layers changed, most partitions are identical to the previous
+run; this cache lets to_backend reuse their processed bytes instead of
+recompiling them.
+
+Each entry is keyed on a structural hash of the partition's graph (ops,
+arguments, tensor metadata and debug handles relative to the smallest one of
+the partition, so that changes to earlier layers don't shift them), its graph
+signature, the fingerprints of its constant tensors, its compile specs and the
+sources of the loaded modules of the backend's package and of exir. Partitions
+of backends whose sources can't be found are not cached. The cache is opt-in:
+enable it with the preprocess_cache() context manager in backend_api, or by
+pointing the ET_EXIR_PREPROCESS_CACHE_DIR environment variable at a directory.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import torch
+from executorch.exir.backend.backend_details import BackendDetails, PreprocessResult
+from executorch.exir.backend.compile_spec_schema import CompileSpec
+from torch._subclasses.fake_tensor import FakeTensor
+from torch.export import ExportedProgram
+from torch.fx.node import _get_qualified_name
+
+# Bump when the key or entry format changes, to ignore stale entries.
+_CACHE_VERSION = 3
+
+_PREPROCESS_CACHE_DIR_ENV = "ET_EXIR_PREPROCESS_CACHE_DIR"
+
+_PRIMITIVE_TYPES = (
+    bool,
+    int,
+    float,
+    str,
+    type(None),
+    torch.dtype,
+    torch.device,
+    torch.layout,
+    torch.memory_format,
+)
+
+
+class _Uncacheable(Exception):
+    """Raised when a partition contains something that can't be hashed reliably."""
+
+
+def _tensor_fingerprint(tensor: torch.Tensor) -> str:
+    if isinstance(tensor, FakeTensor) or tensor.is_meta:
+        raise _Uncacheable("constant has no data")
+    data = tensor.detach().cpu().contiguous().reshape(-1).view(torch.uint8)
+    digest = hashlib.sha256(data.numpy()).hexdigest()
+    return f"{tensor.dtype}{tuple(tensor.shape)}:{digest}"
+
+
+def _debug_handle(node: torch.fx.Node) -> Optional[int]:
+    # The placeholders and outputs of a partition keep the debug handles of the
+    # nodes outside of it that they stand for.
+    if node.op in ("placeholder", "output"):
+        return None
+    debug_handle = node.meta.get("debug_handle")
+    return debug_handle if isinstance(debug_handle, int) else None
+
+
+def _debug_handle_base(graph_module: torch.fx.GraphModule) -> int:
+    """
+    Returns the smallest debug handle of the nodes in graph_module and its
+    submodules, which the debug handles of a partition are cached relative to.
+    """
+    handles = [
+        _debug_handle(node)
+        for module in graph_module.modules()
+        if isinstance(module, torch.fx.GraphModule)
+        for node in module.graph.nodes
+    ]
+    return min((handle for handle in handles if handle is not None), default=0)
+
+
+def _rebase_debug_handle_map(
+    debug_handle_map: Optional[Dict[Any, Tuple[int, ...]]], offset: int
+) -> Optional[Dict[Any, Tuple[int, ...]]]:
+    if debug_handle_map is None:
+        return None
+    # The keys are ids of the backend, which it may have embedded in the
+    # processed bytes, while the values are debug handles of the partition.
+    return {
+        key: tuple(
+            handle + offset if isinstance(handle, int) else handle for handle in handles
+        )
+        for key, handles in debug_handle_map.items()
+    }
+
+
+class _GraphHasher:
+    """Builds a description of a graph that doesn't depend on node names."""
+
+    def __init__(
+        self, graph_module: torch.fx.GraphModule, debug_handle_base: int = 0
+    ) -> None:
+        self.graph_module = graph_module
+        self.debug_handle_base = debug_handle_base
+        self.node_index: Dict[torch.fx.Node, int] = {}
+
+    def _arg(self, arg: Any) -> Any:
+        if isinstance(arg, torch.fx.Node):
+            return ["%", self.node_index[arg]]
+        if isinstance(arg, (list, tuple)):
+            return [type(arg).__name__, [self._arg(a) for a in arg]]
+        if isinstance(arg, dict):
+            return ["dict", [[str(k), self._arg(v)] for k, v in arg.items()]]
+        if isinstance(arg, torch.Tensor):
+            return ["tensor", _tensor_fingerprint(arg)]
+        if isinstance(arg, _PRIMITIVE_TYPES):
+            return repr(arg)
+        raise _Uncacheable(f"argument of type {type(arg)}")
+
+    def _val(self, val: Any) -> Any:
+        if isinstance(val, torch.Tensor):
+            return [
+                str(val.dtype),
+                [str(s) for s in val.shape],
+                [str(s) for s in val.stride()],
+            ]
+        if isinstance(val, (list, tuple)):
+            return [self._val(v) for v in val]
+        if isinstance(val, (torch.SymInt, torch.SymFloat, torch.SymBool)):
+            return str(val)
+        return self._arg(val)
+
+    def _get_attr(self, target: str) -> Any:
+        # Imported here to avoid a circular import.
+        from executorch.exir.lowered_backend_module import LoweredBackendModule
+
+        attr = getattr(self.graph_module, target)
+        if isinstance(attr, torch.fx.GraphModule):
+            return _GraphHasher(attr, self.debug_handle_base).describe()
+        if isinstance(attr, LoweredBackendModule):
+            return [
+                attr.backend_id,
+                hashlib.sha256(attr.processed_bytes).hexdigest(),
+                _compile_specs(attr.compile_specs),
+            ]
+        if isinstance(attr, torch.Tensor):
+            return _tensor_fingerprint(attr)
+        raise _Uncacheable(f"attribute of type {type(attr)}")
+
+    def describe(self) -> List[Any]:
+        nodes = []
+        for index, node in enumerate(self.graph_module.graph.nodes):
+            debug_handle = _debug_handle(node)
+            if debug_handle is not None:
+                debug_handle -= self.debug_handle_base
+            self.node_index[node] = index
+            if node.op == "call_function":
+                try:
+                    target = _get_qualified_name(node.target)
+                except Exception:
+                    raise _Uncacheable(f"target {node.target}")
+            elif node.op == "get_attr":
+                target = self._get_attr(node.target)
+            else:
+                target = str(node.target) if node.op == "call_method" else None
+            nodes.append(
+                [
+                    node.op,
+                    target,
+                    self._arg(node.args),
+                    self._arg(node.kwargs),
+                    self._val(node.meta.get("val")),
+                    # Backends may embed debug handles in their output.
+                    debug_handle,
+                ]
+            )
+        return nodes
+
+
+def _compile_specs(compile_specs: List[CompileSpec]) -> List[List[str]]:
+    return [[spec.key, bytes(spec.value).hex()] for spec in compile_specs]
+
+
+def _signature(edge_program: ExportedProgram) -> List[Any]:
+    signature = edge_program.graph_signature
+    inputs = []
+    for spec in signature.input_specs:
+        constant = None
+        if spec.target in edge_program.state_dict:
+            constant = _tensor_fingerprint(edge_program.state_dict[spec.target])
+        elif spec.target in edge_program.constants:
+            value = edge_program.constants[spec.target]
+            if not isinstance(value, torch.Tensor):
+                raise _Uncacheable(f"constant {spec.target} is not a tensor")
+            constant = _tensor_fingerprint(value)
+        inputs.append([spec.kind.name, spec.target, spec.persistent, constant])
+    outputs = [[spec.kind.name, spec.target] for spec in signature.output_specs]
+    return [inputs, outputs]
+
+
+# Digests of source files, keyed on their path, modification time and size
+_FILE_DIGESTS: Dict[Tuple[str, int, int], str] = {}
+
+
+def _file_digest(path: str) -> Optional[str]:
+    try:
+        stat = os.stat(path)
+        stat_key = (path, stat.st_mtime_ns, stat.st_size)
+        if stat_key not in _FILE_DIGESTS:
+            with open(path, "rb") as f:
+                _FILE_DIGESTS[stat_key] = hashlib.sha256(f.read()).hexdigest()
+        return _FILE_DIGESTS[stat_key]
+    except OSError:
+        return None
+
+
+def _package_sources(package: str) -> List[List[str]]:
+    """
+    Returns the name and source digest of each loaded module of package.
+    """
+    sources = []
+    for name, module in sorted(sys.modules.copy().items()):
+        if name != package and not name.startswith(f"{package}."):
+            continue
+        path = getattr(module, "__file__", None)
+        digest = _file_digest(path) if isinstance(path, str) else None
+        if digest is not None:
+            sources.append([name, digest])
+    return sources
+
+
+def _backend_sources(backend: Type[BackendDetails]) -> List[List[List[str]]]:
+    # The backend's preprocess may call into any module of its package, e.g.
+    # executorch.backends.xnnpack for the backends of executorch.
+    parts = backend.__module__.split(".")
+    package = ".".join(parts[:3] if parts[0] == "executorch" else parts[:1])
+    backend_sources = _package_sources(package)
+    if not backend_sources:
+        raise _Uncacheable(f"no source of {package} to hash")
+    # exir builds the partitions that are preprocessed, which its version
+    # string doesn't identify in development builds.
+    return [backend_sources, _package_sources("executorch.exir")]
+
+
+class PreprocessCache:
+    """
+    A directory of preprocess results, one pair of files per entry: the
+    processed bytes, and a JSON file with the debug handle map that is written
+    last, so that interrupted writes are never read back. The debug handles
+    that the map points to are stored relative to the smallest one of the
+    partition, and rebased onto the partition they are loaded for.
+
+    `hits` and `misses` count the partitions that were, and weren't, found in
+    the cache; partitions that can't be keyed count as misses. The cache may
+    be shared by several threads.
+    """
+
+    def __init__(self, cache_dir: str) -> None:
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def __repr__(self) -> str:
+        return (
+            f"PreprocessCache({self.cache_dir!r}, hits={self.hits}, "
+            f"misses={self.misses})"
+        )
+
+    def key(
+        self,
+        backend: Type[BackendDetails],
+        edge_program: ExportedProgram,
+        compile_specs: List[CompileSpec],
+    ) -> Optional[str]:
+        """
+        Returns the cache key of the partition, or None if it can't be cached.
+        """
+        try:
+            description = [
+                _CACHE_VERSION,
+                torch.__version__,
+                f"{backend.__module__}.{backend.__qualname__}",
+                _backend_sources(backend),
+                _compile_specs(compile_specs),
+                _signature(edge_program),
+                _GraphHasher(
+                    edge_program.graph_module,
+                    _debug_handle_base(edge_program.graph_module),
+                ).describe(),
+            ]
+        except _Uncacheable as e:
+            logging.debug(f"Not caching preprocess of {backend.__name__}: {e}")
+            return None
+        encoded = json.dumps(description, separators=(",", ":")).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _path(self, key: str, extension: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{extension}")
+
+    def load(
+        self, key: str, edge_program: ExportedProgram
+    ) -> Optional[PreprocessResult]:
+        """
+        Returns the result cached under key, for the partition edge_program.
+        """
+        try:
+            with open(self._path(key, "json"), "r") as f:
+                entry = json.load(f)
+            with open(self._path(key, "bin"), "rb") as f:
+                processed_bytes = f.read()
+        except (OSError, ValueError):
+            return None
+        debug_handle_map = entry["debug_handle_map"]
+        if debug_handle_map is not None:
+            debug_handle_map = _rebase_debug_handle_map(
+                {k: tuple(v) for k, v in debug_handle_map},
+                _debug_handle_base(edge_program.graph_module),
+            )
+        return PreprocessResult(processed_bytes, debug_handle_map)
+
+    def _write(self, path: str, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def store(
+        self, key: str, result: PreprocessResult, edge_program: ExportedProgram
+    ) -> None:
+        """
+        Caches the result of preprocessing the partition edge_program under key.
+        """
+        debug_handle_map = _rebase_debug_handle_map(
+            result.debug_handle_map, -_debug_handle_base(edge_program.graph_module)
+        )
+        try:
+            entry = json.dumps(
+                {
+                    "debug_handle_map": (
+                        [[k, list(v)] for k, v in debug_handle_map.items()]
+                        if debug_handle_map is not None
+                        else None
+                    )
+                }
+            )
+        except TypeError as e:
+            logging.debug(f"Not caching preprocess result: {e}")
+            return
+        self._write(self._path(key, "bin"), bytes(result.processed_bytes))
+        self._write(self._path(key, "json"), entry.encode())
+
+    def lookup(
+        self,
+        backend: Type[BackendDetails],
+        edge_program: ExportedProgram,
+        compile_specs: List[CompileSpec],
+    ) -> Tuple[Optional[str], Optional[PreprocessResult]]:
+        """
+        Returns the key of the partition and its cached result, if any,
+        counting the lookup as a hit or a miss.
+        """
+        key = self.key(backend, edge_program, compile_specs)
+        result = self.load(key, edge_program) if key is not None else None
+        with self._lock:
+            if result is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return key, result
+
+    def preprocess(
+        self,
+        backend: Type[BackendDetails],
+        edge_program: ExportedProgram,
+        compile_specs: List[CompileSpec],
+    ) -> PreprocessResult:
+        """
+        Returns the cached result of backend.preprocess(edge_program,
+        compile_specs), running and caching it on a miss.
+        """
+        key, result = self.lookup(backend, edge_program, compile_specs)
+        if result is not None:
+            return result
+
+        result = backend.preprocess(copy.deepcopy(edge_program), compile_specs)
+        if key is not None:
+            self.store(key, result, edge_program)
+        return result
+
+
+_PREPROCESS_CACHE: Optional[PreprocessCache] = None
+_PREPROCESS_CACHE_LOCK = threading.Lock()
+
+
+def get_preprocess_cache() -> Optional[PreprocessCache]:
+    """
+    Returns the cache enabled by backend_api.preprocess_cache(), or else the
+    one in the directory named by ET_EXIR_PREPROCESS_CACHE_DIR, if set.
+    """
+    global _PREPROCESS_CACHE
+    with _PREPROCESS_CACHE_LOCK:
+        if _PREPROCESS_CACHE is not None:
+            return _PREPROCESS_CACHE
+        cache_dir = os.getenv(_PREPROCESS_CACHE_DIR_ENV, "").strip()
+        if cache_dir:
+            _PREPROCESS_CACHE = PreprocessCache(cache_dir)
+        return _PREPROCESS_CACHE
+
+
+def set_preprocess_cache(cache: Optional[PreprocessCache]) -> None:
+    global _PREPROCESS_CACHE
+    with _PREPROCESS_CACHE_LOCK:
+        _PREPROCESS_CACHE = cache
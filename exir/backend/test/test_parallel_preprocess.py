@@ -0,0 +1,121 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+import tempfile
+import unittest
+from typing import List, Tuple
+
+import torch
+from executorch.exir import EdgeCompileConfig, ExportProfiler, to_edge
+from executorch.exir.backend.backend_api import parallel_preprocess, preprocess_cache
+from executorch.exir.backend.partitioner import Partitioner
+from executorch.exir.backend.test.op_partitioner_demo import (
+    AddAttributePartitionerDemo,
+    AddMulPartitionerDemo,
+)
+from executorch.exir.delegate import executorch_call_delegate
+from executorch.exir.lowered_backend_module import get_lowered_submodules
+from torch.export import export
+
+
+class AddBiases(torch.nn.Module):
+    def __init__(self) -> None:
+        super().__init__()
+        for i in range(4):
+            self.register_buffer(f"bias{i}", torch.full((2, 2), float(i)))
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        for i in range(4):
+            x = torch.sin(x + getattr(self, f"bias{i}"))
+        return x
+
+
+class CondAddMul(torch.nn.Module):
+    def forward(self, x: torch.Tensor, y: torch.Tensor) -> torch.Tensor:
+        def true_fn(x, y):
+            return torch.sin(x + y) * y + x
+
+        def false_fn(x, y):
+            return torch.cos(x * y) + y
+
+        z = torch.sin(x + y) * x
+        return torch.cond(z.sum() > 0, true_fn, false_fn, [z, y]) + x
+
+
+def lower(
+    module: torch.nn.Module,
+    inputs: Tuple[torch.Tensor, ...],
+    partitioner: Partitioner,
+) -> Tuple[List[Tuple[bytes, object]], List[int], bytes]:
+    """
+    Returns the processed bytes and debug handle map of each delegate, the
+    debug handles of the delegate calls and the serialized program.
+    """
+    edge = to_edge(
+        export(module, inputs),
+        compile_config=EdgeCompileConfig(_check_ir_validity=False),
+    ).to_backend(partitioner)
+    graph_module = edge.exported_program().graph_module
+    debug_handles = [
+        node.meta["debug_handle"]
+        for gm in graph_module.modules()
+        if isinstance(gm, torch.fx.GraphModule)
+        for node in gm.graph.nodes
+        if node.target == executorch_call_delegate
+    ]
+    delegates = [
+        (lowered.processed_bytes, lowered.meta["debug_handle_map"])
+        for gm in graph_module.modules()
+        if isinstance(gm, torch.fx.GraphModule)
+        for _, lowered, _ in get_lowered_submodules(gm)
+    ]
+    return delegates, debug_handles, edge.to_executorch().buffer
+
+
+class TestParallelPreprocess(unittest.TestCase):
+    def assert_lowers_like_sequential(
+        self,
+        module: torch.nn.Module,
+        inputs: Tuple[torch.Tensor, ...],
+        partitioner: Partitioner,
+        num_delegates: int,
+    ) -> None:
+        expected = lower(module, inputs, partitioner)
+        self.assertEqual(len(expected[0]), num_delegates)
+        with ExportProfiler(trace_memory=False) as profiler:
+            with parallel_preprocess(max_workers=2):
+                self.assertEqual(lower(module, inputs, partitioner), expected)
+        self.assertIn("parallel_preprocess", {e.name for e in profiler.events})
+
+    def test_matches_sequential_lowering(self) -> None:
+        self.assert_lowers_like_sequential(
+            AddBiases(), (torch.ones(2, 2),), AddAttributePartitionerDemo(), 4
+        )
+
+    def test_matches_sequential_lowering_with_control_flow(self) -> None:
+        self.assert_lowers_like_sequential(
+            CondAddMul(),
+            (torch.ones(2, 2), torch.ones(2, 2)),
+            AddMulPartitionerDemo(),
+            5,
+        )
+
+    def test_uses_preprocess_cache(self) -> None:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with preprocess_cache(cache_dir) as cache, parallel_preprocess(2):
+                expected = lower(
+                    AddBiases(), (torch.ones(2, 2),), AddAttributePartitionerDemo()
+                )
+                self.assertEqual((cache.hits, cache.misses), (0, 4))
+                self.assertEqual(
+                    lower(
+                        AddBiases(),
+                        (torch.ones(2, 2),),
+                        AddAttributePartitionerDemo(),
+                    ),
+                    expected,
+                )
+                self.assertEqual((cache.hits, cache.misses), (4, 4))
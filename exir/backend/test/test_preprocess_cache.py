@@ -0,0 +1,176 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+import importlib
+import os
+import sys
+import tempfile
+import unittest
+from typing import List, Tuple
+
+import torch
+from executorch.exir import EdgeCompileConfig, to_edge
+from executorch.exir.backend.backend_api import preprocess_cache
+from executorch.exir.backend.backend_details import BackendDetails, PreprocessResult
+from executorch.exir.backend.preprocess_cache import PreprocessCache
+from executorch.exir.backend.test.op_partitioner_demo import AddAttributePartitionerDemo
+from executorch.exir.lowered_backend_module import get_lowered_submodules
+from torch.export import export
+
+
+class AddBias(torch.nn.Module):
+    def __init__(self, bias: torch.Tensor) -> None:
+        super().__init__()
+        self.register_buffer("bias", bias)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return torch.sin(x + self.bias) + self.bias + self.bias
+
+
+class CosAddBias(AddBias):
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return super().forward(torch.cos(x))
+
+
+BACKEND_SOURCE = """
+from executorch.exir.backend.backend_details import BackendDetails, PreprocessResult
+from preprocess_cache_test_backend import helper
+
+
+class HelperBackend(BackendDetails):
+    @staticmethod
+    def preprocess(edge_program, compile_specs):
+        return PreprocessResult(bytes([helper.VALUE]))
+"""
+
+
+def lower(module: torch.nn.Module) -> List[Tuple[bytes, object]]:
+    """Returns the processed bytes and debug handle map of each delegate."""
+    edge = to_edge(
+        export(module, (torch.ones(2, 2),)),
+        compile_config=EdgeCompileConfig(_check_ir_validity=False),
+    ).to_backend(AddAttributePartitionerDemo())
+    return [
+        (lowered.processed_bytes, lowered.meta["debug_handle_map"])
+        for _, lowered, _ in get_lowered_submodules(
+            edge.exported_program().graph_module
+        )
+    ]
+
+
+class TestPreprocessCache(unittest.TestCase):
+    def test_reuses_unchanged_partitions(self) -> None:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with preprocess_cache(cache_dir) as cache:
+                expected = lower(AddBias(torch.ones(2, 2)))
+                self.assertEqual(len(expected), 2)
+                self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+                self.assertEqual(lower(AddBias(torch.ones(2, 2))), expected)
+                self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+                # Partitions that use changed constants are recompiled.
+                lower(AddBias(torch.full((2, 2), 2.0)))
+                self.assertEqual((cache.hits, cache.misses), (2, 4))
+
+            # Entries persist across caches.
+            with preprocess_cache(cache_dir) as cache:
+                self.assertEqual(lower(AddBias(torch.ones(2, 2))), expected)
+                self.assertEqual((cache.hits, cache.misses), (2, 0))
+
+    def test_matches_uncached_lowering(self) -> None:
+        expected = lower(AddBias(torch.ones(2, 2)))
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with preprocess_cache(cache_dir):
+                self.assertEqual(lower(AddBias(torch.ones(2, 2))), expected)
+                self.assertEqual(lower(AddBias(torch.ones(2, 2))), expected)
+
+    def test_reuses_partitions_with_shifted_debug_handles(self) -> None:
+        # The extra cos shifts the debug handles of both partitions.
+        expected = lower(CosAddBias(torch.ones(2, 2)))
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with preprocess_cache(cache_dir) as cache:
+                cached = lower(AddBias(torch.ones(2, 2)))
+                lowered = lower(CosAddBias(torch.ones(2, 2)))
+                self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+        # The bytes, and the backend ids that the debug handle maps are keyed
+        # on, are reused, while the debug handles are those of the new program.
+        self.assertEqual(
+            [processed_bytes for processed_bytes, _ in lowered],
+            [processed_bytes for processed_bytes, _ in cached],
+        )
+        for (_, debug_handle_map), (_, cached_map), (_, expected_map) in zip(
+            lowered, cached, expected
+        ):
+            self.assertEqual(list(debug_handle_map), list(cached_map))
+            self.assertEqual(
+                list(debug_handle_map.values()), list(expected_map.values())
+            )
+
+    def test_ignores_partial_entries(self) -> None:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with preprocess_cache(cache_dir) as cache:
+                expected = lower(AddBias(torch.ones(2, 2)))
+                for name in os.listdir(cache_dir):
+                    if name.endswith(".json"):
+                        os.remove(os.path.join(cache_dir, name))
+
+                self.assertEqual(lower(AddBias(torch.ones(2, 2))), expected)
+                self.assertEqual((cache.hits, cache.misses), (0, 4))
+
+    def test_keys_on_sources_of_backend_package(self) -> None:
+        program = to_edge(
+            export(AddBias(torch.ones(2, 2)), (torch.ones(2, 2),))
+        ).exported_program()
+        with tempfile.TemporaryDirectory() as root:
+            package_dir = os.path.join(root, "preprocess_cache_test_backend")
+            os.makedirs(package_dir)
+            for name, source in [
+                ("__init__.py", ""),
+                ("helper.py", "VALUE = 1\n"),
+                ("backend.py", BACKEND_SOURCE),
+            ]:
+                with open(os.path.join(package_dir, name), "w") as f:
+                    f.write(source)
+            sys.path.insert(0, root)
+            try:
+                backend = importlib.import_module(
+                    "preprocess_cache_test_backend.backend"
+                ).HelperBackend
+                cache = PreprocessCache(os.path.join(root, "cache"))
+                key = cache.key(backend, program, [])
+                self.assertIsNotNone(key)
+                self.assertEqual(cache.key(backend, program, []), key)
+
+                # A change to any module of the package changes the key.
+                with open(os.path.join(package_dir, "helper.py"), "w") as f:
+                    f.write("VALUE = 22\n")
+                self.assertNotIn(cache.key(backend, program, []), [key, None])
+            finally:
+                sys.path.remove(root)
+                for name in list(sys.modules):
+                    if name.startswith("preprocess_cache_test_backend"):
+                        del sys.modules[name]
+
+    def test_bypasses_backends_without_sources(self) -> None:
+        class SourcelessBackend(BackendDetails):
+            @staticmethod
+            def preprocess(edge_program, compile_specs):
+                return PreprocessResult(b"processed")
+
+        SourcelessBackend.__module__ = "preprocess_cache_missing_backend"
+        program = to_edge(
+            export(AddBias(torch.ones(2, 2)), (torch.ones(2, 2),))
+        ).exported_program()
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = PreprocessCache(cache_dir)
+            self.assertIsNone(cache.key(SourcelessBackend, program, []))
+            for _ in range(2):
+                result = cache.preprocess(SourcelessBackend, program, [])
+                self.assertEqual(result.processed_bytes, b"processed")
+            self.assertEqual((cache.hits, cache.misses), (0, 2))
+            self.assertEqual(os.listdir(cache_dir), [])
@@ -0,0 +1,329 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-strict
+
+"""
+Benchmarks the ahead-of-time export stack on synthetic models.
+
+Each model is exported at several sizes, then to_edge,
+to_edge_transform_and_lower with the XnnpackPartitioner, to_executorch, and the
+serialization and deserialization of the .pte are timed and memory profiled.
+Times are the fastest of a few runs, while the peak python memory of each stage
+comes from an extra run with tracemalloc. Results written with --output can be
+passed back as --baseline to compare two commits.
+
+    python -m executorch.exir.benchmarks.export_benchmark \\
+        --models mlp transformer --sizes 2 8 32 --output results.json
+"""
+
+import argparse
+import json
+import sys
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import torch
+from executorch.backends.xnnpack.partition.xnnpack_partitioner import XnnpackPartitioner
+from executorch.exir import to_edge, to_edge_transform_and_lower
+from executorch.exir._serialize import _deserialize_pte_binary, _serialize_pte_binary
+from executorch.exir.export_profiler import ExportProfiler, profile_stage
+from torch._higher_order_ops.map import map as torch_map
+from torch.export import export
+
+Inputs = Tuple[torch.Tensor, ...]
+
+
+class MLP(torch.nn.Module):
+    def __init__(self, depth: int, width: int = 64) -> None:
+        super().__init__()
+        self.layers = torch.nn.Sequential(
+            *[
+                layer
+                for _ in range(depth)
+                for layer in (torch.nn.Linear(width, width), torch.nn.ReLU())
+            ]
+        )
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return self.layers(x)
+
+
+class TransformerBlock(torch.nn.Module):
+    def __init__(self, dim: int, num_heads: int) -> None:
+        super().__init__()
+        self.num_heads = num_heads
+        self.attention_norm = torch.nn.LayerNorm(dim)
+        self.qkv = torch.nn.Linear(dim, 3 * dim)
+        self.proj = torch.nn.Linear(dim, dim)
+        self.ffn_norm = torch.nn.LayerNorm(dim)
+        self.fc1 = torch.nn.Linear(dim, 4 * dim)
+        self.fc2 = torch.nn.Linear(4 * dim, dim)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        batch, seq_len, dim = x.shape
+        head_dim = dim // self.num_heads
+        q, k, v = (
+            self.qkv(self.attention_norm(x))
+            .reshape(batch, seq_len, 3, self.num_heads, head_dim)
+            .permute(2, 0, 3, 1, 4)
+        )
+        scores = torch.softmax(q @ k.transpose(-2, -1) / head_dim**0.5, dim=-1)
+        attention = (scores @ v).transpose(1, 2).reshape(batch, seq_len, dim)
+        x = x + self.proj(attention)
+        return x + self.fc2(torch.nn.functional.gelu(self.fc1(self.ffn_norm(x))))
+
+
+class Transformer(torch.nn.Module):
+    def __init__(self, num_layers: int, dim: int = 64, num_heads: int = 4) -> None:
+        super().__init__()
+        self.layers = torch.nn.Sequential(
+            *[TransformerBlock(dim, num_heads) for _ in range(num_layers)]
+        )
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return self.layers(x)
+
+
+class ManyPartitions(torch.nn.Module):
+    """
+    Alternates an add, which XNNPACK delegates, with a cumsum, which it does
+    not, so that each add is a partition of its own.
+    """
+
+    def __init__(self, num_partitions: int) -> None:
+        super().__init__()
+        self.num_partitions = num_partitions
+
+    def forward(self, x: torch.Tensor, y: torch.Tensor) -> torch.Tensor:
+        for _ in range(self.num_partitions):
+            x = torch.cumsum(x + y, dim=-1)
+        return x
+
+
+class ControlFlow(torch.nn.Module):
+    """
+    Chains a cond, whose branches hold a delegable matmul, with a map.
+    """
+
+    def __init__(self, num_blocks: int, width: int = 16) -> None:
+        super().__init__()
+        self.num_blocks = num_blocks
+        self.weight = torch.nn.Parameter(torch.randn(width, width))
+
+    def forward(self, x: torch.Tensor, ys: torch.Tensor) -> torch.Tensor:
+        for i in range(self.num_blocks):
+            x = torch.cond(
+                x.sum() > i,
+                lambda x: torch.relu(x @ self.weight),
+                lambda x: x - 1.0,
+                (x,),
+            )
+            x = x + torch_map(lambda y, x: y * x + 1.0, ys, x).sum(0)
+        return x
+
+
+# Each model is created from its size: the number of layers, of partitions or
+# of control flow blocks.
+MODELS: Dict[str, Callable[[int], Tuple[torch.nn.Module, Inputs]]] = {
+    "mlp": lambda size: (MLP(size), (torch.randn(8, 64),)),
+    "transformer": lambda size: (Transformer(size), (torch.randn(1, 16, 64),)),
+    "many_partitions": lambda size: (
+        ManyPartitions(size),
+        (torch.randn(4, 16), torch.randn(4, 16)),
+    ),
+    "control_flow": lambda size: (
+        ControlFlow(size),
+        (torch.randn(4, 16), torch.randn(3, 4, 16)),
+    ),
+}
+
+
+@dataclass
+class ExportBenchmarkResult:
+    model: str
+    size: int
+    stage: str
+    # Fastest of the timed runs.
+    seconds: float
+    # Peak of the python memory allocated during the stage, over the memory
+    # allocated when it started.
+    traced_peak_bytes: int
+    # Nodes in the graphs of the resulting program, including those of its
+    # control flow submodules. None for the serialization stages.
+    nodes: Optional[int] = None
+    # Size of the serialized program, for serialize_pte_binary.
+    pte_bytes: Optional[int] = None
+
+
+def _count_nodes(program_manager: Any) -> int:
+    num_nodes = 0
+    for method in program_manager.methods:
+        graph_module = program_manager.exported_program(method).graph_module
+        for submodule in graph_module.modules():
+            if isinstance(submodule, torch.fx.GraphModule):
+                num_nodes += len(submodule.graph.nodes)
+    return num_nodes
+
+
+def _run_stages(
+    model: str, size: int, module: torch.nn.Module, inputs: Inputs, trace_memory: bool
+) -> List[ExportBenchmarkResult]:
+    results: List[ExportBenchmarkResult] = []
+
+    def run_stage(stage: str, fn: Callable[[], Any]) -> Any:
+        with ExportProfiler(trace_memory=trace_memory):
+            with profile_stage(stage) as event:
+                output = fn()
+        assert event is not None
+        results.append(
+            ExportBenchmarkResult(
+                model,
+                size,
+                stage,
+                event.duration_us / 1e6,
+                event.traced_peak_delta,
+            )
+        )
+        return output
+
+    # to_edge_transform_and_lower consumes its exported program.
+    exported_program = export(module, inputs)
+    edge = run_stage("to_edge", lambda: to_edge(exported_program))
+    results[-1].nodes = _count_nodes(edge)
+
+    exported_program = export(module, inputs)
+    lowered = run_stage(
+        "to_edge_transform_and_lower",
+        lambda: to_edge_transform_and_lower(
+            exported_program, partitioner=[XnnpackPartitioner()]
+        ),
+    )
+    results[-1].nodes = _count_nodes(lowered)
+
+    executorch_program = run_stage("to_executorch", lowered.to_executorch)
+    results[-1].nodes = _count_nodes(executorch_program)
+
+    pte_data = run_stage(
+        "serialize_pte_binary",
+        lambda: bytes(_serialize_pte_binary(executorch_program.executorch_program)),
+    )
+    results[-1].pte_bytes = len(pte_data)
+
+    run_stage("deserialize_pte_binary", lambda: _deserialize_pte_binary(pte_data))
+    return results
+
+
+def run_benchmark(
+    model: str, size: int, repeats: int = 3, seed: int = 0
+) -> List[ExportBenchmarkResult]:
+    torch.manual_seed(seed)
+    module, inputs = MODELS[model](size)
+    # The traced run also warms up the caches of the export stack, its times
+    # are only kept if there are no timed runs.
+    results = _run_stages(model, size, module, inputs, trace_memory=True)
+    timed_runs = [
+        _run_stages(model, size, module, inputs, trace_memory=False)
+        for _ in range(repeats)
+    ]
+    for i, result in enumerate(results):
+        if timed_runs:
+            result.seconds = min(timed_run[i].seconds for timed_run in timed_runs)
+    return results
+
+
+def compare_results(
+    baseline: List[Dict[str, Any]],
+    results: List[ExportBenchmarkResult],
+    max_slowdown: float,
+    min_seconds: float = 0.01,
+) -> List[str]:
+    """
+    Prints how the results compare to those of the baseline, and returns the
+    stages that are more than max_slowdown times slower. Stages faster than
+    min_seconds in the baseline are too noisy to be reported.
+    """
+    baseline_results = {
+        (result["model"], result["size"], result["stage"]): result
+        for result in baseline
+    }
+    regressions = []
+    for result in results:
+        key = (result.model, result.size, result.stage)
+        if key not in baseline_results:
+            continue
+        expected = baseline_results[key]
+        slowdown = result.seconds / max(expected["seconds"], 1e-9)
+        memory_ratio = result.traced_peak_bytes / max(expected["traced_peak_bytes"], 1)
+        print(
+            f"{result.model:>16} {result.size:>5} {result.stage:>28}: "
+            f"{slowdown:6.2f}x time, {memory_ratio:6.2f}x memory"
+        )
+        if slowdown > max_slowdown and expected["seconds"] >= min_seconds:
+            regressions.append(f"{result.model} {result.size} {result.stage}")
+    return regressions
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        choices=sorted(MODELS.keys()),
+        default=sorted(MODELS.keys()),
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[2, 8, 32],
+        help="Number of layers, partitions or control flow blocks of each model.",
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=3,
+        help="Number of timed runs, on top of the one that traces memory.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument(
+        "--baseline", help="Compare the results to those in this JSON file."
+    )
+    parser.add_argument(
+        "--max_slowdown",
+        type=float,
+        default=1.2,
+        help="Exit with an error if a stage is this many times slower than in "
+        "the baseline.",
+    )
+    parsed = parser.parse_args(args)
+
+    results: List[ExportBenchmarkResult] = []
+    for model in parsed.models:
+        for size in parsed.sizes:
+            for result in run_benchmark(
+                model, size, repeats=parsed.repeats, seed=parsed.seed
+            ):
+                print(
+                    f"{result.model:>16} {result.size:>5} {result.stage:>28}: "
+                    f"{result.seconds:8.3f} s, {result.traced_peak_bytes:>12} bytes"
+                )
+                results.append(result)
+
+    if parsed.output:
+        with open(parsed.output, "w") as f:
+            json.dump([asdict(r) for r in results], f, indent=2)
+
+    if parsed.baseline:
+        with open(parsed.baseline) as f:
+            regressions = compare_results(json.load(f), results, parsed.max_slowdown)
+        if regressions:
+            sys.exit(f"Slower than the baseline: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()  # pragma: no cover
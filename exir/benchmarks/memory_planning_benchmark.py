@@ -0,0 +1,150 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-strict
+
+"""
+Benchmarks memory planning algorithms on synthetic graphs.
+
+Each graph is a chain of memory.alloc nodes whose tensors are consumed by a
+few later nodes, with sizes drawn from a mix of small and large activations.
+Only the planning step is timed; the graphs are never executed.
+
+    python -m executorch.exir.benchmarks.memory_planning_benchmark \\
+        --num_specs 1000 10000 100000 --output results.json
+"""
+
+import argparse
+import json
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+
+from executorch.exir.memory_planning import (
+    best_fit,
+    collect_specs_from_nodes,
+    greedy,
+    materialize_buffer,
+    naive,
+    pick_shared_obj,
+    SharedObject,
+    update_all_tensors_lifetime,
+)
+from executorch.exir.tensor import TensorSpec
+from executorch.exir.tests.memory_planning_graphs import make_synthetic_graph
+from torch import fx
+
+ALGOS: Dict[str, Callable[..., List[int]]] = {
+    "naive": naive,
+    "greedy": greedy,
+    "best_fit": best_fit,
+}
+
+
+@dataclass
+class MemoryPlanningResult:
+    algo: str
+    num_specs: int
+    seconds: float
+    # Planned size of each memory buffer, indexed by mem_id.
+    bufsizes: List[int]
+
+
+def _reset_specs(graph_module: fx.GraphModule) -> None:
+    for node in graph_module.graph.nodes:
+        spec = node.meta.get("spec")
+        if isinstance(spec, TensorSpec):
+            spec.init_mem_planning_fields()
+
+
+def _greedy_linear_scan(
+    graph_module: fx.GraphModule, alignment: int, *args: object
+) -> List[int]:
+    """
+    greedy with the shared object picked by a linear scan; the arena size is
+    the same as greedy, so this only serves as a timing baseline.
+    """
+    shared_objects: List[SharedObject] = []
+    for spec in collect_specs_from_nodes(graph_module.graph.nodes):
+        spec.mem_id = 1
+        spec.realign(alignment)
+        pick_shared_obj(shared_objects, spec)
+    return [0, materialize_buffer(shared_objects)]
+
+
+def run_benchmark(
+    num_specs: int,
+    algos: List[str],
+    alignment: int = 16,
+    seed: int = 0,
+    max_linear_scan_specs: int = 10000,
+) -> List[MemoryPlanningResult]:
+    graph_module = make_synthetic_graph(num_specs, seed)
+    algo_fns: Dict[str, Callable[..., List[int]]] = {
+        name: ALGOS[name] for name in algos
+    }
+    if num_specs <= max_linear_scan_specs:
+        algo_fns["greedy_linear_scan"] = _greedy_linear_scan
+
+    results = []
+    for name, algo in algo_fns.items():
+        _reset_specs(graph_module)
+        update_all_tensors_lifetime(graph_module)
+        start = time.perf_counter()
+        bufsizes = algo(graph_module, alignment, None, True, True)
+        seconds = time.perf_counter() - start
+        results.append(MemoryPlanningResult(name, num_specs, seconds, bufsizes))
+    return results
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--num_specs",
+        type=int,
+        nargs="+",
+        default=[1000, 10000, 100000],
+        help="Number of tensor specs in each synthetic graph.",
+    )
+    parser.add_argument(
+        "--algos",
+        nargs="+",
+        choices=sorted(ALGOS.keys()),
+        default=sorted(ALGOS.keys()),
+    )
+    parser.add_argument("--alignment", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--max_linear_scan_specs",
+        type=int,
+        default=10000,
+        help="Also time the linear-scan greedy baseline up to this many specs.",
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parsed = parser.parse_args(args)
+
+    results: List[MemoryPlanningResult] = []
+    for num_specs in parsed.num_specs:
+        for result in run_benchmark(
+            num_specs,
+            parsed.algos,
+            alignment=parsed.alignment,
+            seed=parsed.seed,
+            max_linear_scan_specs=parsed.max_linear_scan_specs,
+        ):
+            print(
+                f"{result.algo:>20} {result.num_specs:>8} specs: "
+                f"{result.seconds:8.3f} s, {sum(result.bufsizes):>12} bytes"
+            )
+            results.append(result)
+
+    if parsed.output:
+        with open(parsed.output, "w") as f:
+            json.dump([asdict(r) for r in results], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()  # pragma: no cover
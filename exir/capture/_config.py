@@ -11,6 +11,7 @@ from typing import Dict, List, Optional, Union
 import torch
 
 from executorch.exir.dynamic_shape import DynamicMemoryPlanningMode
+from executorch.exir.export_profiler import ExportProfiler
 from executorch.exir.pass_manager import PassType
 from executorch.exir.passes import MemoryPlanningPass, ToOutVarPass
 from executorch.exir.passes.sym_shape_eval_pass import ConstraintBasedSymShapeEvalPass
@@ -89,3 +90,8 @@ class ExecutorchBackendConfig:
     # If set to true, view_copy operations will be converted to lightweight
     # view operations in the ET runtime
     remove_view_copy: bool = True
+
+    # If set, the stages of to_executorch are recorded with this profiler,
+    # which is activated for the duration of the call. See
+    # exir/export_profiler.py.
+    profiler: Optional[ExportProfiler] = None
@@ -332,6 +332,11 @@ class EdgeOpOverload:
     def __call__(self, *args, **kwargs):
         return self._op(*args, **kwargs)
 
+    def __deepcopy__(self, memo=None):
+        # Like torch._ops.OpOverload, edge ops are singletons. Without this,
+        # __getattr__ would forward to the deepcopy of the aten op.
+        return self
+
     def __repr__(self):
         return "<EdgeOpOverload: {}>: schema = {}".format(
             self.__name__, self._schema.schema
@@ -96,6 +96,71 @@ from torch.utils import _pytree as pytree
 from typing_extensions import TypeAlias
 
 
+def _storage_to_memoryview(storage: torch.UntypedStorage) -> memoryview:
+    """Returns a read-only view of the bytes of a CPU storage, without copying them.
+
+    The view keeps the storage alive, so the data stays valid as long as the view is in use.
+    """
+    array = (ctypes.c_char * storage.nbytes()).from_address(storage.data_ptr())
+    # The array does not own its memory; hold on to the storage that does.
+    array._storage = storage  # pyre-ignore[16]
+    return memoryview(array).cast("B").toreadonly()
+
+
+class _BufferDeduplicator:
+    """Finds buffers whose data is the same as that of a new buffer.
+
+    Buffers are first looked up by a fingerprint of their length and of the bytes at their head
+    and tail, which is cheap to compute even for very large buffers. Only when fingerprints match
+    are the full buffers hashed to confirm that their contents are the same, so unique weights are
+    never hashed in full.
+    """
+
+    # Number of bytes at each end of a buffer that go into its fingerprint.
+    _FINGERPRINT_BYTES: int = 64 * 1024
+
+    def __init__(self) -> None:
+        # Fingerprint -> indices of the buffers with that fingerprint.
+        self._fingerprints: Dict[bytes, List[int]] = {}
+        # Buffer index -> digest of the whole buffer, computed on demand.
+        self._digests: Dict[int, bytes] = {}
+
+    def _fingerprint(self, data: memoryview) -> bytes:
+        fingerprint = hashlib.sha256(len(data).to_bytes(8, "little"))
+        if len(data) <= 2 * self._FINGERPRINT_BYTES:
+            fingerprint.update(data)
+        else:
+            fingerprint.update(data[: self._FINGERPRINT_BYTES])
+            fingerprint.update(data[-self._FINGERPRINT_BYTES :])
+        return fingerprint.digest()
+
+    def _digest(self, idx: int, data: memoryview) -> bytes:
+        if idx not in self._digests:
+            self._digests[idx] = hashlib.sha256(data).digest()
+        return self._digests[idx]
+
+    def find(self, data: memoryview, buffers: List[Buffer]) -> Tuple[int, bytes]:
+        """Returns the index in buffers of a buffer with the same contents as data, or -1.
+
+        Also returns the fingerprint of data, to be passed to add() if data is added as a new
+        buffer.
+        """
+        fingerprint = self._fingerprint(data)
+        candidates = self._fingerprints.get(fingerprint, [])
+        if len(data) <= 2 * self._FINGERPRINT_BYTES:
+            # The fingerprint covers all of the data.
+            return (candidates[0] if candidates else -1), fingerprint
+        digest = hashlib.sha256(data).digest() if candidates else None
+        for idx in candidates:
+            if self._digest(idx, memoryview(buffers[idx].storage)) == digest:
+                return idx, fingerprint
+        return -1, fingerprint
+
+    def add(self, idx: int, fingerprint: bytes) -> None:
+        """Records that the buffer at idx has the given fingerprint."""
+        self._fingerprints.setdefault(fingerprint, []).append(idx)
+
+
 @dataclass
 class _ProgramState:
     """State shared between all methods of a program and the graph module it represents.
@@ -110,8 +175,12 @@ class _ProgramState:
     # Weights in any arbitrary graph_module only need to compare against weights from previously
     # emitted graph modules, not any weights emitted from itself. This should speed up the lookup,
     # from O(N) to O(1)
-    cached_spec_hash_values: Dict[str, int] = field(default_factory=dict)
-    cached_spec_mutable_hash_values: Dict[str, int] = field(default_factory=dict)
+    constant_buffer_deduplicator: _BufferDeduplicator = field(
+        default_factory=_BufferDeduplicator
+    )
+    mutable_buffer_deduplicator: _BufferDeduplicator = field(
+        default_factory=_BufferDeduplicator
+    )
     # The 0 index is reserved to be pointed to by non-constant tensors, so add an empty placeholder.
     constant_buffer: List[Buffer] = field(default_factory=lambda: [Buffer(storage=b"")])
     # The 0 index is reserved to be pointed to by non-constant tensors, so add an empty placeholder.
@@ -367,30 +436,21 @@ class _Emitter(torch.fx.Interpreter):
 
         if spec.const:
             # Tensor with a blob we need to serialize. May not actually be constant at runtime
-            # if it's a weight with an associated gradient
-            spec_array_type = (
-                ctypes.c_char * typing.cast(torch.UntypedStorage, spec.storage).nbytes()
-            )
-
+            # if it's a weight with an associated gradient. The blob is a view of the tensor's
+            # storage rather than a copy, so weights are not duplicated in memory.
             buffer_data = (
-                bytes(
-                    ctypes.cast(
-                        typing.cast(torch.UntypedStorage, spec.storage).data_ptr(),
-                        ctypes.POINTER(spec_array_type),
-                    ).contents
-                )
+                _storage_to_memoryview(typing.cast(torch.UntypedStorage, spec.storage))
                 if spec.allocated_memory != 0
-                else b""
+                else memoryview(b"")
             )
 
-            hashed = hashlib.sha256(buffer_data).hexdigest()
-
             if allocation_info:
-                buffer_idx = self.program_state.cached_spec_mutable_hash_values.get(
-                    hashed, -1
-                )
+                buffers = self.program_state.mutable_buffer
+                deduplicator = self.program_state.mutable_buffer_deduplicator
             else:
-                buffer_idx = self.program_state.cached_spec_hash_values.get(hashed, -1)
+                buffers = self.program_state.constant_buffer
+                deduplicator = self.program_state.constant_buffer_deduplicator
+            buffer_idx, fingerprint = deduplicator.find(buffer_data, buffers)
 
             # Haven't seen this constant before
             if buffer_idx == -1:
@@ -398,17 +458,9 @@ class _Emitter(torch.fx.Interpreter):
                 buffer = Buffer(storage=buffer_data)
                 self.program_state.allocated_specs.append(spec)
                 # +1 because the first buffer location is reserved
-
-                if allocation_info:
-                    buffer_idx = len(self.program_state.mutable_buffer)
-                    self.program_state.cached_spec_mutable_hash_values[hashed] = (
-                        buffer_idx
-                    )
-                    self.program_state.mutable_buffer.append(buffer)
-                else:
-                    buffer_idx = len(self.program_state.constant_buffer)
-                    self.program_state.cached_spec_hash_values[hashed] = buffer_idx
-                    self.program_state.constant_buffer.append(buffer)
+                buffer_idx = len(buffers)
+                deduplicator.add(buffer_idx, fingerprint)
+                buffers.append(buffer)
 
             if spec.const and spec.nbytes() != len(buffer_data):
                 raise InternalError(
@@ -1669,3 +1669,34 @@ class TestEmit(unittest.TestCase):
         input = torch.zeros(1)
         executorch_model(input)
         self.assertEqual(input, torch.ones(1))
+
+    def test_emit_large_constant_deduplication(self) -> None:
+        class LargeConstants(torch.nn.Module):
+            def __init__(self) -> None:
+                super().__init__()
+                # Large enough for their fingerprints to not cover all of the data.
+                self.register_buffer("a", torch.ones(256, 256))
+                self.register_buffer("b", torch.ones(256, 256))
+                # Same head and tail as a and b, but different data in between.
+                different = torch.ones(256, 256)
+                different[128, 128] = 2
+                self.register_buffer("c", different)
+
+            def forward(self, x: torch.Tensor) -> torch.Tensor:
+                return x + self.a + self.b + self.c
+
+        program = (
+            to_edge(export(LargeConstants(), (torch.ones(256, 256),)))
+            .to_executorch()
+            .executorch_program
+        )
+        # reserved spot, a and b, c
+        self.assertEqual(len(program.constant_buffer), 3)
+        for buffer in program.constant_buffer[1:]:
+            # Constants are views of the tensors' storage, not copies.
+            self.assertIsInstance(buffer.storage, memoryview)
+            self.assertEqual(len(buffer.storage), 256 * 256 * 4)
+        self.assertNotEqual(
+            bytes(program.constant_buffer[1].storage),
+            bytes(program.constant_buffer[2].storage),
+        )
@@ -0,0 +1,325 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-strict
+
+"""
+Profiler of the stages of an export: passes, partitioning, backend preprocess,
+emission and serialization.
+
+Profiling is opt-in: activate an ExportProfiler as a context manager, or set
+it as ExecutorchBackendConfig.profiler to only profile to_executorch. Every
+stage that runs while it is active is recorded with its wall time, the growth
+of the peak RSS of the process, the peak of the memory allocated by python
+(with tracemalloc), and the number of nodes in the graph before and after it.
+tracemalloc only has one peak for the whole process, so the python memory of
+the stages that overlap with stages recorded in other threads, e.g. within
+program._program.concurrent_methods(), isn't recorded.
+The stages can then be viewed as a table with summary(), or in
+chrome://tracing or Perfetto with save_chrome_trace().
+
+    with ExportProfiler() as profiler:
+        to_edge(exported_program).to_executorch()
+    print(profiler.summary())
+    profiler.save_chrome_trace("export_trace.json")
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import torch
+from torch.fx.passes.infra.pass_base import PassResult
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _max_rss() -> int:
+    """Returns the peak resident set size of the process, in bytes."""
+    if resource is None:
+        return 0
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, and in kilobytes elsewhere.
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+@dataclass
+class ProfileEvent:
+    name: str
+    # One of "stage", "pass", "partition", "preprocess", "emit" or "serialize".
+    category: str
+    start_us: float
+    duration_us: float = 0.0
+    # Nesting level of the event among the events that were active around it.
+    depth: int = 0
+    thread_id: int = 0
+    # Growth of the peak RSS of the process during the event.
+    max_rss_delta: int = 0
+    # Peak of the python memory allocated during the event, over the memory
+    # allocated when it started. Zero unless tracemalloc is enabled, and no
+    # other thread recorded events while this one was active.
+    traced_peak_delta: int = 0
+    nodes_before: Optional[int] = None
+    nodes_after: Optional[int] = None
+    # The graph module that nodes_after is counted in, which a pass may
+    # replace.
+    graph_module: Optional[torch.fx.GraphModule] = None
+
+
+def _count_nodes(graph_module: Optional[torch.fx.GraphModule]) -> Optional[int]:
+    if graph_module is None:
+        return None
+    return len(graph_module.graph.nodes)
+
+
+class ExportProfiler:
+    """
+    Records the stages of an export that run while it is active.
+
+    Args:
+        trace_memory: Whether to record the peak python memory of each stage
+            with tracemalloc, which slows the export down noticeably.
+    """
+
+    def __init__(self, trace_memory: bool = True) -> None:
+        self.trace_memory = trace_memory
+        self.events: List[ProfileEvent] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # Number of active events of each thread that records events.
+        self._recording: Dict[int, int] = {}
+        # Bumped when a thread starts recording while another one is, which
+        # invalidates the traced memory of the events active at the time.
+        self._memory_generation = 0
+        self._start_ns: int = time.perf_counter_ns()
+        self._active = 0
+        self._previous: List[Optional["ExportProfiler"]] = []
+        self._started_tracemalloc = False
+
+    def __enter__(self) -> "ExportProfiler":
+        global _PROFILER
+        self._previous.append(_PROFILER)
+        _PROFILER = self
+        self._active += 1
+        if self._active == 1 and self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        global _PROFILER
+        _PROFILER = self._previous.pop()
+        self._active -= 1
+        if self._active == 0 and self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _stack(self) -> List[Tuple[ProfileEvent, int]]:
+        # Events active in this thread, with the highest traced memory seen
+        # while they were, which events nested in them reset.
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def record(
+        self,
+        name: str,
+        category: str,
+        graph_module: Optional[torch.fx.GraphModule] = None,
+    ) -> Iterator[ProfileEvent]:
+        """
+        Records the code run in the context as an event, and yields it. The
+        nodes after the event are counted in event.graph_module, which
+        defaults to graph_module.
+        """
+        stack = self._stack()
+        thread_id = threading.get_ident()
+        traced_start = 0
+        with self._lock:
+            self._recording[thread_id] = self._recording.get(thread_id, 0) + 1
+            if len(self._recording) > 1:
+                self._memory_generation += 1
+            memory_generation = self._memory_generation
+            # Resetting the peak would lose the one of the other threads.
+            tracing = tracemalloc.is_tracing() and len(self._recording) == 1
+            if tracing:
+                traced_start, traced_peak = tracemalloc.get_traced_memory()
+                if stack:
+                    parent, parent_peak = stack[-1]
+                    stack[-1] = (parent, max(parent_peak, traced_peak))
+                tracemalloc.reset_peak()
+        event = ProfileEvent(
+            name=name,
+            category=category,
+            start_us=(time.perf_counter_ns() - self._start_ns) / 1000,
+            depth=len(stack),
+            thread_id=thread_id,
+            nodes_before=_count_nodes(graph_module),
+            graph_module=graph_module,
+        )
+        max_rss_start = _max_rss()
+        stack.append((event, 0))
+        try:
+            yield event
+        finally:
+            _, peak = stack.pop()
+            event.duration_us = (
+                time.perf_counter_ns() - self._start_ns
+            ) / 1000 - event.start_us
+            event.max_rss_delta = _max_rss() - max_rss_start
+            with self._lock:
+                self._recording[thread_id] -= 1
+                if self._recording[thread_id] == 0:
+                    del self._recording[thread_id]
+                if (
+                    tracing
+                    and memory_generation == self._memory_generation
+                    and tracemalloc.is_tracing()
+                ):
+                    peak = max(peak, tracemalloc.get_traced_memory()[1])
+                    event.traced_peak_delta = max(0, peak - traced_start)
+                    if stack:
+                        parent, parent_peak = stack[-1]
+                        stack[-1] = (parent, max(parent_peak, peak))
+            event.nodes_after = _count_nodes(event.graph_module)
+            # Don't keep the graph alive.
+            event.graph_module = None
+            with self._lock:
+                self.events.append(event)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """
+        Returns the events in the Chrome trace event format, as complete
+        events whose args hold the memory and node counts.
+        """
+        with self._lock:
+            events = sorted(self.events, key=lambda e: e.start_us)
+        thread_ids: Dict[int, int] = {}
+        for e in events:
+            thread_ids.setdefault(e.thread_id, len(thread_ids))
+        return {
+            "traceEvents": [
+                {
+                    "name": e.name,
+                    "cat": e.category,
+                    "ph": "X",
+                    "ts": e.start_us,
+                    "dur": e.duration_us,
+                    "pid": os.getpid(),
+                    "tid": thread_ids[e.thread_id],
+                    "args": {
+                        "max_rss_delta": e.max_rss_delta,
+                        "traced_peak_delta": e.traced_peak_delta,
+                        "nodes_before": e.nodes_before,
+                        "nodes_after": e.nodes_after,
+                    },
+                }
+                for e in events
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def save_chrome_trace(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+    def summary(self, top: Optional[int] = None) -> str:
+        """
+        Returns a table of the events aggregated by category and name,
+        sorted by total time, optionally limited to the top ones.
+        """
+        rows: Dict[Tuple[str, str], List[ProfileEvent]] = {}
+        with self._lock:
+            for event in self.events:
+                rows.setdefault((event.category, event.name), []).append(event)
+        aggregated = sorted(
+            rows.items(),
+            key=lambda item: sum(e.duration_us for e in item[1]),
+            reverse=True,
+        )[:top]
+
+        header = (
+            f"{'category':<10} {'name':<48} {'count':>5} {'total s':>9} "
+            f"{'max s':>8} {'max rss MB':>10} {'peak py MB':>10} {'nodes':>13}"
+        )
+        lines = [header, "-" * len(header)]
+        for (category, name), events in aggregated:
+            first, last = events[0], events[-1]
+            nodes = (
+                f"{first.nodes_before}->{last.nodes_after}"
+                if first.nodes_before is not None
+                else ""
+            )
+            lines.append(
+                f"{category:<10} {name[:48]:<48} {len(events):>5} "
+                f"{sum(e.duration_us for e in events) / 1e6:>9.3f} "
+                f"{max(e.duration_us for e in events) / 1e6:>8.3f} "
+                f"{sum(e.max_rss_delta for e in events) / 2**20:>10.1f} "
+                f"{max(e.traced_peak_delta for e in events) / 2**20:>10.1f} "
+                f"{nodes:>13}"
+            )
+        return "\n".join(lines)
+
+
+_PROFILER: Optional[ExportProfiler] = None
+
+
+def get_export_profiler() -> Optional[ExportProfiler]:
+    """Returns the active ExportProfiler, if any."""
+    return _PROFILER
+
+
+@contextmanager
+def profile_stage(
+    name: str,
+    category: str = "stage",
+    graph_module: Optional[torch.fx.GraphModule] = None,
+) -> Iterator[Optional[ProfileEvent]]:
+    """
+    Records the code run in the context with the active ExportProfiler, if
+    any, and yields its event, or else None. Also usable as a decorator.
+    """
+    profiler = _PROFILER
+    if profiler is None:
+        yield None
+        return
+    with profiler.record(name, category, graph_module) as event:
+        yield event
+
+
+def _pass_name(pass_: Callable[..., Any]) -> str:
+    name = getattr(pass_, "__name__", None)
+    return name if isinstance(name, str) else type(pass_).__name__
+
+
+def profile_pass(
+    pass_: Callable[[torch.fx.GraphModule], Optional[PassResult]],
+) -> Callable[[torch.fx.GraphModule], Optional[PassResult]]:
+    """
+    Wraps a pass so that each run of it is recorded with the active
+    ExportProfiler, if any.
+    """
+    name = _pass_name(pass_)
+
+    def wrapper(graph_module: torch.fx.GraphModule) -> Optional[PassResult]:
+        with profile_stage(name, "pass", graph_module) as event:
+            result = pass_(graph_module)
+            if event is not None and result is not None:
+                event.graph_module = result.graph_module
+            return result
+
+    wrapper.__name__ = name
+    return wrapper
@@ -7,6 +7,7 @@
 # pyre-strict
 
 import copy
+import heapq
 import operator
 from collections import defaultdict
 from typing import Any, Dict, List, Optional, Set, Tuple, Union
@@ -43,8 +44,6 @@ from torch.export.exported_program import (
 from torch.fx.passes.utils.fuser_utils import (
     erase_nodes,
     fuse_as_graphmodule,
-    insert_subgm,
-    legalize_graph,
     NodeList,
     topo_sort,
 )
@@ -739,6 +738,7 @@ def create_submodule_from_nodes(
         toplevel graph module calling the submodule
     """
     sorted_nodes = topo_sort(node_list)
+    before, after = _get_partition_bounds(sorted_nodes)
 
     submodule_name = "fused_" + tag
     sub_gm, orig_inputs, orig_outputs = fuse_as_graphmodule(
@@ -747,18 +747,29 @@ def create_submodule_from_nodes(
 
     _fixup_output_node(sub_gm)
 
-    gm = insert_subgm(gm, sub_gm, orig_inputs, orig_outputs)
-    submodule_node = None
-    for node in gm.graph.nodes:
-        if node.op == "call_module":
-            if node.target == submodule_name:
-                submodule_node = node
-            else:
-                raise RuntimeError(
-                    f"The submodule created with nodes {node_list} did not form \
-                    one fully contained subgraph. Check that these nodes form a \
-                    fully contained graph. Partitioned graph: {gm.graph}."
-                )
+    # Insert the call_module node after the partition rather than at the end of
+    # the graph, so only the nodes between its first and last node need to be
+    # reordered below.
+    gm.add_submodule(submodule_name, sub_gm)
+    with gm.graph.inserting_before(after):
+        submodule_node = gm.graph.call_module(submodule_name, args=orig_inputs)
+        if len(orig_outputs) == 1:
+            orig_outputs[0].replace_all_uses_with(submodule_node, propagate_meta=True)
+        else:
+            for i, orig_output in enumerate(orig_outputs):
+                proxy_out = torch.fx.Proxy(submodule_node)[i].node  # type: ignore[index]
+                orig_output.replace_all_uses_with(proxy_out, propagate_meta=True)
+            submodule_node.meta["val"] = tuple(
+                orig_output.meta.get("val", None) for orig_output in orig_outputs
+            )
+
+    for node in gm.graph.find_nodes(op="call_module"):
+        if node.target != submodule_name:
+            raise RuntimeError(
+                f"The submodule created with nodes {node_list} did not form \
+                one fully contained subgraph. Check that these nodes form a \
+                fully contained graph. Partitioned graph: {gm.graph}."
+            )
 
     if len(orig_outputs) == 1 and isinstance(orig_outputs[0].meta["val"], FakeTensor):
         # If the original output is a single tensor, it has been
@@ -786,25 +797,83 @@ def create_submodule_from_nodes(
     # TODO : T153794167 Get rid of support for skipping legalize graph in create_submodule_from_nodes
     # once we transition to using fuse_by_partitions.
     if not skip_legalize_graph:
-        legalize_graph(gm)
+        _legalize_nodes_between(before, after)
 
-    # Get the call_module node
-    submodule_node = None
-    for node in gm.graph.nodes:
-        if node.op == "call_module" and node.target == submodule_name:
-            submodule_node = node
-        elif node.op == "call_module":
-            raise RuntimeError(
-                f"The submodule created with nodes {node_list} did not form \
-                one fully contained subgraph. Check that these nodes form a \
-                fully contained graph. Partitioned graph: {gm.graph}."
-            )
+    return sub_gm, submodule_node
 
-    assert (
-        submodule_node is not None
-    ), f"No submodule was created with the nodes {node_list} in the graph {gm.graph}"
 
-    return sub_gm, submodule_node
+def _get_partition_bounds(
+    sorted_nodes: NodeList,
+) -> Tuple[torch.fx.Node, torch.fx.Node]:
+    """
+    Returns the nodes right before and after the span of the graph holding the
+    given partition, excluding its placeholders which stay at the start of the
+    graph. Walks outwards from one of the partition nodes, so this is linear in
+    the size of the span rather than of the graph.
+    """
+    partition = set(sorted_nodes)
+    remaining = {node for node in sorted_nodes if node.op != "placeholder"}
+    if len(remaining) == 0:
+        # Only constant placeholders, the call_module node goes after them.
+        after = sorted_nodes[0]
+        while after.op == "placeholder":
+            after = after.next
+        before = after.prev
+    else:
+        first = last = start = next(iter(remaining))
+        remaining.discard(start)
+        prev_node, next_node = start.prev, start.next
+        while remaining:
+            if prev_node.op != "root":
+                if prev_node in remaining:
+                    first = prev_node
+                    remaining.discard(prev_node)
+                prev_node = prev_node.prev
+            if next_node.op != "root":
+                if next_node in remaining:
+                    last = next_node
+                    remaining.discard(next_node)
+                next_node = next_node.next
+        before, after = first.prev, last.next
+
+    # The nodes of the partition are erased once it is fused.
+    while before in partition:
+        before = before.prev
+    return before, after
+
+
+def _legalize_nodes_between(before: torch.fx.Node, after: torch.fx.Node) -> None:
+    """
+    Stable topological sort of the nodes between before and after, in place.
+    The nodes outside of this span must already be in a valid order.
+    """
+    nodes = []
+    node = before.next
+    while node is not after:
+        nodes.append(node)
+        node = node.next
+
+    position = {node: i for i, node in enumerate(nodes)}
+    indegree = {
+        node: sum(1 for n in node.all_input_nodes if n in position) for node in nodes
+    }
+    candidates = [(position[node], node) for node in nodes if indegree[node] == 0]
+    heapq.heapify(candidates)
+    sorted_nodes = []
+    while candidates:
+        _, node = heapq.heappop(candidates)
+        sorted_nodes.append(node)
+        for user in node.users:
+            if user in indegree:
+                indegree[user] -= 1
+                if indegree[user] == 0:
+                    heapq.heappush(candidates, (position[user], user))
+
+    if len(sorted_nodes) != len(nodes):
+        raise RuntimeError(f"Found dependency cycles among the nodes {nodes}")
+    if sorted_nodes != nodes:
+        for node in sorted_nodes:
+            after.prepend(node)
 
 
 def get_lowered_submodules(
@@ -6,6 +6,8 @@
 
 # pyre-strict
 
+import bisect
+import heapq
 import itertools
 import logging
 import operator
@@ -498,8 +500,10 @@ def pick_shared_obj(
     r"""
     Pick the available shared object with closest size to the tensor.
     If there are no available shared object left, create a new one.
+
+    This scans every shared object; greedy uses SharedObjectIndex instead,
+    which makes the same choice without the linear scan.
     """
-    # TODO: do better than linear scan
     picked = None
     for sobj in shared_objects:
         if spec.lifetime[0] > sobj.last_used_index:
@@ -507,17 +511,120 @@ def pick_shared_obj(
                 picked, spec
             ):
                 picked = sobj
-                sobj.last_used_index = spec.lifetime[1]
-                sobj.size = max(sobj.size, spec.allocated_memory)
     if picked is None:
         picked = SharedObject(
             len(shared_objects), -1, spec.allocated_memory, spec.lifetime[1]
         )
         shared_objects.append(picked)
+    else:
+        picked.last_used_index = spec.lifetime[1]
+        picked.size = max(picked.size, spec.allocated_memory)
 
     return picked
 
 
+class SharedObjectIndex:
+    r"""
+    Index over the shared objects of a single memory buffer, used to pick the
+    same shared object as pick_shared_obj in O(log n) instead of O(n).
+
+    Shared objects that are still in use sit in a min-heap keyed on
+    last_used_index. Before picking for a tensor, every object whose
+    last_used_index precedes the tensor's lifetime is released into a free
+    list sorted by (size, idx), where the closest size is found by bisection.
+
+    Tensors are expected to arrive in roughly increasing order of lifetime
+    start, which is the order collect_specs_from_nodes produces. A tensor that
+    starts before an already-released point falls back to a linear scan so
+    that the result is always the same as pick_shared_obj.
+    """
+
+    def __init__(self, shared_objects: Optional[List[SharedObject]] = None) -> None:
+        self.shared_objects: List[SharedObject] = (
+            shared_objects if shared_objects is not None else []
+        )
+        # (last_used_index, idx) of objects not yet released. Entries whose
+        # last_used_index no longer matches the object are stale and skipped.
+        self._in_use: List[Tuple[int, int]] = [
+            (sobj.last_used_index, sobj.idx) for sobj in self.shared_objects
+        ]
+        heapq.heapify(self._in_use)
+        # (size, idx) of released objects, sorted.
+        self._free: List[Tuple[int, int]] = []
+        # idx -> size key in self._free.
+        self._free_sizes: Dict[int, int] = {}
+        # Every object with last_used_index < _released_before has been moved
+        # to the free list.
+        self._released_before: int = -1
+
+    def _release(self, node_idx: int) -> None:
+        while self._in_use and self._in_use[0][0] < node_idx:
+            last_used_index, idx = heapq.heappop(self._in_use)
+            sobj = self.shared_objects[idx]
+            if sobj.last_used_index != last_used_index:
+                continue
+            bisect.insort(self._free, (sobj.size, idx))
+            self._free_sizes[idx] = sobj.size
+        self._released_before = node_idx
+
+    def _first_free_with_size(self, size: int) -> SharedObject:
+        pos = bisect.bisect_left(self._free, (size, -1))
+        return self.shared_objects[self._free[pos][1]]
+
+    def _closest_free(self, size: int) -> Optional[SharedObject]:
+        r"""
+        Return the free object closest in size, preferring the lowest idx on
+        ties like pick_shared_obj does.
+        """
+        pos = bisect.bisect_left(self._free, (size, -1))
+        larger = (
+            self.shared_objects[self._free[pos][1]] if pos < len(self._free) else None
+        )
+        smaller = (
+            self._first_free_with_size(self._free[pos - 1][0]) if pos > 0 else None
+        )
+        if larger is None or smaller is None:
+            return larger or smaller
+        larger_dif = larger.size - size
+        smaller_dif = size - smaller.size
+        if larger_dif != smaller_dif:
+            return larger if larger_dif < smaller_dif else smaller
+        return larger if larger.idx < smaller.idx else smaller
+
+    def _scan(self, start: int, size: int) -> Optional[SharedObject]:
+        picked = None
+        for sobj in self.shared_objects:
+            if start > sobj.last_used_index:
+                if picked is None or abs(sobj.size - size) < abs(picked.size - size):
+                    picked = sobj
+        return picked
+
+    def pick(self, spec: TensorSpec) -> SharedObject:
+        r"""
+        Pick the available shared object with closest size to the tensor.
+        If there are no available shared object left, create a new one.
+        """
+        start, end = spec.lifetime
+        size = spec.allocated_memory
+        if start >= self._released_before:
+            self._release(start)
+            picked = self._closest_free(size)
+        else:
+            picked = self._scan(start, size)
+
+        if picked is None:
+            picked = SharedObject(len(self.shared_objects), -1, size, end)
+            self.shared_objects.append(picked)
+        else:
+            if picked.idx in self._free_sizes:
+                free_size = self._free_sizes.pop(picked.idx)
+                del self._free[bisect.bisect_left(self._free, (free_size, picked.idx))]
+            picked.last_used_index = end
+            picked.size = max(picked.size, size)
+        heapq.heappush(self._in_use, (end, picked.idx))
+        return picked
+
+
 def get_node_tensor_specs(
     node: torch.fx.Node,
 ) -> Union[List[TensorSpec], Tuple[TensorSpec]]:
@@ -553,7 +660,7 @@ def greedy(
     alloc_graph_output: bool = True,
 ) -> List[int]:
     spec2obj = {}
-    shared_objects = defaultdict(list)
+    shared_objects = defaultdict(SharedObjectIndex)
     # Don't do assertion in collect_specs_from_nodes if we have already encountered
     # and ignored some to_out_variant errors.
     do_assertion = not getattr(graph_module, "encounter_to_out_var_failure", False)
@@ -570,7 +677,7 @@ def greedy(
         if spec.mem_id is None:
             spec.mem_id = 1
         spec.realign(alignment)
-        spec2obj[spec] = pick_shared_obj(shared_objects[spec.mem_id], spec)
+        spec2obj[spec] = shared_objects[spec.mem_id].pick(spec)
 
     if len(shared_objects) == 0:
         # Cannot find any tensor in the graph that needs to be allocated.
@@ -584,7 +691,7 @@ def greedy(
                 if len(bufsizes) > mem_id:
                     input_total_size = bufsizes[mem_id]
             total_sizes[mem_id] = materialize_buffer(
-                shared_objects[mem_id], input_total_size
+                shared_objects[mem_id].shared_objects, input_total_size
             )
 
         # Since we now know the number of shared objects we need and the size of
@@ -638,6 +745,244 @@ def naive(
     return bufsizes
 
 
+class _OffsetPlacer:
+    r"""
+    Places tensors at offsets of a single memory buffer, in the smallest gap
+    left by the already placed tensors whose lifetimes overlap.
+    """
+
+    # Granularity, in node indices, of the index of placed tensors. Blocks
+    # rather than single node indices keep long-lived tensors from being
+    # listed many times.
+    BLOCK_SIZE = 32
+
+    def __init__(self, base_offset: int = 0) -> None:
+        self.base_offset = base_offset
+        # End of the storage used so far.
+        self.size: int = base_offset
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._offsets: List[int] = []
+        self._sizes: List[int] = []
+        # Indices of the placed tensors alive in each block of node indices.
+        self._blocks: List[List[int]] = []
+
+    def _conflicts(self, start: int, end: int) -> List[int]:
+        blocks = self._blocks[start // self.BLOCK_SIZE : end // self.BLOCK_SIZE + 1]
+        conflicts = [
+            i
+            for i in set().union(*blocks)
+            if self._starts[i] <= end and self._ends[i] >= start
+        ]
+        conflicts.sort(key=self._offsets.__getitem__)
+        return conflicts
+
+    def find_offset(
+        self, start: int, end: int, size: int, capacity: Optional[int] = None
+    ) -> Optional[int]:
+        r"""
+        Return the offset of the smallest gap that fits size bytes for the
+        lifetime [start, end], or the end of the conflicting tensors if no gap
+        does. Return None if that would end past capacity.
+        """
+        offset = None
+        best_gap = 0
+        prev_end = self.base_offset
+        for i in self._conflicts(start, end):
+            gap = self._offsets[i] - prev_end
+            if gap >= size and (offset is None or gap < best_gap):
+                offset, best_gap = prev_end, gap
+            if self._offsets[i] + self._sizes[i] > prev_end:
+                prev_end = self._offsets[i] + self._sizes[i]
+        if offset is None:
+            if capacity is not None and prev_end + size > capacity:
+                return None
+            offset = prev_end
+        return offset
+
+    def place(self, start: int, end: int, size: int, offset: int) -> None:
+        idx = len(self._offsets)
+        self._starts.append(start)
+        self._ends.append(end)
+        self._offsets.append(offset)
+        self._sizes.append(size)
+        last_block = end // self.BLOCK_SIZE
+        if last_block >= len(self._blocks):
+            self._blocks.extend([] for _ in range(last_block - len(self._blocks) + 1))
+        for block in range(start // self.BLOCK_SIZE, last_block + 1):
+            self._blocks[block].append(idx)
+        self.size = max(self.size, offset + size)
+
+
+def best_fit(
+    graph_module: torch.fx.GraphModule,
+    alignment: int,
+    graph_signature: Optional[ExportGraphSignature] = None,
+    alloc_graph_input: bool = True,
+    alloc_graph_output: bool = True,
+) -> List[int]:
+    r"""
+    Place each tensor at its own offset instead of in a shared object.
+
+    Tensors are placed from largest to smallest. Each one goes into the
+    smallest gap between the already placed tensors whose lifetimes overlap
+    with its own, or after all of them if no gap is large enough. Unlike
+    greedy, a small tensor never takes up the whole slot of a larger one, so
+    this usually needs less memory when tensor sizes vary a lot.
+
+    mem_obj_id is left unset since tensors do not share whole objects.
+    """
+    bufsizes = getattr(graph_module, "input_mem_buffer_sizes", None)
+    bufsizes = list(bufsizes) if bufsizes is not None else [0, 0]
+    do_assertion = not getattr(graph_module, "encounter_to_out_var_failure", False)
+
+    specs_by_mem_id: Dict[int, List[TensorSpec]] = defaultdict(list)
+    for spec in collect_specs_from_nodes(
+        graph_module.graph.nodes,
+        graph_signature,
+        do_assertion=do_assertion,
+        ignore_graph_input=not alloc_graph_input,
+        ignore_graph_output=not alloc_graph_output,
+    ):
+        if spec.mem_id is None:
+            spec.mem_id = 1
+        spec.realign(alignment)
+        specs_by_mem_id[spec.mem_id].append(spec)
+
+    for mem_id, specs in specs_by_mem_id.items():
+        if mem_id >= len(bufsizes):
+            bufsizes.extend([0] * (mem_id - len(bufsizes) + 1))
+        placer = _OffsetPlacer(bufsizes[mem_id])
+        sized_specs = [(spec.allocated_memory, spec) for spec in specs]
+        # Largest first; ties broken by lifetime to keep the result stable.
+        sized_specs.sort(key=lambda x: (-x[0], x[1].lifetime[0], x[1].lifetime[1]))
+        for size, spec in sized_specs:
+            start, end = spec.lifetime
+            offset = placer.find_offset(start, end, size)
+            assert offset is not None
+            placer.place(start, end, size, offset)
+            spec.mem_offset = offset
+        bufsizes[mem_id] = placer.size
+
+    logging.debug(f"best_fit algorithm returns bufsizes: {bufsizes}")
+    return bufsizes
+
+
+@dataclass
+class MemoryArena:
+    r"""
+    A memory buffer that MultiArenaAlgo can place tensors in.
+    """
+
+    # index of the buffer in non_const_buffer_sizes
+    mem_id: int
+    # maximum size of the buffer in bytes, or None if unbounded
+    capacity: Optional[int] = None
+    # relative cost of accessing the buffer; cheaper arenas are filled first
+    cost: float = 1.0
+
+
+class MultiArenaAlgo:
+    r"""
+    Memory planning algorithm that spreads tensors over several arenas with
+    capacities, e.g. a small fast SRAM and a large DRAM.
+
+    Tensors whose mem_id is already set, e.g. by a backend, are placed in that
+    arena first. The rest are taken from the shortest-lived to the
+    longest-lived, smaller ones first on ties, and each goes into the
+    cheapest arena where it fits without exceeding the capacity, at the
+    offset best_fit would pick. Short-lived activations are the hottest per
+    byte, so they end up in the cheap arenas while the rest spills over to
+    the expensive ones.
+
+    apply_algo also keeps the blocks of control flow submodules within the
+    capacities, moving a block to the next arena when it would overflow its
+    own.
+    """
+
+    def __init__(self, arenas: List[MemoryArena]) -> None:
+        if not arenas:
+            raise ValueError("MultiArenaAlgo needs at least one arena")
+        mem_ids = [arena.mem_id for arena in arenas]
+        if len(set(mem_ids)) != len(mem_ids):
+            raise ValueError(f"Arenas have duplicate mem_ids: {mem_ids}")
+        if any(mem_id < 1 for mem_id in mem_ids):
+            # mem_id 0 is reserved for constants.
+            raise ValueError(f"Arena mem_ids must be positive: {mem_ids}")
+        self.arenas: List[MemoryArena] = sorted(arenas, key=lambda a: a.cost)
+        # Capacity of each arena, from the cheapest to the most expensive.
+        self.capacities: Dict[int, Optional[int]] = {
+            arena.mem_id: arena.capacity for arena in self.arenas
+        }
+
+    def __repr__(self) -> str:
+        return f"MultiArenaAlgo({self.arenas})"
+
+    def __call__(
+        self,
+        graph_module: torch.fx.GraphModule,
+        alignment: int,
+        graph_signature: Optional[ExportGraphSignature] = None,
+        alloc_graph_input: bool = True,
+        alloc_graph_output: bool = True,
+    ) -> List[int]:
+        bufsizes = getattr(graph_module, "input_mem_buffer_sizes", None)
+        bufsizes = list(bufsizes) if bufsizes is not None else [0, 0]
+        max_mem_id = max(arena.mem_id for arena in self.arenas)
+        if max_mem_id >= len(bufsizes):
+            bufsizes.extend([0] * (max_mem_id - len(bufsizes) + 1))
+        do_assertion = not getattr(graph_module, "encounter_to_out_var_failure", False)
+
+        capacities = self.capacities
+        placers: Dict[int, _OffsetPlacer] = {}
+
+        def place(spec: TensorSpec, mem_id: int) -> bool:
+            if mem_id not in placers:
+                if mem_id >= len(bufsizes):
+                    bufsizes.extend([0] * (mem_id - len(bufsizes) + 1))
+                placers[mem_id] = _OffsetPlacer(bufsizes[mem_id])
+            start, end = spec.lifetime
+            size = spec.allocated_memory
+            offset = placers[mem_id].find_offset(
+                start, end, size, capacities.get(mem_id)
+            )
+            if offset is None:
+                return False
+            placers[mem_id].place(start, end, size, offset)
+            spec.mem_id = mem_id
+            spec.mem_offset = offset
+            return True
+
+        unassigned = []
+        for spec in collect_specs_from_nodes(
+            graph_module.graph.nodes,
+            graph_signature,
+            do_assertion=do_assertion,
+            ignore_graph_input=not alloc_graph_input,
+            ignore_graph_output=not alloc_graph_output,
+        ):
+            spec.realign(alignment)
+            if spec.mem_id is None:
+                unassigned.append(spec)
+            elif not place(spec, spec.mem_id):
+                raise RuntimeError(
+                    f"{spec} does not fit in arena {spec.mem_id} of capacity "
+                    f"{capacities[spec.mem_id]} bytes"
+                )
+
+        unassigned.sort(
+            key=lambda s: (s.lifetime[1] - s.lifetime[0], s.allocated_memory)
+        )
+        for spec in unassigned:
+            if not any(place(spec, arena.mem_id) for arena in self.arenas):
+                raise RuntimeError(f"{spec} does not fit in any of {self.arenas}")
+
+        for mem_id, placer in placers.items():
+            bufsizes[mem_id] = placer.size
+        logging.debug(f"multi_arena algorithm returns bufsizes: {bufsizes}")
+        return bufsizes
+
+
 def get_cond_nodes(graph_module: torch.fx.GraphModule) -> Iterable[Node]:
     for nd in graph_module.graph.nodes:
         if nd.target is torch.ops.higher_order.cond:
@@ -717,6 +1062,123 @@ def insert_calls_to_free(
     graph_module.recompile()
 
 
+def _get_planned_specs(graph_module: torch.fx.GraphModule) -> List[TensorSpec]:
+    r"""
+    Return the specs with a planned memory offset in graph_module and all of
+    its submodules, each spec once.
+    """
+    seen: Set[int] = set()
+    planned = []
+    for module in graph_module.modules():
+        if not isinstance(module, torch.fx.GraphModule):
+            continue
+        for node in module.graph.nodes:
+            for spec in tree_flatten(node.meta.get("spec"))[0]:
+                if (
+                    isinstance(spec, TensorSpec)
+                    and spec.mem_offset is not None
+                    and id(spec) not in seen
+                ):
+                    seen.add(id(spec))
+                    planned.append(spec)
+    return planned
+
+
+def _find_free_offset(intervals: Iterable[Tuple[int, int]], size: int) -> int:
+    r"""
+    Return the lowest offset where size bytes do not overlap with any of the
+    [start, end) intervals.
+    """
+    offset = 0
+    for start, end in sorted(intervals):
+        if start - offset >= size:
+            break
+        offset = max(offset, end)
+    return offset
+
+
+def _get_live_specs_at_control_flow_nodes(
+    graph_module: torch.fx.GraphModule, specs: Iterable[TensorSpec]
+) -> Dict[Node, List[TensorSpec]]:
+    r"""
+    Return the planned specs alive at each control flow node of graph_module.
+    """
+    planned_specs = [spec for spec in specs if spec.mem_offset is not None]
+    live_specs = {}
+    for node_idx, node in enumerate(graph_module.graph.nodes):
+        if node.target in (
+            torch.ops.higher_order.cond,
+            exir_while,
+            torch.ops.higher_order.map_impl,
+        ):
+            live_specs[node] = [
+                spec
+                for spec in planned_specs
+                if spec.lifetime[0] <= node_idx <= spec.lifetime[1]
+            ]
+    return live_specs
+
+
+def _place_submodules(
+    submodules: List[torch.fx.GraphModule],
+    live_specs: List[TensorSpec],
+    block_sizes: List[int],
+    capacities: Optional[Dict[int, Optional[int]]] = None,
+) -> List[int]:
+    r"""
+    Move the specs of submodules, planned as a block starting at offset 0, to
+    the lowest offsets where they do not overlap any of live_specs.
+
+    capacities maps the mem_id of capped buffers to their capacity, from the
+    cheapest to the most expensive buffer. The part of the block in a capped
+    buffer that would end past its capacity is moved to the next buffer where
+    it fits.
+
+    Returns the end of the moved block in each buffer.
+    """
+    capacities = capacities or {}
+    spill_order = list(capacities.keys())
+    used: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+    for spec in live_specs:
+        used[spec.mem_id].append(
+            (spec.mem_offset, spec.mem_offset + spec.allocated_memory)
+        )
+
+    # Buffer and offset that the part of the block in each buffer moves to.
+    moves: Dict[int, Tuple[int, int]] = {}
+    block_ends = [0] * len(block_sizes)
+    for mem_id, size in enumerate(block_sizes):
+        if size == 0:
+            continue
+        targets = [mem_id]
+        if mem_id in capacities:
+            targets += spill_order[spill_order.index(mem_id) + 1 :]
+        for target in targets:
+            offset = _find_free_offset(used[target], size)
+            capacity = capacities.get(target)
+            if capacity is None or offset + size <= capacity:
+                break
+        else:
+            raise RuntimeError(
+                f"Control flow block of {size} bytes in buffer {mem_id} does not "
+                f"fit in any of the buffers {targets} with capacities "
+                f"{[capacities.get(target) for target in targets]}"
+            )
+        moves[mem_id] = (target, offset)
+        used[target].append((offset, offset + size))
+        if target >= len(block_ends):
+            block_ends.extend([0] * (target - len(block_ends) + 1))
+        block_ends[target] = max(block_ends[target], offset + size)
+
+    for submodule in submodules:
+        for spec in _get_planned_specs(submodule):
+            spec.mem_id, offset = moves.get(spec.mem_id, (spec.mem_id, 0))
+            spec.mem_offset += offset
+    for submodule in submodules:
+        submodule.meta.update({"non_const_buffer_sizes": block_ends})
+    return block_ends
+
+
 def apply_algo(
     algo: Callable[
         [torch.fx.GraphModule, int, Optional[ExportGraphSignature], bool, bool],
@@ -727,56 +1189,96 @@ def apply_algo(
     graph_signature: Optional[ExportGraphSignature] = None,
     alloc_graph_input: bool = True,
     alloc_graph_output: bool = True,
+    capacities: Optional[Dict[int, Optional[int]]] = None,
 ) -> List[int]:
     """
     Recursively apply algo to graph_module and its submodules for control flow.
 
-    Quite naively right now since it does not take the following optimizations
-    into considerating:
-    1. for conditional structure, true branch and false true does not overlap
-       in lifetime and can share tensor storage
-    2. tensors inside a submodule (e.g. true branch) has opportunities to share
-       storage with tensors in the outer module.
-    TODO: make these optimizations once we have some baseline working.
+    Tensors inside the submodules of a control flow node are only alive while
+    that node runs. The submodules of each node are planned together as one
+    block starting at offset 0, and the block is then moved to the lowest
+    offset where it does not overlap any outer tensor alive at that node.
+    Blocks of different control flow nodes may therefore share storage with
+    each other and with outer tensors. The true and false branches of a cond
+    never run together, so both start at the beginning of the block.
+
+    Blocks are kept within capacities, see _place_submodules, which default to
+    those of the arenas of a MultiArenaAlgo.
     """
+    if capacities is None and isinstance(algo, MultiArenaAlgo):
+        capacities = algo.capacities
     specs = update_all_tensors_lifetime(graph_module, graph_signature)
     bufsizes: List[int] = algo(
         graph_module, alignment, graph_signature, alloc_graph_input, alloc_graph_output
     )
+    # Must come before insert_calls_to_free, which renumbers the nodes.
+    live_specs = _get_live_specs_at_control_flow_nodes(graph_module, specs)
     insert_calls_to_free(graph_module, specs)
 
-    def handle_submodule(
-        submodule_nd: torch.fx.Node, alloc_graph_input: bool = False
-    ) -> None:
-        nonlocal bufsizes
+    def plan_submodule(
+        submodule_nd: torch.fx.Node,
+        input_mem_buffer_sizes: Optional[List[int]] = None,
+        alloc_graph_input: bool = False,
+    ) -> Tuple[torch.fx.GraphModule, List[int]]:
         assert submodule_nd.op == "get_attr"
         submodule = getattr(graph_module, submodule_nd.target)
         # memory planning for submodule need to be aware of the amount of
-        # buffer already allocated.
-        submodule.input_mem_buffer_sizes = bufsizes
-        bufsizes = apply_algo(
+        # buffer already allocated in its block.
+        submodule.input_mem_buffer_sizes = input_mem_buffer_sizes or [0] * len(bufsizes)
+        sizes = apply_algo(
             algo,
             submodule,
             alignment,
             graph_signature,
             alloc_graph_input=alloc_graph_input,
             alloc_graph_output=True,
+            capacities=capacities,
+        )
+        return submodule, sizes
+
+    def place_submodules(
+        node: torch.fx.Node,
+        submodules: List[torch.fx.GraphModule],
+        block_sizes: List[int],
+    ) -> None:
+        nonlocal bufsizes
+        block_ends = _place_submodules(
+            submodules, live_specs[node], block_sizes, capacities
         )
-        submodule.meta.update({"non_const_buffer_sizes": bufsizes})
+        bufsizes = [
+            max(sizes)
+            for sizes in itertools.zip_longest(bufsizes, block_ends, fillvalue=0)
+        ]
 
     for cond_node in get_cond_nodes(graph_module):
-        handle_submodule(typing.cast(torch.fx.Node, cond_node.args[1]))
-        handle_submodule(typing.cast(torch.fx.Node, cond_node.args[2]))
+        # Both branches start at the beginning of the block.
+        true_branch, true_sizes = plan_submodule(
+            typing.cast(torch.fx.Node, cond_node.args[1])
+        )
+        false_branch, false_sizes = plan_submodule(
+            typing.cast(torch.fx.Node, cond_node.args[2])
+        )
+        block_sizes = [
+            max(sizes)
+            for sizes in itertools.zip_longest(true_sizes, false_sizes, fillvalue=0)
+        ]
+        place_submodules(cond_node, [true_branch, false_branch], block_sizes)
 
     for while_node in get_while_nodes(graph_module):
-        handle_submodule(typing.cast(torch.fx.Node, while_node.args[0]))
-        handle_submodule(typing.cast(torch.fx.Node, while_node.args[1]))
+        cond_fn, block_sizes = plan_submodule(
+            typing.cast(torch.fx.Node, while_node.args[0])
+        )
+        body_fn, block_sizes = plan_submodule(
+            typing.cast(torch.fx.Node, while_node.args[1]), block_sizes
+        )
+        place_submodules(while_node, [cond_fn, body_fn], block_sizes)
     # TODO: Add test coverage for map operator once dynamo tracing is
     # fully supported for this. T142287208
     for map_node in get_map_nodes(graph_module):
-        handle_submodule(
+        body_fn, block_sizes = plan_submodule(
             typing.cast(torch.fx.Node, map_node.args[0]), alloc_graph_input=True
         )
+        place_submodules(map_node, [body_fn], block_sizes)
 
     graph_module.meta.update({"non_const_buffer_sizes": bufsizes})
 
@@ -10,6 +10,53 @@ from torch.export import ExportedProgram
 from torch.fx import GraphModule
 from torch.fx.passes.infra.pass_base import PassResult
 
+# Key of the DebugHandleAllocator in the meta of a graph module.
+_DEBUG_HANDLE_ALLOCATOR = "debug_handle_allocator"
+
+
+class DebugHandleAllocator:
+    """
+    Allocates new debug handles for a graph module, above all the ones of its
+    nodes and the nodes of its control flow submodules, without rescanning
+    them for each handle.
+    """
+
+    def __init__(self, next_handle: int) -> None:
+        self.next_handle = next_handle
+
+    def allocate(self) -> int:
+        handle = self.next_handle
+        self.next_handle += 1
+        return handle
+
+
+def _max_debug_handle(graph_module: GraphModule) -> int:
+    max_handle = 0
+    queue = [graph_module]
+    while queue:
+        current_graph_module = queue.pop(0)
+        for node in current_graph_module.graph.nodes:
+            max_handle = max(max_handle, node.meta.get("debug_handle") or 0)
+        queue.extend(
+            submodule
+            for _, submodule, _ in get_control_flow_submodules(current_graph_module)
+        )
+    return max_handle
+
+
+def get_debug_handle_allocator(graph_module: GraphModule) -> DebugHandleAllocator:
+    """
+    Returns the allocator attached to graph_module by DebugHandleGeneratorPass,
+    or attaches one after the largest debug handle in graph_module. Passes
+    that rebuild the graph module drop the allocator, those that modify it in
+    place must only add nodes with the debug handles it allocates.
+    """
+    allocator = graph_module.meta.get(_DEBUG_HANDLE_ALLOCATOR)
+    if allocator is None:
+        allocator = DebugHandleAllocator(_max_debug_handle(graph_module) + 1)
+        graph_module.meta[_DEBUG_HANDLE_ALLOCATOR] = allocator
+    return allocator
+
 
 class DebugHandleGeneratorPass(ExportPass):
     def call(self, graph_module: GraphModule) -> PassResult:
@@ -30,6 +77,7 @@ class DebugHandleGeneratorPass(ExportPass):
                 for _, submodule, _ in get_control_flow_submodules(current_graph_module)
             ]
             queue.extend(control_flow_submodules)
+        graph_module.meta[_DEBUG_HANDLE_ALLOCATOR] = DebugHandleAllocator(index)
         return PassResult(graph_module, True)
 
 
@@ -63,3 +111,4 @@ def generate_missing_debug_handles(ep: ExportedProgram):
                 max_handle += 1
         control_flow_submodules = get_control_flow_submodules_list(current_graph_module)
         queue.extend(control_flow_submodules)
+    ep.graph_module.meta[_DEBUG_HANDLE_ALLOCATOR] = DebugHandleAllocator(max_handle + 1)
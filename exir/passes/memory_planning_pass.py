@@ -34,6 +34,10 @@ class MemoryPlanningPass(PassBase):
         alignment: int = ALIGNMENT,
     ) -> None:
         r"""
+        memory_planning_algo is one of the algorithms in
+        executorch.exir.memory_planning, e.g. naive, greedy, best_fit, or a
+        MultiArenaAlgo to spread tensors over arenas with capacities.
+
         alloc_graph_input/alloc_graph_output will have 4 different combinations
         to control if the memory planning algorithm need allocate memory for
         the graph input/output. The default behavior is the algorithm will allocate
@@ -265,10 +265,12 @@ def pretty_print(obj: Any, indent: int = 0, out: Optional[TextIO] = None) -> Non
         print(obj, end="", file=out)
         return
 
-    if isinstance(obj, bytes):
+    if isinstance(obj, (bytes, memoryview)):
         r = reprlib.Repr()
         r.maxother = 1024
-        print(r.repr(obj), end="", file=out)
+        # Only copy as much of a memoryview as can be printed.
+        data = bytes(obj[: r.maxother + 1]) if isinstance(obj, memoryview) else obj
+        print(r.repr(data), end="", file=out)
         return
 
     if isinstance(obj, list):
@@ -9,6 +9,7 @@
 from executorch.exir.program._fake_program import get_fake_program
 from executorch.exir.program._program import (
     _to_edge,
+    concurrent_methods,
     edge_to_executorch_passes,
     EdgeProgramManager,
     ExecutorchProgram,
@@ -24,6 +25,7 @@ __all__ = [
     "_to_edge",
     "to_edge",
     "to_edge_transform_and_lower",
+    "concurrent_methods",
     "edge_to_executorch_passes",
     "EdgeProgramManager",
     "ExecutorchProgramManager",
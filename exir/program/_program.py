@@ -6,10 +6,25 @@
 
 # pyre-unsafe
 
+import contextlib
 import copy
 import io
 import logging
-from typing import Any, Dict, List, Optional, Sequence, Set, TextIO, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    TextIO,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 import torch
 import torch._export
@@ -22,6 +37,7 @@ from executorch.exir.capture._config import EdgeCompileConfig, ExecutorchBackend
 from executorch.exir.emit import emit_program, EmitterOutput
 from executorch.exir.emit._emitter import _DelegateDebugIdentifierMap
 from executorch.exir.error import ExportError
+from executorch.exir.export_profiler import profile_pass, profile_stage
 from executorch.exir.graph_module import get_control_flow_submodules
 from executorch.exir.pass_base import PassBase
 from executorch.exir.pass_manager import PassType
@@ -86,6 +102,63 @@ aten_op_to_transform_op = {}
 # Map from the transformed ops registered in the edge_no_decomp_namespace to aten ops.
 transform_op_to_aten_op = {}
 
+# Number of threads that run the memory planning of the methods in
+# to_executorch. Set with concurrent_methods().
+_METHOD_WORKERS: int = 1
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+
+@contextlib.contextmanager
+def concurrent_methods(
+    max_workers: Optional[int] = None,
+) -> Generator[None, None, None]:
+    """
+    Runs the memory planning of the methods in to_executorch in a pool of up
+    to max_workers threads (default: one per method). The methods are still
+    emitted together, in order, so constants shared by several methods are
+    still stored once.
+
+    The other per-method stages, like partitioning, backend preprocess and
+    the edge to executorch passes, trace or interpret FX graphs. Those rely
+    on the process-global node meta state of torch.fx.traceback, which
+    threads would overwrite for each other, so they run one method at a time.
+
+    Each method runs with its own copy of the memory planning pass, so it
+    must support copy.deepcopy(). The speedup depends on how much of the time
+    memory planning spends in code that releases the GIL.
+    """
+    global _METHOD_WORKERS
+    existing_workers = _METHOD_WORKERS
+    _METHOD_WORKERS = max_workers or 0
+    try:
+        yield
+    finally:
+        _METHOD_WORKERS = existing_workers
+
+
+def _method_workers(num_methods: int) -> int:
+    """Returns the number of threads to process num_methods methods with."""
+    if _METHOD_WORKERS == 1 or num_methods <= 1:
+        return 1
+    return num_methods if _METHOD_WORKERS == 0 else min(_METHOD_WORKERS, num_methods)
+
+
+def _map_methods(fn: Callable[[str, _T], _R], methods: Dict[str, _T]) -> Dict[str, _R]:
+    """
+    Returns fn(name, value) for each method, in the same order, running them
+    concurrently within concurrent_methods().
+    """
+    workers = _method_workers(len(methods))
+    if workers == 1:
+        return {name: fn(name, value) for name, value in methods.items()}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            name: executor.submit(fn, name, value) for name, value in methods.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
 
 def _get_updated_range_constraints(gm):
     def get_shape_env(gm):
@@ -179,7 +252,7 @@ def _get_updated_graph_signature(
 
 
 def _transform(self, *passes: PassType) -> "ExportedProgram":
-    pm = PassManager(list(passes))
+    pm = PassManager([profile_pass(p) for p in passes])
     res = pm(self.graph_module)
     transformed_gm = res.graph_module if res is not None else self.graph_module
     assert transformed_gm is not None
@@ -420,7 +493,7 @@ class ExirExportedProgram:
         config = config or ExecutorchBackendConfig()
         new_gm = self.exported_program.graph_module
         for p in edge_to_executorch_passes(config):
-            new_gm_res = p(new_gm)
+            new_gm_res = profile_pass(p)(new_gm)
             assert new_gm_res is not None
             new_gm = new_gm_res.graph_module
 
@@ -618,7 +691,7 @@ def _to_edge(ep, config: EdgeCompileConfig) -> "ExirExportedProgram":
             new_gm = new_gm_res.graph_module
 
     for p in post_op_replace_passes:
-        new_gm_res = p(new_gm)
+        new_gm_res = profile_pass(p)(new_gm)
         assert new_gm_res is not None
         new_gm = new_gm_res.graph_module
 
@@ -699,6 +772,63 @@ def edge_to_executorch_passes(
     return passes
 
 
+def _run_executorch_passes(
+    program: ExportedProgram, passes: List[PassType]
+) -> Tuple[ExportedProgram, torch.fx.GraphModule, ExportGraphSignature]:
+    """
+    Runs the edge to executorch passes on one method, and returns the graph
+    module and signature to memory plan.
+    """
+    program = weights_to_outputs_pass(program)
+    program = unsafe_remove_auto_functionalized_pass(program)
+    gm, new_signature = insert_write_back_for_buffers_pass(program)
+    new_gm = program.graph_module
+    for p in passes:
+        new_gm_res = profile_pass(p)(new_gm)
+        assert new_gm_res is not None
+        new_gm = new_gm_res.graph_module
+        if isinstance(p, SpecPropPass):
+            # Note that this is a hacky way to get around the fact that
+            # placeholder nodes corresponding to the parameters of the graph module
+            # shall not participate in memory planning. It increases runtime memory
+            # footprint.
+            # Proper way would be to have ExportPass work with ExportedProgram
+            # instead of GraphModule. This is because ExportPass should work
+            # on top of the export artifact of torch.export whichi s ExportedProgram.
+            # Working with GraphModule does not provide all the information contained
+            # in the ExportedProgram
+            # TODO(who?)
+            p.update_placeholder_tensor_specs(program, new_gm)
+    return program, new_gm, new_signature
+
+
+def _plan_memory(
+    program: ExportedProgram,
+    new_gm: torch.fx.GraphModule,
+    new_signature: ExportGraphSignature,
+    memory_planning_pass: Any,
+) -> ExportedProgram:
+    """
+    Runs memory planning on one method. Unlike the passes, it neither traces
+    nor interprets the graph, so it can run concurrently with that of others.
+    """
+    # TODO(jakeszwe): Follow up with compiler on if the deepcopy is necessary and if so how to make it work
+    with profile_stage(type(memory_planning_pass).__name__, "pass", new_gm) as event:
+        if hasattr(memory_planning_pass, "run"):
+            new_gm_res = memory_planning_pass.run(  # pyre-ignore[16]
+                new_gm, new_signature
+            )
+        else:
+            new_gm_res = memory_planning_pass(new_gm)  # pyre-ignore[29]
+        if event is not None and new_gm_res is not None:
+            event.graph_module = new_gm_res.graph_module
+    assert new_gm_res is not None
+    new_gm = new_gm_res.graph_module
+
+    _copy_module(program.graph_module, new_gm)
+    return program
+
+
 def _generate_edge_program(
     name: str,
     config: EdgeCompileConfig,
@@ -730,7 +860,7 @@ def _generate_edge_program(
 
     gm = program.graph_module
     for p in passes:
-        gm_res = p(gm)
+        gm_res = profile_pass(p)(gm)
         assert gm_res is not None
         gm = gm_res.graph_module
 
@@ -957,6 +1087,7 @@ def _gen_edge_manager_for_partitioners(
     return edge_manager
 
 
+@profile_stage("to_edge_transform_and_lower")
 def to_edge_transform_and_lower(
     programs: Union[ExportedProgram, Dict[str, ExportedProgram]],
     transform_passes: Optional[
@@ -1029,10 +1160,25 @@ def to_edge_transform_and_lower(
     if transform_passes is not None:
         edge_manager = edge_manager.transform(transform_passes)
 
-    if partitioner is not None:
-        for name, partitioner_list in partitioner.items():
-            for curr_partitioner in partitioner_list:
-                edge_manager = edge_manager.to_backend({name: curr_partitioner})
+    if any(partitioner.values()):
+        method_partitioners = {
+            name: partitioner.get(name, []) for name in edge_manager._edge_programs
+        }
+
+        def lower(name: str, program: ExportedProgram) -> ExportedProgram:
+            for curr_partitioner in method_partitioners[name]:
+                program = to_backend(program, curr_partitioner)
+            return program
+
+        with profile_stage("to_backend"):
+            edge_manager = EdgeProgramManager(
+                {
+                    name: lower(name, program)
+                    for name, program in edge_manager._edge_programs.items()
+                },
+                copy.deepcopy(edge_manager._config_methods),
+                EdgeCompileConfig(_check_ir_validity=False),
+            )
 
     for name, program in edge_manager._edge_programs.items():
         ops_set_to_not_decompose: Set[torch._ops.OpOverload] = set()
@@ -1110,6 +1256,7 @@ def to_edge_with_preserved_ops(
     )
 
 
+@profile_stage("to_edge")
 def to_edge(
     programs: Union[ExportedProgram, Dict[str, ExportedProgram]],
     constant_methods: Optional[Dict[str, Any]] = None,
@@ -1206,6 +1353,7 @@ class EdgeProgramManager:
         """
         return self._edge_programs[method_name]
 
+    @profile_stage("transform")
     def transform(
         self,
         passes: Union[Sequence[PassType], Dict[str, Sequence[PassType]]],
@@ -1253,6 +1401,7 @@ class EdgeProgramManager:
             new_programs, copy.deepcopy(self._config_methods), compile_config
         )
 
+    @profile_stage("to_backend")
     def to_backend(
         self, partitioner: Union[Partitioner, Dict[str, Partitioner]]
     ) -> "EdgeProgramManager":
@@ -1312,49 +1461,41 @@ class EdgeProgramManager:
             after it has been transformed to the ExecuTorch backend.
         """
         config = config if config else ExecutorchBackendConfig()
+        with config.profiler or contextlib.nullcontext():
+            with profile_stage("to_executorch"):
+                return self._to_executorch(config)
 
-        execution_programs: Dict[str, ExportedProgram] = {}
+    def _to_executorch(
+        self, config: ExecutorchBackendConfig
+    ) -> "ExecutorchProgramManager":
+        concurrent = _method_workers(len(self._edge_programs)) > 1
+        planning_inputs: Dict[
+            str, Tuple[ExportedProgram, torch.fx.GraphModule, ExportGraphSignature]
+        ] = {}
+        memory_planning_passes: Dict[str, Any] = {}
         for name, program in self._edge_programs.items():
-            program = weights_to_outputs_pass(program)
-            program = unsafe_remove_auto_functionalized_pass(program)
-            gm, new_signature = insert_write_back_for_buffers_pass(program)
-            new_gm = program.graph_module
-            for p in edge_to_executorch_passes(config, name):
-                new_gm_res = p(new_gm)
-                assert new_gm_res is not None
-                new_gm = new_gm_res.graph_module
-                if isinstance(p, SpecPropPass):
-                    # Note that this is a hacky way to get around the fact that
-                    # placeholder nodes corresponding to the parameters of the graph module
-                    # shall not participate in memory planning. It increases runtime memory
-                    # footprint.
-                    # Proper way would be to have ExportPass work with ExportedProgram
-                    # instead of GraphModule. This is because ExportPass should work
-                    # on top of the export artifact of torch.export whichi s ExportedProgram.
-                    # Working with GraphModule does not provide all the information contained
-                    # in the ExportedProgram
-                    # TODO(who?)
-                    p.update_placeholder_tensor_specs(program, new_gm)
-
             if isinstance(config.memory_planning_pass, dict):
                 memory_planning_pass = config.memory_planning_pass.get(
                     name, ExecutorchBackendConfig().memory_planning_pass
                 )
             else:
                 memory_planning_pass = config.memory_planning_pass
-            # TODO(jakeszwe): Follow up with compiler on if the deepcopy is necessary and if so how to make it work
-            if hasattr(memory_planning_pass, "run"):
-                new_gm_res = memory_planning_pass.run(  # pyre-ignore[16]
-                    new_gm, new_signature
-                )
-            else:
-                new_gm_res = memory_planning_pass(new_gm)  # pyre-ignore[29]
-            assert new_gm_res is not None
-            new_gm = new_gm_res.graph_module
+            if concurrent:
+                # Memory planning keeps state while it runs, each method
+                # needs its own.
+                memory_planning_pass = copy.deepcopy(memory_planning_pass)
+            memory_planning_passes[name] = memory_planning_pass
+            planning_inputs[name] = _run_executorch_passes(
+                program, edge_to_executorch_passes(config, name)
+            )
 
-            _copy_module(program.graph_module, new_gm)
-            execution_programs[name] = program
+        def plan_memory(
+            name: str,
+            inputs: Tuple[ExportedProgram, torch.fx.GraphModule, ExportGraphSignature],
+        ) -> ExportedProgram:
+            return _plan_memory(*inputs, memory_planning_passes[name])
 
+        execution_programs = _map_methods(plan_memory, planning_inputs)
         return ExecutorchProgramManager(
             execution_programs, self._config_methods, config
         )
@@ -1402,21 +1543,23 @@ class ExecutorchProgramManager:
         backend_config = backend_config or ExecutorchBackendConfig()
 
         # Emit methods
-        self._emitter_output: EmitterOutput = emit_program(
-            self._execution_programs,
-            backend_config.emit_stacktrace,
-            self._config_methods,
-        )
+        with profile_stage("emit_program", "emit"):
+            self._emitter_output: EmitterOutput = emit_program(
+                self._execution_programs,
+                backend_config.emit_stacktrace,
+                self._config_methods,
+            )
 
         # Serialize emitter output, ready to be written to a file.
-        self._pte_data: Cord = _serialize_pte_binary(
-            program=self._emitter_output.program,
-            mutable_data=self._emitter_output.mutable_data,
-            extract_delegate_segments=backend_config.extract_delegate_segments,
-            segment_alignment=backend_config.segment_alignment,
-            constant_tensor_alignment=backend_config.constant_tensor_alignment,
-            delegate_alignment=backend_config.delegate_alignment,
-        )
+        with profile_stage("serialize_pte_binary", "serialize"):
+            self._pte_data: Cord = _serialize_pte_binary(
+                program=self._emitter_output.program,
+                mutable_data=self._emitter_output.mutable_data,
+                extract_delegate_segments=backend_config.extract_delegate_segments,
+                segment_alignment=backend_config.segment_alignment,
+                constant_tensor_alignment=backend_config.constant_tensor_alignment,
+                delegate_alignment=backend_config.delegate_alignment,
+            )
         self._buffer: Optional[bytes] = None
 
     @property
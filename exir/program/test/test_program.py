@@ -8,7 +8,7 @@
 
 import copy
 import unittest
-from typing import Any, Dict
+from typing import Any, Dict, List, Tuple
 
 import torch
 from executorch.exir import EdgeCompileConfig, ExecutorchBackendConfig
@@ -22,6 +22,7 @@ from executorch.exir.lowered_backend_module import get_lowered_submodules
 from executorch.exir.pass_base import ExportPass
 from executorch.exir.passes import MemoryPlanningPass
 from executorch.exir.program._program import (
+    concurrent_methods,
     EdgeProgramManager,
     ExecutorchProgramManager,
     to_edge,
@@ -36,6 +37,7 @@ from executorch.extension.pybindings.portable_lib import (
 )
 from torch.export import Dim, export, ExportedProgram
 from torch.export._trace import _export
+from torch.fx import traceback as fx_traceback
 
 from torch.library import impl, Library
 from torch.nn import functional as F
@@ -684,6 +686,80 @@ class TestProgramManagers(unittest.TestCase):
             1,
         )
 
+    def test_concurrent_methods_to_executorch(self):
+        expected = to_edge(
+            get_exported_programs(), get_config_methods()
+        ).to_executorch()
+        with concurrent_methods(max_workers=2):
+            executorch_manager = to_edge(
+                get_exported_programs(), get_config_methods()
+            ).to_executorch()
+        self.assertEqual(executorch_manager.buffer, expected.buffer)
+
+    def test_concurrent_methods_to_edge_transform_and_lower(self):
+        def lower() -> bytes:
+            programs = {
+                name: _export(model, model._get_random_inputs(), pre_dispatch=True)
+                for name, model in [
+                    ("linear", TestLinear()),
+                    ("sdpa", TestSDPA()),
+                    ("combined", TestLinearSDPACombined()),
+                ]
+            }
+            return (
+                to_edge_transform_and_lower(
+                    programs, partitioner=[NonDecompTestPartitioner()]
+                )
+                .to_executorch()
+                .buffer
+            )
+
+        torch.manual_seed(0)
+        expected = lower()
+        with concurrent_methods():
+            torch.manual_seed(0)
+            self.assertEqual(lower(), expected)
+
+    def test_concurrent_methods_keep_node_meta(self):
+        class Layers(torch.nn.Module):
+            def __init__(self, num_layers: int) -> None:
+                super().__init__()
+                self.layers = torch.nn.Sequential(
+                    *[torch.nn.Linear(8, 8) for _ in range(num_layers)]
+                )
+
+            def forward(self, x: torch.Tensor) -> torch.Tensor:
+                return torch.relu(self.layers(x)) * 2
+
+        def node_meta() -> Dict[str, List[Tuple[str, object, object]]]:
+            programs = {
+                f"method_{i}": export(Layers(i + 1), (torch.randn(2, 8),))
+                for i in range(8)
+            }
+            manager = to_edge(programs).to_executorch()
+            return {
+                name: [
+                    (
+                        node.name,
+                        node.meta.get("nn_module_stack"),
+                        node.meta.get("stack_trace"),
+                    )
+                    for node in manager.exported_program(name).graph.nodes
+                ]
+                for name in manager.methods
+            }
+
+        expected = node_meta()
+        should_preserve_node_meta = fx_traceback.should_preserve_node_meta
+        current_meta = fx_traceback.get_current_meta().copy()
+        with concurrent_methods():
+            self.assertEqual(node_meta(), expected)
+        # The process-global node meta state is left as it was.
+        self.assertEqual(
+            fx_traceback.should_preserve_node_meta, should_preserve_node_meta
+        )
+        self.assertEqual(fx_traceback.get_current_meta(), current_meta)
+
     def test_edge_dialect_non_core_aten_ops(self):
         class LinalgNorm(torch.nn.Module):
             def __init__(self):
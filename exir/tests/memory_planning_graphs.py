@@ -0,0 +1,47 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-strict
+
+import random
+from typing import List
+
+import torch
+from executorch.exir import memory
+from executorch.exir.tensor import TensorSpec
+from torch import fx
+
+
+def make_synthetic_graph(
+    num_specs: int, seed: int = 0, max_fanout_distance: int = 64
+) -> fx.GraphModule:
+    """
+    Returns a graph of num_specs memory.alloc nodes. Each node consumes one or
+    two recent nodes and, occasionally, a much older one, so that lifetimes
+    look like those of residual networks. The number of tensors alive at once
+    does not grow with num_specs, as in a deep stack of identical layers.
+    """
+    rng = random.Random(seed)
+    graph = fx.Graph()
+    nodes: List[fx.Node] = []
+    for i in range(num_specs):
+        inputs = [nodes[i - 1 - rng.randrange(min(i, 2))]] if i > 0 else []
+        if i > max_fanout_distance and rng.random() < 0.05:
+            # Long skip connection, e.g. across the blocks of a U-Net.
+            distance = rng.randrange(max_fanout_distance, 16 * max_fanout_distance)
+            inputs.append(nodes[max(0, i - distance)])
+        elif i > 1 and rng.random() < 0.3:
+            inputs.append(nodes[i - 1 - rng.randrange(min(i, max_fanout_distance))])
+        node = graph.call_function(memory.alloc, (tuple(inputs),))
+        # Mostly small activations, with the occasional large one.
+        numel = rng.choice([64, 128, 256, 1024]) * rng.randint(1, 16)
+        if rng.random() < 0.1:
+            numel *= 64
+        node.meta["spec"] = TensorSpec(torch.float32, torch.Size([numel]))
+        nodes.append(node)
+    output = graph.output(nodes[-1] if nodes else None)
+    output.meta["spec"] = nodes[-1].meta["spec"] if nodes else None
+    return fx.GraphModule(torch.nn.Module(), graph)
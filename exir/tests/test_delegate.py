@@ -5,16 +5,20 @@
 # LICENSE file in the root directory of this source tree.
 
 import unittest
+from unittest import mock
 
 import executorch.exir.tests.models as models
 
 import torch
 from executorch.exir import EdgeCompileConfig, to_edge
+from executorch.exir.backend.test.op_partitioner_demo import AddMulPartitionerDemo
+from executorch.exir.delegate import executorch_call_delegate
 from executorch.exir.dialects._ops import ops as exir_ops
 from executorch.exir.lowered_backend_module import (
     create_submodule_from_nodes,
     LoweredBackendModule,
 )
+from executorch.exir.passes import debug_handle_generator_pass
 from executorch.exir.schema import (
     BackendDelegate,
     BackendDelegateDataReference,
@@ -309,3 +313,97 @@ class TestDelegate(unittest.TestCase):
 
         new_res = prog.exported_program().module()(*inputs)
         self.assertTrue(torch.allclose(new_res, orig_res))
+
+    def test_create_submodule_interleaved_nodes(self) -> None:
+        """
+        Original graph:
+            add_tensor = add(x, y)
+            sin_tensor = sin(add_tensor)
+            mul_tensor = mul(add_tensor, y)
+            sub_tensor = sub(sin_tensor, mul_tensor)
+            return [sub_tensor]
+
+        Final graph, where only sin_tensor has been moved:
+            partitioned_res = partitioned_graph(x, y)
+            getitem_0 = partitioned_res[0]
+            getitem_1 = partitioned_res[1]
+            sin_tensor = sin(getitem_0)
+            sub_tensor = sub(sin_tensor, getitem_1)
+            return [sub_tensor]
+        """
+        inputs = (torch.randn(1, 3), torch.randn(1, 3))
+
+        class Model(torch.nn.Module):
+            def forward(self, x, y):
+                x = x + y
+                z = torch.sin(x)
+                return z - x * y
+
+        orig_res = Model()(*inputs)
+        prog = to_edge(export(Model(), inputs))
+        gm = prog.exported_program().graph_module
+
+        node_list = []
+        other_nodes = []
+        for node in gm.graph.nodes:
+            if node.op == "call_function" and node.target in {
+                exir_ops.edge.aten.add.Tensor,
+                exir_ops.edge.aten.mul.Tensor,
+            }:
+                node_list.append(node)
+            else:
+                other_nodes.append(node)
+
+        _, call_module_node = create_submodule_from_nodes(gm, node_list, "tag")
+        gm.graph.lint()
+        gm.recompile()
+
+        # The nodes outside of the partition are reordered in place
+        remaining_nodes = list(gm.graph.nodes)
+        for node in other_nodes:
+            self.assertIn(node, remaining_nodes)
+        sin_node = next(
+            node
+            for node in remaining_nodes
+            if node.target == exir_ops.edge.aten.sin.default
+        )
+        self.assertLess(
+            remaining_nodes.index(call_module_node), remaining_nodes.index(sin_node)
+        )
+
+        new_res = prog.exported_program().module()(*inputs)
+        self.assertTrue(torch.allclose(new_res, orig_res))
+
+    def test_delegate_debug_handles(self) -> None:
+        class Model(torch.nn.Module):
+            def forward(self, x, y):
+                for _ in range(3):
+                    x = torch.sin(torch.mm(x, y) + y)
+                return x
+
+        inputs = (torch.randn(2, 2), torch.randn(2, 2))
+        edge = to_edge(
+            export(Model(), inputs),
+            compile_config=EdgeCompileConfig(_check_ir_validity=False),
+        )
+        max_handle = max(
+            node.meta["debug_handle"]
+            for node in edge.exported_program().graph.nodes
+            if "debug_handle" in node.meta
+        )
+
+        # The handles come from the allocator left by DebugHandleGeneratorPass
+        with mock.patch.object(
+            debug_handle_generator_pass,
+            "_max_debug_handle",
+            wraps=debug_handle_generator_pass._max_debug_handle,
+        ) as max_debug_handle:
+            lowered = edge.to_backend(AddMulPartitionerDemo())
+        self.assertEqual(max_debug_handle.call_count, 0)
+
+        delegate_handles = sorted(
+            node.meta["debug_handle"]
+            for node in lowered.exported_program().graph.nodes
+            if node.target == executorch_call_delegate
+        )
+        self.assertEqual(delegate_handles, list(range(max_handle + 1, max_handle + 4)))
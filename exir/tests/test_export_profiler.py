@@ -0,0 +1,156 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+import torch
+from executorch.exir import (
+    EdgeCompileConfig,
+    ExecutorchBackendConfig,
+    ExportProfiler,
+    to_edge,
+)
+from executorch.exir.backend.test.op_partitioner_demo import AddAttributePartitionerDemo
+from executorch.exir.export_profiler import get_export_profiler, profile_stage
+from torch.export import export
+
+
+class AddSin(torch.nn.Module):
+    def forward(self, x: torch.Tensor, y: torch.Tensor) -> torch.Tensor:
+        return torch.sin(x + y) + y
+
+
+def export_add_sin() -> torch.export.ExportedProgram:
+    return export(AddSin(), (torch.ones(2, 2), torch.ones(2, 2)))
+
+
+class TestExportProfiler(unittest.TestCase):
+    def test_records_stages(self) -> None:
+        with ExportProfiler() as profiler:
+            to_edge(
+                export_add_sin(),
+                compile_config=EdgeCompileConfig(_check_ir_validity=False),
+            ).to_backend(AddAttributePartitionerDemo()).to_executorch()
+        self.assertIsNone(get_export_profiler())
+
+        names = {(e.category, e.name) for e in profiler.events}
+        for expected in [
+            ("stage", "to_edge"),
+            ("stage", "to_backend"),
+            ("stage", "to_executorch"),
+            ("pass", "SpecPropPass"),
+            ("pass", "MemoryPlanningPass"),
+            ("partition", "AddAttributePartitionerDemo.partition"),
+            ("preprocess", "BackendWithCompilerDemo.preprocess"),
+            ("emit", "emit_program"),
+            ("serialize", "serialize_pte_binary"),
+        ]:
+            self.assertIn(expected, names)
+
+        for event in profiler.events:
+            self.assertGreaterEqual(event.duration_us, 0)
+            self.assertGreaterEqual(event.traced_peak_delta, 0)
+            self.assertIsNone(event.graph_module)
+            if event.category == "pass":
+                self.assertGreater(event.nodes_before, 0)
+                self.assertGreater(event.nodes_after, 0)
+            if event.category == "stage":
+                self.assertEqual(event.depth, 0)
+            else:
+                self.assertGreater(event.depth, 0)
+
+        summary = profiler.summary(top=3)
+        self.assertEqual(len(summary.splitlines()), 5)
+        self.assertIn("to_executorch", summary)
+
+    def test_chrome_trace(self) -> None:
+        with ExportProfiler(trace_memory=False) as profiler:
+            to_edge(export_add_sin())
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "trace.json")
+            profiler.save_chrome_trace(path)
+            with open(path) as f:
+                trace = json.load(f)
+
+        events = trace["traceEvents"]
+        self.assertEqual(len(events), len(profiler.events))
+        self.assertEqual([e["ts"] for e in events], sorted(e["ts"] for e in events))
+        to_edge_event = next(e for e in events if e["name"] == "to_edge")
+        self.assertEqual(to_edge_event["ph"], "X")
+        for event in events:
+            # Events nested in to_edge fall within it.
+            self.assertGreaterEqual(event["ts"], to_edge_event["ts"])
+            self.assertLessEqual(
+                event["ts"] + event["dur"],
+                to_edge_event["ts"] + to_edge_event["dur"] + 1,
+            )
+            self.assertEqual(event["args"]["traced_peak_delta"], 0)
+
+    def test_backend_config_profiler(self) -> None:
+        edge = to_edge(export_add_sin())
+        profiler = ExportProfiler()
+        edge.to_executorch(ExecutorchBackendConfig(profiler=profiler))
+        self.assertIsNone(get_export_profiler())
+
+        categories = {e.category for e in profiler.events}
+        self.assertEqual(categories, {"stage", "pass", "emit", "serialize"})
+        self.assertNotIn("to_edge", {e.name for e in profiler.events})
+
+    def test_inactive(self) -> None:
+        with profile_stage("stage") as event:
+            self.assertIsNone(event)
+
+        profiler = ExportProfiler()
+        to_edge(export_add_sin())
+        self.assertEqual(profiler.events, [])
+
+    def test_traced_memory(self) -> None:
+        with ExportProfiler() as profiler:
+            with profile_stage("outer"):
+                with profile_stage("inner"):
+                    data = bytearray(2**20)
+                del data
+
+        inner, outer = profiler.events
+        self.assertEqual((inner.name, inner.depth), ("inner", 1))
+        self.assertEqual((outer.name, outer.depth), ("outer", 0))
+        self.assertGreaterEqual(inner.traced_peak_delta, 2**20)
+        # The peak of the inner event counts toward the outer one.
+        self.assertGreaterEqual(outer.traced_peak_delta, inner.traced_peak_delta)
+
+    def test_traced_memory_of_concurrent_stages(self) -> None:
+        started = threading.Barrier(2)
+        with ExportProfiler() as profiler:
+
+            def allocate(name: str) -> None:
+                with profile_stage(name):
+                    started.wait()
+                    data = bytearray(2**20)
+                    del data
+
+            threads = [
+                threading.Thread(target=allocate, args=(name,))
+                for name in ("first", "second")
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            with profile_stage("after"):
+                data = bytearray(2**20)
+                del data
+
+        # The peak of the process can't be attributed to either thread.
+        events = {event.name: event for event in profiler.events}
+        self.assertEqual(events["first"].traced_peak_delta, 0)
+        self.assertEqual(events["second"].traced_peak_delta, 0)
+        self.assertGreaterEqual(events["after"].traced_peak_delta, 2**20)
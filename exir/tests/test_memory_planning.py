@@ -7,6 +7,7 @@
 # pyre-strict
 
 import itertools
+import random
 import unittest
 from typing import Any, Callable, List, Optional, Tuple, Type
 
@@ -15,10 +16,17 @@ import executorch.exir as exir
 import torch
 from executorch.exir import ExecutorchBackendConfig, to_edge
 from executorch.exir.memory_planning import (
+    best_fit,
     filter_nodes,
     get_node_tensor_specs,
     greedy,
+    MemoryArena,
+    MultiArenaAlgo,
     naive,
+    pick_shared_obj,
+    SharedObject,
+    SharedObjectIndex,
+    update_all_tensors_lifetime,
     Verifier,
 )
 from executorch.exir.pass_base import PassResult
@@ -29,6 +37,8 @@ from executorch.exir.passes import (  # noqa
     ToOutVarPass,
 )
 from executorch.exir.passes.sym_shape_eval_pass import ConstraintBasedSymShapeEvalPass
+from executorch.exir.tensor import TensorSpec
+from executorch.exir.tests.memory_planning_graphs import make_synthetic_graph
 from parameterized import parameterized
 
 from torch import nn
@@ -227,6 +237,7 @@ def maketest(
                 (naive, False),
                 # greedy algorithm should reuse tensor storages in the testing model
                 (greedy, True),
+                (best_fit, True),
             ]
 
         for algo, expect_reuse in criteria:
@@ -359,6 +370,7 @@ class TestMemoryPlanning(unittest.TestCase):
         criteria=[
             (naive, False),
             (greedy, True),
+            (best_fit, True),
         ],
     )
 
@@ -369,6 +381,7 @@ class TestMemoryPlanning(unittest.TestCase):
         criteria=[
             (naive, False),
             (greedy, True),
+            (best_fit, True),
         ],
         extra_check=ModuleListArg.extra_check,
     )
@@ -402,6 +415,153 @@ class TestVerifier(unittest.TestCase):
         self.assertFalse(Verifier.has_overlap([5, 6], [1, 2]))
 
 
+class TestSharedObjectIndex(unittest.TestCase):
+    def test_matches_linear_scan(self) -> None:
+        for seed in range(50):
+            rng = random.Random(seed)
+            specs = []
+            for i in range(200):
+                # Mostly increasing lifetime starts, with some out of order.
+                start = i if rng.random() < 0.9 else rng.randint(0, i)
+                spec = TensorSpec(torch.float32, torch.Size([rng.randint(1, 64)]))
+                spec.lifetime = [start, start + rng.randint(0, 20)]
+                specs.append(spec)
+
+            shared_objects: List[SharedObject] = []
+            index = SharedObjectIndex()
+            for spec in specs:
+                self.assertEqual(
+                    index.pick(spec).idx, pick_shared_obj(shared_objects, spec).idx
+                )
+            self.assertEqual(index.shared_objects, shared_objects)
+
+    def test_algos_on_synthetic_graph(self) -> None:
+        sizes = {}
+        for algo in (naive, greedy, best_fit):
+            graph_module = make_synthetic_graph(500)
+            update_all_tensors_lifetime(graph_module)
+            sizes[algo] = sum(algo(graph_module, alignment=16))
+            Verifier(
+                graph_module, alloc_graph_input=True, alloc_graph_output=True
+            ).verify_storage_reuse()
+        self.assertLess(sizes[greedy], sizes[naive])
+        self.assertLess(sizes[best_fit], sizes[greedy])
+
+
+class CondModel(torch.nn.Module):
+    def forward(self, pred: torch.Tensor, x: torch.Tensor) -> torch.Tensor:
+        def true_fn(x: torch.Tensor, y: torch.Tensor) -> torch.Tensor:
+            return (x.sin() @ y).cos() + x
+
+        def false_fn(x: torch.Tensor, y: torch.Tensor) -> torch.Tensor:
+            return (x.cos() - y).exp() + y
+
+        y = x * 2 + 1
+        z = torch.cond(pred, true_fn, false_fn, [x, y])
+        return ((z + y) @ x).relu()
+
+
+class TestMultiArenaAlgo(unittest.TestCase):
+    def plan(self, algo: MultiArenaAlgo) -> Tuple[GraphModule, List[int]]:
+        graph_module = make_synthetic_graph(500)
+        update_all_tensors_lifetime(graph_module)
+        bufsizes = algo(graph_module, 16)
+        Verifier(
+            graph_module, alloc_graph_input=True, alloc_graph_output=True
+        ).verify_storage_reuse()
+        return graph_module, bufsizes
+
+    def test_respects_capacities(self) -> None:
+        algo = MultiArenaAlgo(
+            [
+                MemoryArena(mem_id=2, capacity=None, cost=10.0),
+                MemoryArena(mem_id=1, capacity=64 * 1024, cost=1.0),
+            ]
+        )
+        graph_module, bufsizes = self.plan(algo)
+        self.assertEqual(len(bufsizes), 3)
+        self.assertLessEqual(bufsizes[1], 64 * 1024)
+        self.assertGreater(bufsizes[1], 0)
+        self.assertGreater(bufsizes[2], 0)
+
+        # The fast arena holds the shortest-lived tensors.
+        lifetimes = {1: [], 2: []}
+        for node in graph_module.graph.nodes:
+            spec = node.meta.get("spec")
+            if node.op == "call_function":
+                lifetimes[spec.mem_id].append(spec.lifetime[1] - spec.lifetime[0])
+        self.assertLess(
+            sum(lifetimes[1]) / len(lifetimes[1]),
+            sum(lifetimes[2]) / len(lifetimes[2]),
+        )
+
+    def test_keeps_assigned_mem_ids(self) -> None:
+        graph_module = make_synthetic_graph(100)
+        specs = [
+            node.meta["spec"]
+            for node in graph_module.graph.nodes
+            if node.op == "call_function"
+        ]
+        for spec in specs[::2]:
+            spec.mem_id = 3
+        update_all_tensors_lifetime(graph_module)
+        MultiArenaAlgo([MemoryArena(mem_id=1)])(graph_module, 16)
+        self.assertTrue(all(spec.mem_id == 3 for spec in specs[::2]))
+        self.assertTrue(all(spec.mem_id == 1 for spec in specs[1::2]))
+
+    def test_does_not_fit(self) -> None:
+        with self.assertRaises(RuntimeError):
+            self.plan(MultiArenaAlgo([MemoryArena(mem_id=1, capacity=1024)]))
+
+    def test_cond_blocks_respect_capacities(self) -> None:
+        def plan_cond_model(algo: MultiArenaAlgo) -> GraphModule:
+            return (
+                to_edge(export(CondModel(), (torch.tensor(True), torch.randn(8, 8))))
+                .to_executorch(
+                    ExecutorchBackendConfig(
+                        memory_planning_pass=MemoryPlanningPass(algo)
+                    )
+                )
+                .exported_program()
+                .graph_module
+            )
+
+        # The branches fit in the small arena on their own, but not next to
+        # the outer tensors alive at the cond.
+        graph_module = plan_cond_model(
+            MultiArenaAlgo(
+                [
+                    MemoryArena(mem_id=1, capacity=768, cost=1.0),
+                    MemoryArena(mem_id=2, capacity=None, cost=10.0),
+                ]
+            )
+        )
+        bufsizes = graph_module.meta["non_const_buffer_sizes"]
+        self.assertLessEqual(bufsizes[1], 768)
+        self.assertGreater(bufsizes[2], 0)
+        for module in graph_module.modules():
+            if isinstance(module, GraphModule):
+                for node in module.graph.nodes:
+                    for spec in get_node_tensor_specs(node):
+                        if spec.mem_id == 1 and spec.mem_offset is not None:
+                            self.assertLessEqual(
+                                spec.mem_offset + spec.allocated_memory, 768
+                            )
+
+        with self.assertRaises(RuntimeError):
+            plan_cond_model(
+                MultiArenaAlgo([MemoryArena(mem_id=1, capacity=1024, cost=1.0)])
+            )
+
+    def test_bad_arenas(self) -> None:
+        with self.assertRaises(ValueError):
+            MultiArenaAlgo([])
+        with self.assertRaises(ValueError):
+            MultiArenaAlgo([MemoryArena(mem_id=1), MemoryArena(mem_id=1)])
+        with self.assertRaises(ValueError):
+            MultiArenaAlgo([MemoryArena(mem_id=0)])
+
+
 class TestMisc(unittest.TestCase):
     def test_filter_nodes(self) -> None:
         g = Graph()
@@ -479,6 +639,11 @@ class TestMisc(unittest.TestCase):
                 [(1, 0), (3, 0), (1, 4), (3, 4), (1, 0)],
                 [0, 8, 0, 8],
             ),
+            (
+                best_fit,
+                [(1, 0), (3, 0), (1, 4), (3, 4), (1, 0)],
+                [0, 8, 0, 8],
+            ),
         ]
     )
     def test_multiple_pools(
@@ -524,6 +689,55 @@ class TestMisc(unittest.TestCase):
                 idx += 1
         self.assertEqual(graph_module.meta["non_const_buffer_sizes"], expected_bufsizes)
 
+    def test_cond_submodules_share_storage(self) -> None:
+        def planned_specs(graph_module: GraphModule) -> List[TensorSpec]:
+            specs = {}
+            for node in graph_module.graph.nodes:
+                for spec in get_node_tensor_specs(node):
+                    if spec.mem_offset is not None:
+                        specs[id(spec)] = spec
+            return list(specs.values())
+
+        for algo in (naive, greedy, best_fit):
+            graph_module = (
+                to_edge(export(CondModel(), (torch.tensor(True), torch.randn(8, 8))))
+                .to_executorch(
+                    ExecutorchBackendConfig(
+                        memory_planning_pass=MemoryPlanningPass(algo)
+                    )
+                )
+                .exported_program()
+                .graph_module
+            )
+            cond_idx, cond_node = next(
+                (i, node)
+                for i, node in enumerate(graph_module.graph.nodes)
+                if node.target is torch.ops.higher_order.cond
+            )
+            live_specs = [
+                spec
+                for spec in planned_specs(graph_module)
+                if spec.lifetime[0] <= cond_idx <= spec.lifetime[1]
+            ]
+            branches = [
+                getattr(graph_module, branch.target) for branch in cond_node.args[1:3]
+            ]
+            branch_intervals = []
+            for branch in branches:
+                Verifier(
+                    branch, alloc_graph_input=False, alloc_graph_output=True
+                ).verify_storage_reuse()
+                intervals = set()
+                for spec in planned_specs(branch):
+                    # Branch tensors may not overlap with the tensors of the
+                    # outer graph that are alive while the cond runs.
+                    for live_spec in live_specs:
+                        self.assertFalse(Verifier.storage_overlap(spec, live_spec))
+                    intervals.add((spec.mem_offset, spec.allocated_memory))
+                branch_intervals.append(intervals)
+            # The branches never run together, so they reuse the same storage.
+            self.assertTrue(branch_intervals[0] & branch_intervals[1])
+
     def test_constants_not_memory_planned(self) -> None:
         class Simple(torch.nn.Module):
             def __init__(self) -> None:
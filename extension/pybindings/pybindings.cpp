@@ -8,9 +8,12 @@
 
 #include <algorithm>
 #include <cstdio>
+#include <cstring>
 #include <iostream>
 #include <memory>
+#include <optional>
 #include <stdexcept>
+#include <tuple>
 #include <unordered_map>
 
 #include <pybind11/iostream.h>
@@ -336,6 +339,12 @@ class Module final {
     return Span<uint8_t>(debug_buffer_.get(), debug_buffer_size_);
   }
 
+  /// Returns the memory planned buffers shared by all methods. They hold the
+  /// mutable buffers of the methods, like KV caches, between executions.
+  const std::vector<Span<uint8_t>>& planned_buffers() const {
+    return memory_->non_const_spans();
+  }
+
  private:
   /// A wrapper/util class for executorch memory allocations/manager.
   class Memory {
@@ -358,6 +367,10 @@ class Module final {
       return &mem_manager_;
     }
 
+    const std::vector<Span<uint8_t>>& non_const_spans() const {
+      return non_const_spans_;
+    }
+
     Memory(const Memory&) = delete;
     Memory& operator=(const Memory&) = delete;
 
@@ -918,7 +931,68 @@ struct PyModule final {
     return module_->method_names();
   }
 
+  /// Index of a memory planned buffer, offset and size in bytes.
+  using PlannedSpan = std::tuple<size_t, size_t, size_t>;
+
+  py::list get_planned_buffers(
+      const std::optional<std::vector<PlannedSpan>>& spans) {
+    const auto planned = planned_spans(spans);
+    py::list list(planned.size());
+    for (size_t i = 0; i < planned.size(); ++i) {
+      list[i] = py::bytes(
+          reinterpret_cast<const char*>(planned[i].data()), planned[i].size());
+    }
+    return list;
+  }
+
+  void set_planned_buffers(
+      const std::vector<std::string>& contents,
+      const std::optional<std::vector<PlannedSpan>>& spans) {
+    const auto planned = planned_spans(spans);
+    THROW_IF_ERROR(
+        contents.size() == planned.size() ? Error::Ok : Error::InvalidArgument,
+        "expected %zu planned buffers, got %zu",
+        planned.size(),
+        contents.size());
+    for (size_t i = 0; i < planned.size(); ++i) {
+      THROW_IF_ERROR(
+          contents[i].size() == planned[i].size() ? Error::Ok
+                                                  : Error::InvalidArgument,
+          "expected %zu bytes for planned buffer %zu, got %zu",
+          planned[i].size(),
+          i,
+          contents[i].size());
+    }
+    for (size_t i = 0; i < planned.size(); ++i) {
+      std::memcpy(planned[i].data(), contents[i].data(), contents[i].size());
+    }
+  }
+
  private:
+  /// Returns the given spans of the memory planned buffers, or the whole
+  /// buffers if there are none.
+  std::vector<Span<uint8_t>> planned_spans(
+      const std::optional<std::vector<PlannedSpan>>& spans) {
+    const auto& buffers = module_->planned_buffers();
+    if (!spans.has_value()) {
+      return buffers;
+    }
+    std::vector<Span<uint8_t>> result;
+    for (const auto& [index, offset, size] : *spans) {
+      THROW_IF_ERROR(
+          index < buffers.size() && offset <= buffers[index].size() &&
+                  size <= buffers[index].size() - offset
+              ? Error::Ok
+              : Error::InvalidArgument,
+          "span of %zu bytes at offset %zu is out of planned buffer %zu",
+          size,
+          offset,
+          index);
+      result.emplace_back(buffers[index].data() + offset, size);
+    }
+    return result;
+  }
+
   std::shared_ptr<Module> module_;
   // Need to keep-alive output storages until they can be compared in case of
   // bundled programs.
@@ -1057,6 +1131,17 @@ PYBIND11_MODULE(EXECUTORCH_PYTHON_MODULE_NAME, m) {
           py::arg("method_name"),
           call_guard)
       .def("method_names", &PyModule::method_names, call_guard)
+      .def(
+          "get_planned_buffers",
+          &PyModule::get_planned_buffers,
+          py::arg("spans") = py::none(),
+          call_guard)
+      .def(
+          "set_planned_buffers",
+          &PyModule::set_planned_buffers,
+          py::arg("contents"),
+          py::arg("spans") = py::none(),
+          call_guard)
       .def(
           "run_method",
           &PyModule::run_method,
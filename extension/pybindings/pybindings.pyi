@@ -68,6 +68,17 @@ class ExecuTorchModule:
     ) -> None: ...
     def method_meta(self, method_name: str) -> MethodMeta: ...
     def method_names(self) -> List[str]: ...
+    # Copies of the memory planned buffers shared by all methods, which hold
+    # mutable buffers like KV caches between executions. With spans, as
+    # buffer index, offset and size in bytes, only copies those parts.
+    def get_planned_buffers(
+        self, spans: Optional[Sequence[Tuple[int, int, int]]] = None
+    ) -> List[bytes]: ...
+    def set_planned_buffers(
+        self,
+        contents: Sequence[bytes],
+        spans: Optional[Sequence[Tuple[int, int, int]]] = None,
+    ) -> None: ...
 
 @experimental("This API is experimental and subject to change without notice.")
 class BundledModule: